@@ -0,0 +1,263 @@
+import contextvars
+import threading
+import time
+from pathlib import Path
+
+import eth_abi
+from web3 import Web3
+
+import enums
+import multicall
+import pool_registry
+from logger import logging
+
+
+LEDGER_PATH = pool_registry.CACHE_DIRECTORY / 'allowances.json'
+
+MAX_UINT256 = 2 ** 256 - 1
+APPROVAL_MULTIPLE = 10
+
+CONFIRM_TIMEOUT = 60
+CONFIRM_POLL_INTERVAL = 0.5
+CONFIRM_MAX_POLL_INTERVAL = 5
+
+APPROVAL_TOPIC = bytes(Web3.keccak(text='Approval(address,address,uint256)'))
+
+
+class ApprovalPolicy(enums.AutoEnum):
+    EXACT = enums.auto()
+    MULTIPLE = enums.auto()
+    UNLIMITED = enums.auto()
+
+
+policy = ApprovalPolicy.MULTIPLE
+multiple = APPROVAL_MULTIPLE
+
+_retrying = contextvars.ContextVar('allowances_retrying', default=False)
+
+
+def configure(approval_policy: ApprovalPolicy = None, approval_multiple: int = None):
+    global policy, multiple
+    if approval_policy is not None:
+        policy = approval_policy
+    if approval_multiple is not None:
+        multiple = approval_multiple
+
+
+def approve_amount(amount_in_wei: int) -> int:
+    if policy == ApprovalPolicy.UNLIMITED:
+        return MAX_UINT256
+    if policy == ApprovalPolicy.MULTIPLE:
+        return amount_in_wei * multiple
+    return amount_in_wei
+
+
+def _topic_address(topic: bytes) -> str:
+    return Web3.to_checksum_address(bytes(topic)[-20:])
+
+
+def decode_approval_logs(receipt) -> list[tuple[str, str, str, int]]:
+    approvals = []
+
+    for log in receipt.get('logs', []) if receipt else []:
+        topics = [bytes(topic) for topic in log['topics']]
+        if len(topics) != 3 or topics[0] != APPROVAL_TOPIC:
+            continue
+        (amount,) = eth_abi.decode(['uint256'], bytes(log['data']))
+        approvals.append((
+            Web3.to_checksum_address(log['address']),
+            _topic_address(topics[1]),
+            _topic_address(topics[2]),
+            amount
+        ))
+
+    return approvals
+
+
+class AllowanceLedger:
+    def __init__(self, path: Path = LEDGER_PATH):
+        self._store = pool_registry.PoolRegistry(path)
+        self._lock = threading.Lock()
+
+    def flush(self):
+        self._store.flush()
+
+    @staticmethod
+    def _section(owner: str) -> str:
+        return Web3.to_checksum_address(owner)
+
+    @staticmethod
+    def _key(token_address: str, spender: str) -> str:
+        return f'{Web3.to_checksum_address(token_address)}:{Web3.to_checksum_address(spender)}'
+
+    def get(
+        self,
+        network_name: enums.NetworkNames,
+        owner: str,
+        token_address: str,
+        spender: str
+    ):
+        return self._store.get(network_name, self._section(owner), self._key(token_address, spender))
+
+    def set(
+        self,
+        network_name: enums.NetworkNames,
+        owner: str,
+        token_address: str,
+        spender: str,
+        amount: int
+    ):
+        self._store.set(network_name, self._section(owner), self._key(token_address, spender), amount)
+
+    def forget(
+        self,
+        network_name: enums.NetworkNames,
+        owner: str,
+        token_address: str,
+        spender: str
+    ):
+        self._store.delete(network_name, self._section(owner), self._key(token_address, spender))
+
+    def covers(
+        self,
+        network_name: enums.NetworkNames,
+        owner: str,
+        token_address: str,
+        spender: str,
+        amount_in_wei: int
+    ) -> bool:
+        allowance = self.get(network_name, owner, token_address, spender)
+        return allowance is not None and allowance >= amount_in_wei
+
+    def record_receipt(self, network_name: enums.NetworkNames, receipt) -> list[tuple[str, str, str, int]]:
+        approvals = decode_approval_logs(receipt)
+        for token_address, owner, spender, amount in approvals:
+            self.set(network_name, owner, token_address, spender, amount)
+        return approvals
+
+    def record_approval(
+        self,
+        network_name: enums.NetworkNames,
+        owner: str,
+        token_address: str,
+        spender: str,
+        amount: int,
+        receipt=None
+    ):
+        if not self._recorded(network_name, owner, token_address, spender, receipt):
+            self.set(network_name, owner, token_address, spender, amount)
+
+    def record_spend(
+        self,
+        network_name: enums.NetworkNames,
+        owner: str,
+        token_address: str,
+        spender: str,
+        amount_in_wei: int,
+        receipt=None
+    ):
+        if self._recorded(network_name, owner, token_address, spender, receipt):
+            return
+
+        with self._lock:
+            allowance = self.get(network_name, owner, token_address, spender)
+            if allowance is None or allowance == MAX_UINT256:
+                return
+            self.set(network_name, owner, token_address, spender, max(allowance - amount_in_wei, 0))
+
+    def fetch(
+        self,
+        zk_web3: Web3,
+        network_name: enums.NetworkNames,
+        owner: str,
+        token_address: str,
+        spender: str
+    ) -> int:
+        allowance_call = multicall.Call(token_address, 'allowance(address,address)', (owner, spender))
+        (allowance,) = multicall.aggregate(zk_web3, [allowance_call])
+        if allowance is None:
+            allowance = multicall.call(zk_web3, allowance_call)
+        self.set(network_name, owner, token_address, spender, allowance)
+        return allowance
+
+    def stale(
+        self,
+        zk_web3: Web3,
+        network_name: enums.NetworkNames,
+        owner: str,
+        token_address: str,
+        spender: str,
+        amount_in_wei: int
+    ) -> bool:
+        self.forget(network_name, owner, token_address, spender)
+        try:
+            allowance = self.fetch(zk_web3, network_name, owner, token_address, spender)
+        except Exception as e:
+            logging.warning(f'Failed to fetch allowance of {token_address}: {e}')
+            return False
+        return allowance < amount_in_wei
+
+    def confirm_approval(
+        self,
+        zk_web3: Web3,
+        network_name: enums.NetworkNames,
+        owner: str,
+        token_address: str,
+        spender: str,
+        amount_in_wei: int,
+        receipt=None,
+        timeout: float = CONFIRM_TIMEOUT
+    ) -> bool:
+        if self._recorded(network_name, owner, token_address, spender, receipt) and self.covers(
+            network_name, owner, token_address, spender, amount_in_wei
+        ):
+            return True
+
+        deadline = time.monotonic() + timeout
+        interval = CONFIRM_POLL_INTERVAL
+
+        while True:
+            try:
+                allowance = self.fetch(zk_web3, network_name, owner, token_address, spender)
+            except Exception as e:
+                logging.warning(f'Failed to fetch allowance of {token_address}: {e}')
+                allowance = None
+
+            if allowance is not None and allowance >= amount_in_wei:
+                return True
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, CONFIRM_MAX_POLL_INTERVAL)
+
+    def _recorded(
+        self,
+        network_name: enums.NetworkNames,
+        owner: str,
+        token_address: str,
+        spender: str,
+        receipt
+    ) -> bool:
+        key = (token_address.lower(), owner.lower(), spender.lower())
+        approvals = self.record_receipt(network_name, receipt)
+        return any(
+            (token.lower(), approval_owner.lower(), approval_spender.lower()) == key
+            for token, approval_owner, approval_spender, _ in approvals
+        )
+
+
+ledger = AllowanceLedger()
+
+
+def retry_once(func, *args, **kwargs):
+    if _retrying.get():
+        return None
+
+    token = _retrying.set(True)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _retrying.reset(token)
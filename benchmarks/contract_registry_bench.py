@@ -0,0 +1,62 @@
+import argparse
+import time
+
+from web3 import Web3
+
+import contract_registry
+import enums
+
+
+ABI_NAMES = [
+    'SyncSwapRouter',
+    'SyncSwapClassicPoolFactory',
+    'SyncSwapClassicPool',
+    'liquidityManager',
+    'pool',
+    'swap',
+]
+
+ADDRESS = Web3.to_checksum_address('0x' + '11' * 20)
+
+
+def uncached(zk_web3: Web3, abi_name: str):
+    with open(contract_registry.ABI_DIRECTORY / f'{abi_name}.json') as file:
+        abi = file.read()
+    return zk_web3.eth.contract(address=ADDRESS, abi=abi)
+
+
+def cached(zk_web3: Web3, abi_name: str):
+    return contract_registry.get_contract(
+        zk_web3,
+        enums.NetworkNames.zkEra,
+        ADDRESS,
+        abi_name
+    )
+
+
+def measure(func, zk_web3: Web3, abi_name: str, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func(zk_web3, abi_name)
+    return (time.perf_counter() - started) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=1000)
+    args = parser.parse_args()
+
+    zk_web3 = Web3()
+
+    print(f'{"abi":<28}{"uncached, us":>14}{"cached, us":>14}{"speedup":>10}')
+    for abi_name in ABI_NAMES:
+        if not (contract_registry.ABI_DIRECTORY / f'{abi_name}.json').exists():
+            print(f'{abi_name:<28}{"missing":>14}')
+            continue
+        before = measure(uncached, zk_web3, abi_name, args.iterations)
+        after = measure(cached, zk_web3, abi_name, args.iterations)
+        print(f'{abi_name:<28}{before * 1e6:>14.1f}{after * 1e6:>14.1f}{before / after:>9.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+import argparse
+import logging
+import math
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from eth_account import Account
+from web3 import Web3
+
+import allowances
+import clients
+import constants
+import enums
+import izumi_math
+import izumi_pools
+import izumi_positions
+import journal
+import pool_registry
+import sabbe
+import sabbe2
+from benchmarks.mock_node import MockNode
+
+
+WETH = Web3.to_checksum_address('0x' + 'ee' * 20)
+POOL_MASTER = Web3.to_checksum_address('0x' + 'aa' * 20)
+
+TOKEN_BALANCE = 10 ** 24
+RESERVE = 10 ** 24
+SWAP_FEE = 300
+
+IZUMI_FEES = {400: 8, 2000: 40}
+IZUMI_LIQUIDITY = 10 ** 22
+IZUMI_POSITIONS = 3
+SQRT_RATE_96 = math.isqrt(10001 * 2 ** 192 // 10000)
+
+STAGES = ('read', 'estimate+sign', 'confirm', 'total')
+
+
+def derived_address(*parts) -> str:
+    return Web3.to_checksum_address(Web3.keccak(text=':'.join(str(part).lower() for part in parts))[12:])
+
+
+class MockDex:
+    def __init__(self, node: MockNode, network_name: enums.NetworkNames):
+        self.network_name = network_name
+        self.pools = {}
+        self.pool_ids = {}
+
+        syncswap_router = sabbe.CONTRACT_ADRESSES[sabbe.ContractTypes.SWAP][network_name]
+        syncswap_factory = sabbe.CONTRACT_ADRESSES[sabbe.ContractTypes.POOL_FACTORY][network_name]
+        self.liquidity_manager = sabbe2.CONTRACT_ADRESSES[sabbe2.ContractTypes.LIQUIDITY_MANAGER][network_name]
+
+        node.register(None, 'balanceOf(address)', ('uint256',), lambda address, owner: TOKEN_BALANCE)
+        node.register(None, 'allowance(address,address)', ('uint256',), lambda address, owner, spender: 2 ** 255)
+        node.register(None, 'decimals()', ('uint8',), self.decimals)
+
+        node.register(syncswap_router, 'wETH()', ('address',), lambda address: WETH)
+        node.register(syncswap_factory, 'master()', ('address',), lambda address: POOL_MASTER)
+        node.register(syncswap_factory, 'getPool(address,address)', ('address',), self.syncswap_pool)
+        node.register(None, 'getReserves()', ('uint256', 'uint256'), lambda address: (RESERVE, RESERVE))
+        node.register(
+            POOL_MASTER,
+            'getSwapFee(address,address,address,address,bytes)',
+            ('uint24',),
+            lambda address, *args: SWAP_FEE
+        )
+
+        node.register(self.liquidity_manager, 'WETH9()', ('address',), lambda address: WETH)
+        node.register(self.liquidity_manager, 'pool(address,address,uint24)', ('address',), self.izumi_pool)
+        node.register(self.liquidity_manager, 'poolIds(address)', ('uint128',), lambda address, pool: self.pool_ids[pool.lower()])
+        node.register(self.liquidity_manager, 'balanceOf(address)', ('uint256',), lambda address, owner: IZUMI_POSITIONS)
+        node.register(
+            self.liquidity_manager,
+            'tokenOfOwnerByIndex(address,uint256)',
+            ('uint256',),
+            lambda address, owner, index: index + 1
+        )
+        node.register(self.liquidity_manager, 'liquidities(uint256)', izumi_positions.LIQUIDITIES_OUTPUT_TYPES, self.position)
+
+        node.register(None, 'tokenX()', ('address',), lambda address: self.pools[address.lower()][0])
+        node.register(None, 'tokenY()', ('address',), lambda address: self.pools[address.lower()][1])
+        node.register(None, 'fee()', ('uint24',), lambda address: self.pools[address.lower()][2])
+        node.register(None, 'pointDelta()', ('int24',), lambda address: IZUMI_FEES[self.pools[address.lower()][2]])
+        node.register(None, 'sqrtRate_96()', ('uint160',), lambda address: SQRT_RATE_96)
+        node.register(None, 'leftMostPt()', ('int24',), lambda address: -800000)
+        node.register(None, 'rightMostPt()', ('int24',), lambda address: 800000)
+        node.register(None, 'state()', izumi_pools.STATE_OUTPUT_TYPES, lambda address: (
+            2 ** 96, 0, 0, 1, 1, False, IZUMI_LIQUIDITY, 0
+        ))
+        node.register(None, 'pointBitmap(int16)', ('uint256',), lambda address, word: 0)
+        node.register(None, 'points(int24)', izumi_math.POINT_OUTPUT_TYPES, lambda address, point: (0, 0, 0, 0, False))
+        node.register(
+            None,
+            'limitOrderData(int24)',
+            izumi_math.LIMIT_ORDER_OUTPUT_TYPES,
+            lambda address, point: (0,) * len(izumi_math.LIMIT_ORDER_OUTPUT_TYPES)
+        )
+
+    def decimals(self, address: str) -> int:
+        for (network_name, _), token in constants.NETWORK_TOKENS.items():
+            if network_name == self.network_name and token.contract_address.lower() == address.lower():
+                return token.decimals
+        return 18
+
+    def syncswap_pool(self, address: str, first_token_address: str, second_token_address: str) -> str:
+        return derived_address('syncswap', *pool_registry.sort_tokens(first_token_address, second_token_address))
+
+    def izumi_pool(self, address: str, first_token_address: str, second_token_address: str, fee: int) -> str:
+        if fee not in IZUMI_FEES:
+            return sabbe2.ZERO_ADDRESS
+
+        token_x, token_y = pool_registry.sort_tokens(first_token_address, second_token_address)
+        pool_address = derived_address('izumi', token_x, token_y, fee)
+
+        key = pool_address.lower()
+        if key not in self.pools:
+            self.pools[key] = (token_x, token_y, fee)
+            self.pool_ids[key] = len(self.pool_ids) + 1
+
+        return pool_address
+
+    def position(self, address: str, token_id: int) -> tuple:
+        pool_id = (token_id - 1) % max(len(self.pool_ids), 1) + 1
+        return -4000, 4000, IZUMI_LIQUIDITY // 100, 0, 0, 0, 0, pool_id
+
+
+def reset_caches(directory: Path):
+    pool_registry.registry = pool_registry.PoolRegistry(directory / 'pool_registry.json')
+    allowances.ledger = allowances.AllowanceLedger(directory / 'allowances.json')
+    izumi_positions.index = izumi_positions.PositionIndex(directory / 'izumi_positions.json')
+    izumi_pools.cache = izumi_pools.PoolCache(pool_registry.registry)
+    izumi_math._snapshots.clear()
+    sabbe._pool_graphs.clear()
+
+    journal.journal.close()
+    journal.journal = journal.Journal(directory / 'journal.sqlite3')
+
+
+def stage_latencies(timeline: list, started: float, finished: float) -> dict[str, float]:
+    estimated = next((at for at, method in timeline if method == 'eth_estimateGas'), None)
+    sent = next((at for at, method in timeline if method == 'eth_sendRawTransaction'), None)
+
+    read_until = estimated or sent or finished
+    sign_until = sent or finished
+
+    return {
+        'read': read_until - started,
+        'estimate+sign': sign_until - read_until,
+        'confirm': finished - sign_until,
+        'total': finished - started,
+    }
+
+
+def measure(node: MockNode, func, *args, **kwargs) -> dict:
+    node.reset_counters()
+
+    started = time.monotonic()
+    status = func(*args, **kwargs)
+    finished = time.monotonic()
+
+    with node.lock:
+        timeline = list(node.timeline)
+
+    return {
+        'status': status,
+        'http': node.http_requests,
+        'rpc': sum(node.rpc_calls.values()),
+        'bytes_in': node.bytes_in,
+        'bytes_out': node.bytes_out,
+        'stages': stage_latencies(timeline, started, finished),
+    }
+
+
+def report(name: str, mode: str, runs: list[dict]):
+    status = runs[-1]['status']
+    status = getattr(status, 'name', status)
+
+    stages = ''.join(
+        f'{statistics.median(run["stages"][stage] for run in runs) * 1000:>15.0f}'
+        for stage in STAGES
+    )
+
+    print(
+        f'{name:<32}{mode:<6}{str(status):<24}'
+        f'{statistics.median(run["http"] for run in runs):>6.0f}'
+        f'{statistics.median(run["rpc"] for run in runs):>6.0f}'
+        f'{statistics.median(run["bytes_in"] for run in runs) / 1024:>9.1f}'
+        f'{statistics.median(run["bytes_out"] for run in runs) / 1024:>9.1f}'
+        f'{stages}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--network', default='zkEra')
+    parser.add_argument('--from-token', default='ETH')
+    parser.add_argument('--to-token', default='USDC')
+    parser.add_argument('--amount', type=float, default=0.01)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--confirm-delay', type=float, default=0.5)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    network_name = enums.NetworkNames[args.network]
+    from_token_name = enums.TokenNames[args.from_token]
+    to_token_name = enums.TokenNames[args.to_token]
+
+    private_key = Web3.to_hex(Web3.keccak(text='sabbe benchmark'))
+    account = Account.from_key(private_key)
+
+    with MockNode(latency=args.latency, confirm_delay=args.confirm_delay) as node, \
+            tempfile.TemporaryDirectory() as directory:
+        MockDex(node, network_name)
+
+        get_client = clients.get_client
+        clients.get_client = lambda rpc_url, proxy=None: get_client(node.url, proxy)
+
+        entry_points = [
+            ('sabbe.swap', sabbe.swap, (
+                private_key, network_name, from_token_name, to_token_name, 1
+            ), {'amount': args.amount}),
+            ('sabbe.add_liquidity', sabbe.add_liquidity, (
+                private_key, network_name, from_token_name, to_token_name
+            ), {'amount': args.amount}),
+            ('sabbe2.swap', sabbe2.swap, (
+                private_key, network_name, from_token_name, to_token_name, 1
+            ), {'amount': args.amount}),
+            ('sabbe2.zap_liquidity', sabbe2.zap_liquidity, (
+                private_key, network_name, from_token_name, to_token_name
+            ), {'amount': args.amount}),
+            ('sabbe2.remove_random_liquidity', sabbe2.remove_random_liquidity, (
+                private_key, network_name, from_token_name, to_token_name
+            ), {}),
+        ]
+
+        print(f'Benchmarking {account.address} against {node.url}, {args.latency * 1000:.0f} ms per request')
+        print(
+            f'{"entry point":<32}{"mode":<6}{"status":<24}{"http":>6}{"rpc":>6}'
+            f'{"in, KiB":>9}{"out, KiB":>9}'
+            + ''.join(f'{stage + ", ms":>15}' for stage in STAGES)
+        )
+
+        try:
+            for index, (name, func, func_args, func_kwargs) in enumerate(entry_points):
+                reset_caches(Path(directory) / str(index))
+                report(name, 'cold', [measure(node, func, *func_args, **func_kwargs)])
+                report(name, 'warm', [
+                    measure(node, func, *func_args, **func_kwargs)
+                    for _ in range(args.iterations)
+                ])
+        finally:
+            clients.get_client = get_client
+            journal.journal.close()
+
+
+if __name__ == '__main__':
+    main()
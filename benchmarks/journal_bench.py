@@ -0,0 +1,58 @@
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import journal
+
+
+def write_actions(store: journal.Journal, actions: int, durable_every: int):
+    for index in range(actions):
+        action = store.begin('bench.swap', '0x' + 'ab' * 20, {'index': index, 'nonce': time.perf_counter_ns()})
+        action.record('swap', journal.QUOTED, amount_out=index)
+        action.record(
+            'swap',
+            journal.SIGNED,
+            tx_hash=f'0x{index:064x}',
+            raw='0x' + '00' * 256,
+            durable=durable_every > 0 and index % durable_every == 0
+        )
+        action.record('swap', journal.SENT, tx_hash=f'0x{index:064x}')
+        action.finish('SUCCESS')
+
+
+def run(threads: int, actions: int, durable_every: int, flush_interval: float):
+    with tempfile.TemporaryDirectory() as directory:
+        store = journal.Journal(Path(directory) / 'journal.sqlite3', flush_interval=flush_interval)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for _ in range(threads):
+                executor.submit(write_actions, store, actions, durable_every)
+        store.close()
+        elapsed = time.perf_counter() - started
+
+        print(
+            f'{threads:>8}{durable_every:>10}{store.writes:>10}{store.commits:>10}'
+            f'{elapsed:>10.2f}{store.writes / elapsed:>12.0f}'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--actions', type=int, default=200)
+    parser.add_argument('--durable-every', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--flush-interval', type=float, default=journal.FLUSH_INTERVAL)
+    args = parser.parse_args()
+
+    print(f'{"threads":>8}{"durable/n":>10}{"writes":>10}{"commits":>10}{"wall, s":>10}{"writes/s":>12}')
+
+    for threads in args.threads:
+        for durable_every in args.durable_every:
+            run(threads, args.actions, durable_every, args.flush_interval)
+
+
+if __name__ == '__main__':
+    main()
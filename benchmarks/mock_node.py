@@ -0,0 +1,266 @@
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import eth_abi
+from eth_account import Account
+from web3 import Web3
+
+import multicall
+
+
+CHAIN_ID = 324
+GAS_PRICE = 250_000_000
+BLOCK_TIME = 1
+ESTIMATED_GAS = 1_500_000
+NATIVE_BALANCE = 10 ** 21
+
+ZERO_HASH = '0x' + '00' * 32
+ZERO_BLOOM = '0x' + '00' * 256
+
+
+class MockNode:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        confirm_delay: float = 2.0,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        method_latency: dict[str, float] = None
+    ):
+        self.latency = latency
+        self.method_latency = method_latency or {}
+        self.confirm_delay = confirm_delay
+
+        self.handlers = {
+            'eth_chainId': lambda params: hex(CHAIN_ID),
+            'eth_blockNumber': lambda params: hex(self.block_number),
+            'eth_gasPrice': lambda params: hex(GAS_PRICE),
+            'eth_maxPriorityFeePerGas': lambda params: hex(0),
+            'eth_feeHistory': self.get_fee_history,
+            'eth_getBlockByNumber': lambda params: self.get_block(),
+            'eth_getBalance': lambda params: hex(NATIVE_BALANCE),
+            'eth_getTransactionCount': self.get_transaction_count,
+            'eth_getCode': lambda params: '0x',
+            'eth_getLogs': lambda params: [],
+            'eth_call': self.call,
+            'eth_estimateGas': lambda params: hex(ESTIMATED_GAS),
+            'eth_sendRawTransaction': self.send_raw_transaction,
+            'eth_getTransactionReceipt': self.get_transaction_receipt,
+        }
+
+        self.contracts = {}
+        self.register(multicall.MULTICALL3_ADDRESS, multicall.AGGREGATE3_SIGNATURE, ('(bool,bytes)[]',), self.aggregate3)
+
+        self.started_at = time.monotonic()
+        self.first_seen = {}
+        self.nonces = Counter()
+        self.lock = threading.Lock()
+
+        self.http_requests = 0
+        self.rpc_calls = Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.timeline = []
+
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def block_number(self) -> int:
+        return int((time.monotonic() - self.started_at) / BLOCK_TIME) + 1
+
+    def reset_counters(self):
+        with self.lock:
+            self.http_requests = 0
+            self.rpc_calls.clear()
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self.timeline.clear()
+
+    def register(self, address: str, signature: str, output_types: tuple, func):
+        input_types = multicall.split_types(signature[signature.index('(') + 1:-1])
+        key = (None if address is None else address.lower(), bytes(Web3.keccak(text=signature)[:4]))
+        self.contracts[key] = (input_types, output_types, func)
+
+    def execute(self, address: str, data: bytes) -> bytes:
+        selector = data[:4]
+        entry = self.contracts.get((address.lower(), selector)) or self.contracts.get((None, selector))
+        if entry is None:
+            raise ValueError('execution reverted')
+
+        input_types, output_types, func = entry
+        args = eth_abi.decode(input_types, data[4:]) if input_types else ()
+
+        result = func(address, *args)
+        if len(output_types) == 1:
+            result = (result,)
+
+        return eth_abi.encode(list(output_types), list(result))
+
+    def aggregate3(self, address: str, calls: list) -> list:
+        results = []
+        for target, _, data in calls:
+            try:
+                results.append((True, self.execute(target, data)))
+            except Exception:
+                results.append((False, b''))
+        return results
+
+    def call(self, params):
+        txn = params[0]
+        data = txn.get('data') or txn.get('input') or '0x'
+        return Web3.to_hex(self.execute(txn['to'], bytes.fromhex(data[2:])))
+
+    def get_block(self):
+        block_number = self.block_number
+        return {
+            'number': hex(block_number),
+            'hash': '0x' + f'{block_number:064x}',
+            'parentHash': ZERO_HASH,
+            'timestamp': hex(int(time.time())),
+            'baseFeePerGas': hex(GAS_PRICE),
+            'gasLimit': hex(2 ** 32),
+            'gasUsed': '0x0',
+            'miner': '0x' + '00' * 20,
+            'logsBloom': ZERO_BLOOM,
+            'transactions': [],
+        }
+
+    def get_fee_history(self, params):
+        blocks = int(params[0], 16) if isinstance(params[0], str) else params[0]
+        history = {
+            'oldestBlock': hex(max(1, self.block_number - blocks + 1)),
+            'baseFeePerGas': [hex(GAS_PRICE)] * (blocks + 1),
+            'gasUsedRatio': [0.5] * blocks,
+        }
+        if params[2]:
+            history['reward'] = [[hex(0)] * len(params[2])] * blocks
+        return history
+
+    def get_transaction_count(self, params):
+        with self.lock:
+            return hex(self.nonces[params[0].lower()])
+
+    def send_raw_transaction(self, params):
+        raw = bytes.fromhex(params[0][2:])
+        txn_hash = Web3.to_hex(Web3.keccak(raw))
+        sender = Account.recover_transaction(raw)
+
+        with self.lock:
+            self.nonces[sender.lower()] += 1
+            self.first_seen.setdefault(txn_hash, time.monotonic())
+
+        return txn_hash
+
+    def get_transaction_receipt(self, params):
+        txn_hash = params[0].lower()
+        now = time.monotonic()
+
+        with self.lock:
+            first_seen = self.first_seen.setdefault(txn_hash, now)
+
+        if now - first_seen < self.confirm_delay:
+            return None
+
+        block_number = int((first_seen + self.confirm_delay - self.started_at) / BLOCK_TIME) + 1
+
+        return {
+            'blockHash': ZERO_HASH,
+            'blockNumber': hex(block_number),
+            'contractAddress': None,
+            'cumulativeGasUsed': hex(150_000),
+            'effectiveGasPrice': hex(GAS_PRICE),
+            'from': '0x' + '11' * 20,
+            'gasUsed': hex(150_000),
+            'logs': [],
+            'logsBloom': ZERO_BLOOM,
+            'status': '0x1',
+            'to': '0x' + '22' * 20,
+            'transactionHash': txn_hash,
+            'transactionIndex': '0x0',
+            'type': '0x2',
+        }
+
+    def handle(self, request: dict) -> dict:
+        method = request.get('method')
+        with self.lock:
+            self.rpc_calls[method] += 1
+            self.timeline.append((time.monotonic(), method))
+
+        handler = self.handlers.get(method)
+        if handler is None:
+            return {
+                'jsonrpc': '2.0',
+                'id': request.get('id'),
+                'error': {'code': -32601, 'message': f'Method {method} is not supported'}
+            }
+
+        try:
+            result = handler(request.get('params', []))
+        except Exception as e:
+            return {'jsonrpc': '2.0', 'id': request.get('id'), 'error': {'code': -32000, 'message': f'{e}'}}
+
+        return {'jsonrpc': '2.0', 'id': request.get('id'), 'result': result}
+
+    def _handler(self):
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                payload = json.loads(body)
+
+                requests = payload if isinstance(payload, list) else [payload]
+                methods = [request.get('method') for request in requests]
+                latency = node.latency + max((node.method_latency.get(method, 0) for method in methods), default=0)
+                if latency:
+                    time.sleep(latency)
+
+                if isinstance(payload, list):
+                    response = [node.handle(request) for request in payload]
+                else:
+                    response = node.handle(payload)
+
+                data = json.dumps(response).encode()
+
+                with node.lock:
+                    node.http_requests += 1
+                    node.bytes_in += len(body)
+                    node.bytes_out += len(data)
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,67 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from web3 import HTTPProvider, Web3
+
+import receipts
+from benchmarks.mock_node import MockNode
+
+
+def random_hashes(count: int) -> list[str]:
+    return [Web3.to_hex(os.urandom(32)) for _ in range(count)]
+
+
+def per_hash_polling(node: MockNode, hashes: list[str], poll_interval: float) -> list:
+    zk_web3 = Web3(HTTPProvider(node.url))
+
+    def wait(txn_hash):
+        return zk_web3.eth.wait_for_transaction_receipt(txn_hash, timeout=60, poll_latency=poll_interval)
+
+    with ThreadPoolExecutor(max_workers=len(hashes)) as executor:
+        return list(executor.map(wait, hashes))
+
+
+def batched_watcher(node: MockNode, hashes: list[str], poll_interval: float) -> list:
+    watcher = receipts.ReceiptWatcher(Web3(HTTPProvider(node.url)), poll_interval=poll_interval)
+    return watcher.wait_all(hashes, timeout=60)
+
+
+def run(name: str, func, node: MockNode, count: int, poll_interval: float):
+    node.reset_counters()
+    hashes = random_hashes(count)
+
+    started = time.perf_counter()
+    results = func(node, hashes, poll_interval)
+    elapsed = time.perf_counter() - started
+
+    mined = sum(1 for receipt in results if receipt is not None and receipt['status'] == 1)
+
+    print(
+        f'{name:<20}{count:>8}{mined:>8}{elapsed:>10.2f}'
+        f'{node.http_requests:>10}{node.rpc_calls["eth_getTransactionReceipt"]:>10}'
+        f'{node.bytes_out / 1024:>10.0f}{mined / elapsed:>12.1f}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--transactions', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--confirm-delay', type=float, default=3)
+    parser.add_argument('--poll-interval', type=float, default=1)
+    args = parser.parse_args()
+
+    with MockNode(latency=args.latency, confirm_delay=args.confirm_delay) as node:
+        print(
+            f'{"mode":<20}{"txns":>8}{"mined":>8}{"wall, s":>10}'
+            f'{"http":>10}{"rpc":>10}{"out, KiB":>10}{"receipts/s":>12}'
+        )
+        for count in args.transactions:
+            run('per-hash polling', per_hash_polling, node, count, args.poll_interval)
+            run('batched watcher', batched_watcher, node, count, args.poll_interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import random
+import time
+
+from syncswap_math import PoolReserves
+from syncswap_routes import PoolGraph, SplitOptimizer
+
+
+TOKEN_IN = '0x' + '0a' * 20
+TOKEN_OUT = '0x' + '0b' * 20
+
+
+def synthetic_graph(pool_count: int, seed: int) -> PoolGraph:
+    generator = random.Random(seed)
+    pools = []
+
+    for index in range(pool_count):
+        reserve = generator.randint(10 ** 20, 10 ** 23)
+        price = generator.uniform(0.97, 1.03)
+        swap_fee = generator.choice([100, 200, 300])
+
+        if index % 2 == 0:
+            pools.append(PoolReserves(
+                f'0x{index:040x}',
+                TOKEN_IN,
+                TOKEN_OUT,
+                reserve,
+                int(reserve * price),
+                swap_fee
+            ))
+            continue
+
+        middle = f'0x{index:038x}ff'
+        pools.append(PoolReserves(f'0x{index:040x}', TOKEN_IN, middle, reserve, reserve, swap_fee))
+        pools.append(PoolReserves(f'0x{index:038x}ee', middle, TOKEN_OUT, reserve, int(reserve * price), swap_fee))
+
+    return PoolGraph(pools)
+
+
+def measure(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pools', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--amount', type=int, default=5 * 10 ** 21)
+    parser.add_argument('--max-splits', type=int, default=4)
+    parser.add_argument('--chunks', type=int, default=50)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(
+        f'{"pools":>8}{"routes":>8}{"single, ms":>12}{"split, ms":>12}'
+        f'{"paths":>7}{"gain, bps":>11}'
+    )
+
+    for pool_count in args.pools:
+        graph = synthetic_graph(pool_count, args.seed)
+        optimizer = SplitOptimizer(graph)
+        routes = graph.find_routes(TOKEN_IN, TOKEN_OUT, 2)
+
+        single = graph.best_route(TOKEN_IN, TOKEN_OUT, args.amount, 2)
+        split = optimizer.optimize(TOKEN_IN, TOKEN_OUT, args.amount, 2, args.max_splits, args.chunks)
+
+        single_time = measure(lambda: graph.best_route(TOKEN_IN, TOKEN_OUT, args.amount, 2), args.iterations)
+        split_time = measure(
+            lambda: optimizer.optimize(TOKEN_IN, TOKEN_OUT, args.amount, 2, args.max_splits, args.chunks),
+            args.iterations
+        )
+
+        gain = (split.amount_out - single.amount_out) * 10_000 / single.amount_out
+
+        print(
+            f'{pool_count:>8}{len(routes):>8}{single_time * 1e3:>12.2f}{split_time * 1e3:>12.2f}'
+            f'{len(split.routes):>7}{gain:>11.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
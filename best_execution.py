@@ -0,0 +1,439 @@
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+
+from eth_account import Account
+from eth_account.signers.local import LocalAccount
+from web3 import Web3
+
+import allowances
+import clients
+import contract_registry
+import enums
+import constants
+import fees
+import izumi_math
+import izumi_pools
+import sabbe
+import sabbe2
+import syncswap_routes
+from logger import logging
+
+
+SYNCSWAP = 'SyncSwap'
+IZUMI = 'iZUMi'
+
+SYNCSWAP_SWAP_GAS = 700_000
+SYNCSWAP_HOP_GAS = 250_000
+IZUMI_SWAP_GAS = 900_000
+APPROVE_GAS = 350_000
+
+LATENCY_WINDOW = 100
+
+
+@dataclass(frozen=True)
+class VenueQuote:
+    venue: str
+    amount_out: int = 0
+    gas: int = 0
+    gas_cost: int = 0
+    latency: float = 0
+    detail: str = ''
+    error: str = None
+    costed: bool = True
+
+    @property
+    def net_amount_out(self) -> int:
+        return self.amount_out - self.gas_cost
+
+
+@dataclass
+class VenueStats:
+    quotes: int = 0
+    errors: int = 0
+    wins: int = 0
+    latencies: list[float] = field(default_factory=list)
+    last_quote: VenueQuote = None
+
+    @property
+    def average_latency(self) -> float:
+        if not self.latencies:
+            return 0
+        return sum(self.latencies) / len(self.latencies)
+
+    @property
+    def max_latency(self) -> float:
+        return max(self.latencies, default=0)
+
+
+class VenueMonitor:
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._venues = defaultdict(VenueStats)
+        self._lock = threading.Lock()
+
+    def record(self, quote: VenueQuote):
+        with self._lock:
+            stats = self._venues[quote.venue]
+            stats.quotes += 1
+            if quote.error is not None:
+                stats.errors += 1
+            stats.latencies.append(quote.latency)
+            del stats.latencies[:-self.window]
+            stats.last_quote = quote
+
+    def record_win(self, venue: str):
+        with self._lock:
+            self._venues[venue].wins += 1
+
+    def summary(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                venue: {
+                    'quotes': stats.quotes,
+                    'errors': stats.errors,
+                    'wins': stats.wins,
+                    'average_latency': stats.average_latency,
+                    'max_latency': stats.max_latency,
+                    'last_amount_out': None if stats.last_quote is None else stats.last_quote.amount_out,
+                    'last_net_amount_out': None if stats.last_quote is None else stats.last_quote.net_amount_out,
+                }
+                for venue, stats in self._venues.items()
+            }
+
+
+monitor = VenueMonitor()
+
+
+def _token_address(network_name: enums.NetworkNames, token_name: enums.TokenNames, weth_address: str) -> str:
+    if token_name in constants.ETH_TOKENS:
+        return weth_address
+    return constants.NETWORK_TOKENS[network_name, token_name].contract_address
+
+
+def _needs_approval(
+    network_name: enums.NetworkNames,
+    owner: str,
+    token_name: enums.TokenNames,
+    token_address: str,
+    spender: str,
+    amount_in_wei: int
+) -> bool:
+    if token_name in constants.ETH_TOKENS:
+        return False
+    allowance = allowances.ledger.get(network_name, owner, token_address, spender)
+    return allowance is None or allowance < amount_in_wei
+
+
+def _pool_graph(zk_web3: Web3, network_name: enums.NetworkNames):
+    swap_router_contract = contract_registry.get_contract(
+        zk_web3,
+        network_name,
+        sabbe.CONTRACT_ADRESSES[sabbe.ContractTypes.SWAP][network_name],
+        'SyncSwapRouter'
+    )
+
+    weth_address, _ = sabbe.get_weth(zk_web3, network_name, swap_router_contract)
+    graph = sabbe.get_pool_graph(zk_web3, network_name, weth_address)
+
+    return swap_router_contract, weth_address, graph
+
+
+def quote_syncswap(
+    zk_web3: Web3,
+    network_name: enums.NetworkNames,
+    account_address: str,
+    from_token_name: enums.TokenNames,
+    to_token_name: enums.TokenNames,
+    amount_in_wei: int,
+    max_hops: int = syncswap_routes.MAX_HOPS
+):
+    swap_router_contract, weth_address, graph = _pool_graph(zk_web3, network_name)
+
+    from_token_address = _token_address(network_name, from_token_name, weth_address)
+    to_token_address = _token_address(network_name, to_token_name, weth_address)
+
+    route = graph.best_route(from_token_address, to_token_address, amount_in_wei, max_hops)
+    if route is None:
+        return None, graph, weth_address
+
+    gas = SYNCSWAP_SWAP_GAS + SYNCSWAP_HOP_GAS * (route.hops - 1)
+    if _needs_approval(
+        network_name,
+        account_address,
+        from_token_name,
+        from_token_address,
+        swap_router_contract.address,
+        amount_in_wei
+    ):
+        gas += APPROVE_GAS
+
+    return (route.amount_out, gas, f'{route.hops} hops'), graph, weth_address
+
+
+def quote_izumi(
+    zk_web3: Web3,
+    network_name: enums.NetworkNames,
+    account_address: str,
+    from_token_name: enums.TokenNames,
+    to_token_name: enums.TokenNames,
+    amount_in_wei: int
+):
+    liquidity_manager_address = sabbe2.CONTRACT_ADRESSES[sabbe2.ContractTypes.LIQUIDITY_MANAGER][network_name]
+    swap_address = sabbe2.CONTRACT_ADRESSES[sabbe2.ContractTypes.SWAP][network_name]
+
+    weth_address = izumi_pools.cache.weth(zk_web3, network_name, liquidity_manager_address)
+
+    from_token_address = _token_address(network_name, from_token_name, weth_address)
+    to_token_address = _token_address(network_name, to_token_name, weth_address)
+
+    pool_infos = izumi_pools.cache.pools(
+        zk_web3,
+        network_name,
+        liquidity_manager_address,
+        from_token_address,
+        to_token_address
+    )
+    if not pool_infos:
+        return None
+
+    snapshot, quote = izumi_math.best_quote(
+        izumi_math.get_snapshots(zk_web3, pool_infos),
+        amount_in_wei,
+        from_token_address
+    )
+    if quote is None or not quote.filled:
+        return None
+
+    gas = IZUMI_SWAP_GAS
+    if _needs_approval(
+        network_name,
+        account_address,
+        from_token_name,
+        from_token_address,
+        Web3.to_checksum_address(swap_address),
+        amount_in_wei
+    ):
+        gas += APPROVE_GAS
+
+    return quote.amount_out, gas, f'{snapshot.fee / 10000}% pool'
+
+
+def gas_cost_in_token(
+    graph: syncswap_routes.PoolGraph,
+    weth_address: str,
+    network_name: enums.NetworkNames,
+    to_token_name: enums.TokenNames,
+    gas_cost_in_wei: int
+) -> int | None:
+    if to_token_name in constants.ETH_TOKENS or gas_cost_in_wei == 0:
+        return gas_cost_in_wei
+    if graph is None:
+        return None
+
+    to_token_address = _token_address(network_name, to_token_name, weth_address)
+    route = graph.best_route(weth_address, to_token_address, gas_cost_in_wei)
+
+    return None if route is None else route.amount_out
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    try:
+        return func(*args), None, time.perf_counter() - started
+    except Exception as e:
+        return None, f'{e}', time.perf_counter() - started
+
+
+def get_quotes(
+    zk_web3: Web3,
+    network_name: enums.NetworkNames,
+    account_address: str,
+    from_token_name: enums.TokenNames,
+    to_token_name: enums.TokenNames,
+    amount_in_wei: int,
+    max_hops: int = syncswap_routes.MAX_HOPS
+) -> list[VenueQuote]:
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        syncswap_future = executor.submit(
+            contextvars.copy_context().run,
+            _timed,
+            quote_syncswap,
+            zk_web3,
+            network_name,
+            account_address,
+            from_token_name,
+            to_token_name,
+            amount_in_wei,
+            max_hops
+        )
+        izumi_future = executor.submit(
+            contextvars.copy_context().run,
+            _timed,
+            quote_izumi,
+            zk_web3,
+            network_name,
+            account_address,
+            from_token_name,
+            to_token_name,
+            amount_in_wei
+        )
+        fees_future = executor.submit(contextvars.copy_context().run, fees.get_fees, zk_web3)
+
+        syncswap_result, syncswap_error, syncswap_latency = syncswap_future.result()
+        izumi_result, izumi_error, izumi_latency = izumi_future.result()
+        gas_price = fees_future.result().max_fee
+
+    syncswap_quote, graph, weth_address = syncswap_result or (None, None, None)
+
+    if graph is None and izumi_result is not None and to_token_name not in constants.ETH_TOKENS:
+        try:
+            _, weth_address, graph = _pool_graph(zk_web3, network_name)
+        except Exception as e:
+            logging.warning(f'[BestExecution] Failed to load pools to price gas in {to_token_name}: {e}')
+
+    quotes = []
+    for venue, result, error, latency in (
+        (SYNCSWAP, syncswap_quote, syncswap_error, syncswap_latency),
+        (IZUMI, izumi_result, izumi_error, izumi_latency),
+    ):
+        if result is None:
+            quote = VenueQuote(venue, latency=latency, error=error or 'No route')
+        else:
+            amount_out, gas, detail = result
+            gas_cost = gas_cost_in_token(
+                graph,
+                weth_address,
+                network_name,
+                to_token_name,
+                gas * gas_price
+            )
+            quote = VenueQuote(
+                venue,
+                amount_out,
+                gas,
+                gas_cost or 0,
+                latency,
+                detail,
+                costed=gas_cost is not None
+            )
+
+        monitor.record(quote)
+        quotes.append(quote)
+
+    return quotes
+
+
+def swap(
+    private_key: str,
+    network_name: enums.NetworkNames,
+    from_token_name: enums.TokenNames,
+    to_token_name: enums.TokenNames,
+    slippage: float,
+    *,
+    amount: float = None,
+    percentage: float = None,
+    proxy: dict[str, str] = None,
+    max_hops: int = syncswap_routes.MAX_HOPS
+):
+    if not any([amount, percentage]):
+        raise ValueError('Either amount or percentage must be specified')
+    elif all([amount, percentage]):
+        raise ValueError('Only one of amount or percentage must be specified')
+
+    network = constants.NETWORKS[network_name]
+    zk_web3 = clients.get_client(network.rpc_url, proxy)
+    account: LocalAccount = Account.from_key(private_key)
+
+    if from_token_name in constants.ETH_TOKENS:
+        from_token_decimals = 18
+        snapshot = sabbe.get_pre_trade_snapshot(zk_web3, account.address)
+    else:
+        from_token = constants.NETWORK_TOKENS[network_name, from_token_name]
+        from_token_decimals = from_token.decimals
+        snapshot = sabbe.get_pre_trade_snapshot(
+            zk_web3,
+            account.address,
+            token_address=from_token.contract_address
+        )
+
+    if to_token_name in constants.ETH_TOKENS:
+        to_token_decimals = 18
+    else:
+        to_token_decimals = constants.NETWORK_TOKENS[network_name, to_token_name].decimals
+
+    if amount is None:
+        amount_in_wei = int(snapshot.balance * percentage / 100)
+    else:
+        amount_in_wei = int(amount * 10 ** from_token_decimals)
+
+    if amount_in_wei > snapshot.balance:
+        logging.critical(f'[BestExecution] Insufficient balance to swap {from_token_name} to {to_token_name}')
+        return enums.TransactionStatus.INSUFFICIENT_BALANCE
+
+    quotes = get_quotes(
+        zk_web3,
+        network_name,
+        account.address,
+        from_token_name,
+        to_token_name,
+        amount_in_wei,
+        max_hops
+    )
+
+    for quote in quotes:
+        if quote.error is not None:
+            logging.warning(f'[{quote.venue}] No quote in {quote.latency * 1000:.0f} ms: {quote.error}')
+        elif not quote.costed:
+            logging.warning(
+                f'[{quote.venue}] Quoted {quote.amount_out / 10 ** to_token_decimals} {to_token_name} '
+                f'via {quote.detail} in {quote.latency * 1000:.0f} ms, gas could not be priced in {to_token_name}'
+            )
+        else:
+            logging.info(
+                f'[{quote.venue}] Quoted {quote.amount_out / 10 ** to_token_decimals} {to_token_name} '
+                f'({quote.net_amount_out / 10 ** to_token_decimals} after gas) '
+                f'via {quote.detail} in {quote.latency * 1000:.0f} ms'
+            )
+
+    candidates = [quote for quote in quotes if quote.error is None and quote.net_amount_out > 0]
+
+    if not all(quote.costed for quote in candidates):
+        logging.warning(f'[BestExecution] Gas is not priced for every venue, ranking on gross {to_token_name} output')
+        candidates = [replace(quote, gas_cost=0) for quote in candidates]
+
+    if not candidates:
+        logging.error(f'[BestExecution] No venue can swap {from_token_name} to {to_token_name}')
+        return enums.TransactionStatus.INSUFFICIENT_LIQUIDITY
+
+    best = max(candidates, key=lambda quote: quote.net_amount_out)
+    monitor.record_win(best.venue)
+
+    logging.info(f'[{best.venue}] Best execution for {from_token_name} to {to_token_name}')
+
+    if best.venue == SYNCSWAP:
+        return sabbe.swap(
+            private_key,
+            network_name,
+            from_token_name,
+            to_token_name,
+            slippage,
+            amount=amount,
+            percentage=percentage,
+            proxy=proxy,
+            max_hops=max_hops
+        )
+
+    return sabbe2.swap(
+        private_key,
+        network_name,
+        from_token_name,
+        to_token_name,
+        slippage,
+        amount=amount,
+        percentage=percentage,
+        proxy=proxy
+    )
@@ -0,0 +1,224 @@
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from eth_account import Account
+
+import best_execution
+import clients
+import enums
+import rpc_metrics
+import sabbe
+import sabbe2
+import signing
+from logger import logging
+
+
+IO_WORKERS = 16
+SIGNING_WORKERS = 2
+
+STAGES = ('queue', 'rpc_wait', 'rpc', 'sign', 'total')
+SHARED_STAGES = ('rpc_wait', 'rpc', 'sign')
+
+_stages = contextvars.ContextVar('campaign_stages', default=None)
+
+ACTIONS = {
+    'syncswap.swap': sabbe.swap,
+    'syncswap.add_liquidity': sabbe.add_liquidity,
+    'syncswap.burn_liquidity': sabbe.burn_liquidity,
+    'izumi.swap': sabbe2.swap,
+    'izumi.add_liquidity': sabbe2.add_liquidity,
+    'izumi.remove_liquidity': sabbe2.remove_random_liquidity,
+    'izumi.burn_liquidity': sabbe2.burn_random_liquidity,
+    'best.swap': best_execution.swap,
+}
+
+
+@dataclass(frozen=True)
+class Job:
+    private_key: str
+    action: str
+    params: dict = field(default_factory=dict)
+
+    @property
+    def wallet(self) -> str:
+        return Account.from_key(self.private_key).address
+
+
+@dataclass
+class JobResult:
+    job: Job
+    status: enums.TransactionStatus = None
+    error: str = None
+    stages: dict[str, float] = field(default_factory=lambda: dict.fromkeys(STAGES, 0.0))
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == enums.TransactionStatus.SUCCESS
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))]
+
+
+@dataclass
+class CampaignReport:
+    results: list[JobResult]
+    elapsed: float
+    unattributed: dict[str, float] = field(default_factory=lambda: dict.fromkeys(SHARED_STAGES, 0.0))
+
+    @property
+    def succeeded(self) -> int:
+        return sum(result.succeeded for result in self.results)
+
+    @property
+    def failed(self) -> int:
+        return len(self.results) - self.succeeded
+
+    @property
+    def actions_per_minute(self) -> float:
+        if not self.elapsed:
+            return 0
+        return len(self.results) * 60 / self.elapsed
+
+    def stage(self, name: str, q: float) -> float:
+        return percentile([result.stages[name] for result in self.results], q)
+
+    def by_action(self) -> dict[str, tuple[int, int]]:
+        counts = defaultdict(lambda: [0, 0])
+        for result in self.results:
+            counts[result.job.action][0 if result.succeeded else 1] += 1
+        return {action: tuple(count) for action, count in counts.items()}
+
+    def log(self):
+        logging.info(
+            f'[Campaign] {len(self.results)} actions in {self.elapsed:.1f}s '
+            f'({self.actions_per_minute:.1f}/min): {self.succeeded} succeeded, {self.failed} failed'
+        )
+        for action, (succeeded, failed) in self.by_action().items():
+            logging.info(f'[Campaign] {action}: {succeeded} succeeded, {failed} failed')
+        for name in STAGES:
+            logging.info(
+                f'[Campaign] {name}: p50 {self.stage(name, 50) * 1000:.0f} ms, '
+                f'p99 {self.stage(name, 99) * 1000:.0f} ms'
+            )
+        if any(self.unattributed.values()):
+            logging.info(
+                '[Campaign] Not attributed to an action: ' + ', '.join(
+                    f'{name} {seconds * 1000:.0f} ms' for name, seconds in self.unattributed.items()
+                )
+            )
+
+
+class CampaignRunner:
+    def __init__(
+        self,
+        io_workers: int = IO_WORKERS,
+        signing_workers: int = SIGNING_WORKERS,
+        endpoint_limits: dict[str, int] = None
+    ):
+        self.io_workers = io_workers
+        self.signing_workers = signing_workers
+        self.endpoint_limits = endpoint_limits or {}
+        self.unattributed = dict.fromkeys(SHARED_STAGES, 0.0)
+        self._lock = threading.Lock()
+
+    def _add(self, **elapsed: float):
+        stages = _stages.get()
+        with self._lock:
+            if stages is None:
+                stages = self.unattributed
+            for name, seconds in elapsed.items():
+                stages[name] += seconds
+
+    def _on_request(self, rpc_url: str, waited: float, elapsed: float):
+        self._add(rpc_wait=waited, rpc=elapsed - waited)
+
+    def _on_sign(self, elapsed: float):
+        self._add(sign=elapsed)
+
+    def _run_job(self, job: Job, started_at: float) -> JobResult:
+        result = JobResult(job)
+        result.stages['queue'] = time.perf_counter() - started_at
+
+        action = ACTIONS.get(job.action)
+        if action is None:
+            result.status = enums.TransactionStatus.FAILED
+            result.error = f'Unknown action {job.action}'
+            logging.error(f'[Campaign] {result.error}')
+            return result
+
+        token = _stages.set(result.stages)
+        job_started = time.perf_counter()
+
+        try:
+            result.status = action(job.private_key, **job.params)
+        except Exception as e:
+            result.status = enums.TransactionStatus.FAILED
+            result.error = f'{e}'
+            logging.error(f'[Campaign] {job.action} failed for {job.wallet}: {e}')
+        finally:
+            result.stages['total'] = time.perf_counter() - job_started
+            _stages.reset(token)
+
+        return result
+
+    def _run_wallet(self, jobs: list[Job], started_at: float) -> list[JobResult]:
+        return [self._run_job(job, started_at) for job in jobs]
+
+    def run(self, jobs: list[Job]) -> CampaignReport:
+        wallets = defaultdict(list)
+        for job in jobs:
+            wallets[job.private_key].append(job)
+
+        for rpc_url, max_inflight in self.endpoint_limits.items():
+            clients.limit_endpoint(rpc_url, max_inflight)
+
+        self.unattributed = dict.fromkeys(SHARED_STAGES, 0.0)
+        clients.request_observers.append(self._on_request)
+        signing.observers.append(self._on_sign)
+        signing.configure(self.signing_workers)
+        rpc_metrics.metrics.start_reporter()
+
+        logging.info(f'[Campaign] Running {len(jobs)} actions for {len(wallets)} wallets')
+
+        started_at = time.perf_counter()
+        results = []
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.io_workers) as executor:
+                futures = [
+                    executor.submit(self._run_wallet, wallet_jobs, started_at)
+                    for wallet_jobs in wallets.values()
+                ]
+                for future in futures:
+                    results.extend(future.result())
+        finally:
+            signing.shutdown()
+            signing.observers.remove(self._on_sign)
+            clients.request_observers.remove(self._on_request)
+            for rpc_url in self.endpoint_limits:
+                clients.limit_endpoint(rpc_url, None)
+
+        report = CampaignReport(results, time.perf_counter() - started_at, dict(self.unattributed))
+        report.log()
+        rpc_metrics.metrics.log_summary()
+
+        return report
+
+
+def run(
+    jobs: list[Job | tuple],
+    *,
+    io_workers: int = IO_WORKERS,
+    signing_workers: int = SIGNING_WORKERS,
+    endpoint_limits: dict[str, int] = None
+) -> CampaignReport:
+    jobs = [job if isinstance(job, Job) else Job(*job) for job in jobs]
+    return CampaignRunner(io_workers, signing_workers, endpoint_limits).run(jobs)
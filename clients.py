@@ -0,0 +1,341 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import AsyncHTTPProvider, AsyncWeb3, HTTPProvider, Web3
+from zksync2.module.module_builder import ZkSyncBuilder
+
+import rpc_metrics
+from logger import logging
+
+
+MAX_CLIENTS = 64
+CONNECTIONS_PER_CLIENT = 16
+IDLE_TIMEOUT = 300
+REQUEST_TIMEOUT = 30
+
+_endpoint_semaphores = {}
+
+request_observers = []
+eviction_observers = []
+
+
+def limit_endpoint(rpc_url: str, max_inflight: int = None):
+    if max_inflight is None:
+        _endpoint_semaphores.pop(rpc_url, None)
+    else:
+        _endpoint_semaphores[rpc_url] = threading.BoundedSemaphore(max_inflight)
+
+
+class LimitedHTTPAdapter(HTTPAdapter):
+    def __init__(self, rpc_url: str, **kwargs):
+        self.rpc_url = rpc_url
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        semaphore = _endpoint_semaphores.get(self.rpc_url)
+        started = time.perf_counter()
+
+        if semaphore is None:
+            waited = 0
+            response = super().send(request, **kwargs)
+        else:
+            with semaphore:
+                waited = time.perf_counter() - started
+                response = super().send(request, **kwargs)
+
+        elapsed = time.perf_counter() - started
+        for observer in request_observers:
+            observer(self.rpc_url, waited, elapsed)
+
+        return response
+
+
+class PooledHTTPProvider(HTTPProvider):
+    def __init__(self, endpoint_uri: str, session: requests.Session, request_kwargs: dict = None):
+        super().__init__(endpoint_uri, request_kwargs=request_kwargs)
+        self.session = session
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        response = self.session.post(
+            self.endpoint_uri,
+            data=request_data,
+            **self.get_request_kwargs()
+        )
+        rpc_metrics.record_transfer(len(request_data), len(response.content))
+        response.raise_for_status()
+        return self.decode_rpc_response(response.content)
+
+
+class PooledAsyncHTTPProvider(AsyncHTTPProvider):
+    def __init__(
+        self,
+        endpoint_uri: str,
+        proxy: dict[str, str] = None,
+        connections: int = CONNECTIONS_PER_CLIENT,
+        idle_timeout: float = IDLE_TIMEOUT,
+        request_timeout: float = REQUEST_TIMEOUT
+    ):
+        super().__init__(endpoint_uri)
+        self.proxy = (proxy or {}).get('https') or (proxy or {}).get('http')
+        self.connections = connections
+        self.idle_timeout = idle_timeout
+        self.request_timeout = request_timeout
+        self.session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.connections,
+                    keepalive_timeout=self.idle_timeout
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+        return self.session
+
+    async def post(self, data: bytes) -> bytes:
+        async with self._get_session().post(
+            self.endpoint_uri,
+            data=data,
+            headers=self.get_request_headers(),
+            proxy=self.proxy
+        ) as response:
+            response.raise_for_status()
+            return await response.read()
+
+    async def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        response = await self.post(request_data)
+        rpc_metrics.record_transfer(len(request_data), len(response))
+        return self.decode_rpc_response(response)
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+
+@dataclass
+class PooledClient:
+    web3: Web3
+    session: requests.Session
+    rpc_url: str
+    proxy: dict[str, str] = None
+    last_used: float = field(default_factory=time.monotonic)
+    uses: int = 0
+
+
+def _notify_eviction(web3):
+    for observer in eviction_observers:
+        try:
+            observer(web3)
+        except Exception as e:
+            logging.warning(f'Failed to release resources of an evicted client: {e}')
+
+
+class ClientPool:
+    def __init__(
+        self,
+        max_clients: int = MAX_CLIENTS,
+        connections_per_client: int = CONNECTIONS_PER_CLIENT,
+        idle_timeout: float = IDLE_TIMEOUT,
+        request_timeout: float = REQUEST_TIMEOUT
+    ):
+        self.max_clients = max_clients
+        self.connections_per_client = connections_per_client
+        self.idle_timeout = idle_timeout
+        self.request_timeout = request_timeout
+
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.clients_built = 0
+        self.clients_reused = 0
+        self.clients_evicted = 0
+
+    @staticmethod
+    def _key(rpc_url: str, proxy: dict[str, str] = None):
+        return rpc_url, tuple(sorted((proxy or {}).items()))
+
+    def _build(self, rpc_url: str, proxy: dict[str, str] = None):
+        session = requests.Session()
+        adapter = LimitedHTTPAdapter(
+            rpc_url,
+            pool_connections=1,
+            pool_maxsize=self.connections_per_client
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        if proxy:
+            session.proxies.update(proxy)
+
+        zk_web3 = ZkSyncBuilder.build(rpc_url, proxy=proxy)
+        zk_web3.provider = PooledHTTPProvider(
+            rpc_url,
+            session,
+            request_kwargs={'timeout': self.request_timeout}
+        )
+        zk_web3.middleware_onion.inject(rpc_metrics.middleware, 'rpc_metrics', layer=0)
+
+        return PooledClient(zk_web3, session, rpc_url, proxy)
+
+    def _close(self, client: PooledClient):
+        self.clients_evicted += 1
+        client.session.close()
+        _notify_eviction(client.web3)
+
+    def _evict_idle(self, now: float):
+        if self.idle_timeout is None:
+            return
+        for key, client in list(self._clients.items()):
+            if now - client.last_used > self.idle_timeout:
+                del self._clients[key]
+                self._close(client)
+
+    def get(self, rpc_url: str, proxy: dict[str, str] = None) -> Web3:
+        key = self._key(rpc_url, proxy)
+        now = time.monotonic()
+
+        with self._lock:
+            self._evict_idle(now)
+
+            client = self._clients.get(key)
+            if client is None:
+                client = self._build(rpc_url, proxy)
+                self._clients[key] = client
+                self.clients_built += 1
+                while len(self._clients) > self.max_clients:
+                    _, evicted = self._clients.popitem(last=False)
+                    self._close(evicted)
+            else:
+                self._clients.move_to_end(key)
+                self.clients_reused += 1
+
+            client.last_used = now
+            client.uses += 1
+
+        return client.web3
+
+    def evict_idle(self):
+        with self._lock:
+            self._evict_idle(time.monotonic())
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                self._close(client)
+            self._clients.clear()
+
+    def stats(self) -> dict:
+        connections_opened = 0
+        requests_sent = 0
+
+        with self._lock:
+            clients = list(self._clients.values())
+
+        for client in clients:
+            for adapter in set(client.session.adapters.values()):
+                managers = [adapter.poolmanager, *adapter.proxy_manager.values()]
+                for manager in managers:
+                    for pool_key in manager.pools.keys():
+                        connection_pool = manager.pools.get(pool_key)
+                        if connection_pool is None:
+                            continue
+                        connections_opened += connection_pool.num_connections
+                        requests_sent += connection_pool.num_requests
+
+        return {
+            'clients': len(clients),
+            'clients_built': self.clients_built,
+            'clients_reused': self.clients_reused,
+            'clients_evicted': self.clients_evicted,
+            'connections_opened': connections_opened,
+            'requests_sent': requests_sent,
+            'requests_per_connection': requests_sent / connections_opened if connections_opened else 0,
+        }
+
+
+pool = ClientPool()
+
+
+def configure(**kwargs):
+    global pool
+    pool.close()
+    pool = ClientPool(**kwargs)
+
+
+def get_client(rpc_url: str, proxy: dict[str, str] = None) -> Web3:
+    return pool.get(rpc_url, proxy)
+
+
+_async_clients = {}
+_shutdown_tasks = {}
+
+
+def _prune_closed_loops():
+    for loop in [loop for loop in _async_clients if loop.is_closed()]:
+        _shutdown_tasks.pop(loop, None)
+        for async_web3 in _async_clients.pop(loop).values():
+            _notify_eviction(async_web3)
+
+
+async def _close_on_shutdown():
+    # asyncio.run cancels pending tasks before closing the loop, which lets the
+    # loop's sessions close even when the caller never calls close_async_clients
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.create_future()
+    finally:
+        _shutdown_tasks.pop(loop, None)
+        await close_async_clients()
+
+
+def get_async_client(rpc_url: str, proxy: dict[str, str] = None) -> AsyncWeb3:
+    key = ClientPool._key(rpc_url, proxy)
+    loop = asyncio.get_running_loop()
+
+    loop_clients = _async_clients.get(loop)
+    if loop_clients is None:
+        _prune_closed_loops()
+        loop_clients = _async_clients[loop] = {}
+    if loop not in _shutdown_tasks:
+        _shutdown_tasks[loop] = loop.create_task(_close_on_shutdown())
+
+    async_web3 = loop_clients.get(key)
+    if async_web3 is None:
+        async_web3 = AsyncWeb3(PooledAsyncHTTPProvider(
+            rpc_url,
+            proxy,
+            connections=pool.connections_per_client,
+            idle_timeout=pool.idle_timeout,
+            request_timeout=pool.request_timeout
+        ))
+        async_web3.middleware_onion.inject(rpc_metrics.async_middleware, 'rpc_metrics', layer=0)
+        loop_clients[key] = async_web3
+
+    return async_web3
+
+
+async def close_async_clients():
+    for async_web3 in _async_clients.pop(asyncio.get_running_loop(), {}).values():
+        await async_web3.provider.close()
+        _notify_eviction(async_web3)
+
+
+def get_session(zk_web3: Web3) -> requests.Session:
+    return getattr(zk_web3.provider, 'session', None)
+
+
+def log_stats():
+    stats = pool.stats()
+    logging.info(
+        f'Clients: {stats["clients"]} live, {stats["clients_built"]} built, '
+        f'{stats["clients_reused"]} reused, {stats["clients_evicted"]} evicted; '
+        f'{stats["requests_sent"]} requests over {stats["connections_opened"]} connections'
+    )
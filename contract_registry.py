@@ -0,0 +1,92 @@
+import json
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+from web3 import Web3
+
+import clients
+import enums
+
+
+ABI_DIRECTORY = Path(__file__).parent / 'abi'
+
+# keyed by id(client); the cached contracts keep their client alive, so bound the
+# cache for clients built outside ClientPool that never reach eviction_observers
+_contracts = OrderedDict()
+_contracts_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def load_abi(abi_name: str):
+    with open(ABI_DIRECTORY / f'{abi_name}.json') as file:
+        return json.load(file)
+
+
+def _canonical_type(param: dict) -> str:
+    abi_type = param['type']
+    if not abi_type.startswith('tuple'):
+        return abi_type
+    components = ','.join(_canonical_type(component) for component in param['components'])
+    return f'({components}){abi_type[len("tuple"):]}'
+
+
+@lru_cache(maxsize=None)
+def selector(signature: str) -> bytes:
+    return bytes(Web3.keccak(text=signature)[:4])
+
+
+@lru_cache(maxsize=None)
+def function_selectors(abi_name: str) -> dict[str, bytes]:
+    selectors = {}
+    for entry in load_abi(abi_name):
+        if entry.get('type') != 'function':
+            continue
+        inputs = ','.join(_canonical_type(param) for param in entry['inputs'])
+        signature = f'{entry["name"]}({inputs})'
+        selectors[signature] = selector(signature)
+        selectors.setdefault(entry['name'], selectors[signature])
+    return selectors
+
+
+def get_contract(
+    zk_web3: Web3,
+    network_name: enums.NetworkNames,
+    address: str,
+    abi_name: str
+):
+    key = (network_name, address, abi_name)
+
+    with _contracts_lock:
+        contracts = _contracts.get(id(zk_web3))
+        if contracts is None:
+            contracts = _contracts[id(zk_web3)] = {}
+            while len(_contracts) > clients.MAX_CLIENTS:
+                _contracts.popitem(last=False)
+        else:
+            _contracts.move_to_end(id(zk_web3))
+        contract = contracts.get(key)
+        if contract is None:
+            contract = zk_web3.eth.contract(
+                address=address,
+                abi=load_abi(abi_name)
+            )
+            contracts[key] = contract
+
+    return contract
+
+
+def evict(zk_web3: Web3):
+    with _contracts_lock:
+        _contracts.pop(id(zk_web3), None)
+
+
+clients.eviction_observers.append(evict)
+
+
+def clear():
+    with _contracts_lock:
+        _contracts.clear()
+    load_abi.cache_clear()
+    function_selectors.cache_clear()
@@ -0,0 +1,250 @@
+import asyncio
+import math
+import statistics
+import threading
+import time
+from dataclasses import dataclass
+
+from web3 import Web3
+
+import clients
+import multicall
+import rpc_metrics
+from logger import logging
+
+
+FEE_TTL = 15
+REFRESH_INTERVAL = 5
+IDLE_TIMEOUT = 120
+
+FEE_HISTORY_BLOCKS = 10
+
+DEFAULT_PRIORITY_FEE = 100_000_000
+BASE_FEE_MULTIPLIER = 1.2
+
+
+@dataclass(frozen=True)
+class FeePolicy:
+    priority_fee: int = DEFAULT_PRIORITY_FEE
+    priority_fee_percentile: float = None
+    min_priority_fee: int = 0
+    max_priority_fee: int = None
+    base_fee_multiplier: float = BASE_FEE_MULTIPLIER
+    max_fee_cap: int = None
+
+
+@dataclass(frozen=True)
+class Fees:
+    gas_price: int
+    base_fee: int
+    priority_fee: int
+    max_fee: int
+    block_number: int
+    fetched_at: float
+
+    def txn_fields(self) -> dict:
+        return {
+            'maxPriorityFeePerGas': self.priority_fee,
+            'maxFeePerGas': self.max_fee
+        }
+
+
+def fee_requests(policy: FeePolicy):
+    percentiles = [] if policy.priority_fee_percentile is None else [policy.priority_fee_percentile]
+
+    return [
+        ('eth_gasPrice', []),
+        ('eth_feeHistory', [hex(FEE_HISTORY_BLOCKS), 'latest', percentiles]),
+    ]
+
+
+def compute_fees(results: list, policy: FeePolicy) -> Fees:
+    gas_price = int(results[0], 16)
+    history = results[1]
+
+    base_fees = history.get('baseFeePerGas') or [results[0]]
+    base_fee = int(base_fees[-1], 16)
+
+    priority_fee = policy.priority_fee
+    if policy.priority_fee_percentile is not None:
+        rewards = [int(reward[0], 16) for reward in history.get('reward') or [] if reward]
+        if rewards:
+            priority_fee = int(statistics.median(rewards))
+
+    priority_fee = max(priority_fee, policy.min_priority_fee)
+    if policy.max_priority_fee is not None:
+        priority_fee = min(priority_fee, policy.max_priority_fee)
+
+    max_fee = max(gas_price, math.ceil(base_fee * policy.base_fee_multiplier), priority_fee)
+
+    if policy.max_fee_cap is not None and max_fee > policy.max_fee_cap:
+        logging.warning(f'Max fee {max_fee} is capped to {policy.max_fee_cap}')
+        max_fee = policy.max_fee_cap
+        priority_fee = min(priority_fee, max_fee)
+
+    return Fees(
+        gas_price=gas_price,
+        base_fee=base_fee,
+        priority_fee=priority_fee,
+        max_fee=max_fee,
+        block_number=int(history.get('oldestBlock', '0x0'), 16) + len(base_fees) - 1,
+        fetched_at=time.monotonic()
+    )
+
+
+class FeeOracle:
+    def __init__(
+        self,
+        zk_web3: Web3,
+        policy: FeePolicy = None,
+        ttl: float = FEE_TTL,
+        refresh_interval: float = REFRESH_INTERVAL,
+        idle_timeout: float = IDLE_TIMEOUT
+    ):
+        self.zk_web3 = zk_web3
+        self.policy = policy or FeePolicy()
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.idle_timeout = idle_timeout
+
+        self._fees = None
+        self._last_used = time.monotonic()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.refreshes = 0
+        self.hits = 0
+
+    def refresh(self) -> Fees:
+        results = multicall.batch_request(self.zk_web3, fee_requests(self.policy))
+        self._fees = compute_fees(results, self.policy)
+        self.refreshes += 1
+        return self._fees
+
+    def get(self) -> Fees:
+        now = time.monotonic()
+        self._last_used = now
+
+        fees = self._fees
+        if fees is None or now - fees.fetched_at > self.ttl:
+            with self._lock:
+                fees = self._fees
+                if fees is None or time.monotonic() - fees.fetched_at > self.ttl:
+                    fees = self.refresh()
+                else:
+                    self.hits += 1
+        else:
+            self.hits += 1
+
+        self._ensure_thread()
+        return fees
+
+    def _ensure_thread(self):
+        if self.refresh_interval is None:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name='FeeOracle', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        rpc_metrics.tag(stage='fees')
+        while not self._stopped.wait(self.refresh_interval):
+            if time.monotonic() - self._last_used > self.idle_timeout:
+                return
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.warning(f'Failed to refresh fees: {e}')
+
+    def stop(self):
+        self._stopped.set()
+
+
+class AsyncFeeOracle:
+    def __init__(
+        self,
+        async_web3,
+        policy: FeePolicy = None,
+        ttl: float = FEE_TTL
+    ):
+        self.async_web3 = async_web3
+        self.policy = policy or FeePolicy()
+        self.ttl = ttl
+
+        self._fees = None
+        self._lock = None
+
+        self.refreshes = 0
+        self.hits = 0
+
+    async def refresh(self) -> Fees:
+        results = await multicall.async_batch_request(self.async_web3, fee_requests(self.policy))
+        self._fees = compute_fees(results, self.policy)
+        self.refreshes += 1
+        return self._fees
+
+    async def get(self) -> Fees:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            fees = self._fees
+            if fees is None or time.monotonic() - fees.fetched_at > self.ttl:
+                return await self.refresh()
+
+        self.hits += 1
+        return fees
+
+
+policy = FeePolicy()
+
+_oracles = {}
+_oracles_lock = threading.Lock()
+
+
+def configure(**kwargs):
+    global policy
+    policy = FeePolicy(**kwargs)
+
+    with _oracles_lock:
+        for oracle in _oracles.values():
+            if isinstance(oracle, FeeOracle):
+                oracle.stop()
+        _oracles.clear()
+
+
+def get_oracle(zk_web3: Web3) -> FeeOracle:
+    with _oracles_lock:
+        oracle = _oracles.get(id(zk_web3))
+        if oracle is None:
+            oracle = _oracles[id(zk_web3)] = FeeOracle(zk_web3, policy)
+    return oracle
+
+
+def get_async_oracle(async_web3) -> AsyncFeeOracle:
+    with _oracles_lock:
+        oracle = _oracles.get(id(async_web3))
+        if oracle is None:
+            oracle = _oracles[id(async_web3)] = AsyncFeeOracle(async_web3, policy)
+    return oracle
+
+
+def evict(web3):
+    with _oracles_lock:
+        oracle = _oracles.pop(id(web3), None)
+    if isinstance(oracle, FeeOracle):
+        oracle.stop()
+
+
+clients.eviction_observers.append(evict)
+
+
+def get_fees(zk_web3: Web3) -> Fees:
+    return get_oracle(zk_web3).get()
+
+
+async def async_get_fees(async_web3) -> Fees:
+    return await get_async_oracle(async_web3).get()
@@ -0,0 +1,837 @@
+import contextvars
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+
+from web3 import Web3
+
+import izumi_pools
+import multicall
+
+
+MIN_POINT = -887272
+MAX_POINT = 887272
+
+POW_96 = 1 << 96
+POW_128 = 1 << 128
+MAX_UINT256 = (1 << 256) - 1
+
+FEE_DENOMINATOR = 10 ** 6
+
+BITMAP_WORDS = 2
+MAX_BITMAP_WORDS = 40
+MULTICALL_CHUNK_SIZE = 500
+SNAPSHOT_WORKERS = 4
+
+POINT_OUTPUT_TYPES = ('uint128', 'int128', 'uint256', 'uint256', 'bool')
+LIMIT_ORDER_OUTPUT_TYPES = (
+    'uint128', 'uint128', 'uint256', 'uint256', 'uint128',
+    'uint128', 'uint128', 'uint128', 'uint256', 'uint256'
+)
+
+ENDPOINT_FLAG = 1
+ORDER_FLAG = 2
+
+SQRT_RATIO_FACTORS = (
+    (0x2, 0xfff97272373d413259a46990580e213a),
+    (0x4, 0xfff2e50f5f656932ef12357cf3c7fdcc),
+    (0x8, 0xffe5caca7e10e4e61c3624eaa0941cd0),
+    (0x10, 0xffcb9843d60f6159c9db58835c926644),
+    (0x20, 0xff973b41fa98c081472e6896dfb254c0),
+    (0x40, 0xff2ea16466c96a3843ec78b326b52861),
+    (0x80, 0xfe5dee046a99a2a811c461f1969c3053),
+    (0x100, 0xfcbe86c7900a88aedcffc83b479aa3a4),
+    (0x200, 0xf987a7253ac413176f2b074cf7815e54),
+    (0x400, 0xf3392b0822b70005940c7a398e4b70f3),
+    (0x800, 0xe7159475a2c29b7443b29c7fa6e889d9),
+    (0x1000, 0xd097f3bdfd2022b8845ad8f792aa5825),
+    (0x2000, 0xa9f746462d870fdf8a65dc1f90e061e5),
+    (0x4000, 0x70d869a156d2a1b890bb3df62baf32f7),
+    (0x8000, 0x31be135f97d08fd981231505542fcfa6),
+    (0x10000, 0x9aa508b5b7a84e1c677de54f3e99bc9),
+    (0x20000, 0x5d6af8dedb81196699c329225ee604),
+    (0x40000, 0x2216e584f5fa1ea926041bedfe98),
+    (0x80000, 0x48a170391f7dc42444e8fa2),
+)
+
+
+def mul_div_floor(a: int, b: int, c: int) -> int:
+    return a * b // c
+
+
+def mul_div_ceil(a: int, b: int, c: int) -> int:
+    return -(-(a * b) // c)
+
+
+@lru_cache(maxsize=65536)
+def get_sqrt_price(point: int) -> int:
+    if not MIN_POINT <= point <= MAX_POINT:
+        raise ValueError(f'Point {point} is out of range')
+
+    abs_point = abs(point)
+    ratio = 0xfffcb933bd6fad37aa2d162d1a594001 if abs_point & 0x1 else POW_128
+    for bit, factor in SQRT_RATIO_FACTORS:
+        if abs_point & bit:
+            ratio = (ratio * factor) >> 128
+
+    if point > 0:
+        ratio = MAX_UINT256 // ratio
+
+    return (ratio >> 32) + (0 if ratio % (1 << 32) == 0 else 1)
+
+
+def get_log_sqrt_price_floor(sqrt_price_96: int) -> int:
+    point = math.floor(math.log(sqrt_price_96 / POW_96) / math.log(1.0001) * 2)
+    point = min(max(point, MIN_POINT), MAX_POINT)
+
+    while point > MIN_POINT and get_sqrt_price(point) > sqrt_price_96:
+        point -= 1
+    while point < MAX_POINT and get_sqrt_price(point + 1) <= sqrt_price_96:
+        point += 1
+
+    return point
+
+
+def get_amount_x(
+    liquidity: int,
+    left_point: int,
+    right_point: int,
+    sqrt_price_r_96: int,
+    sqrt_rate_96: int,
+    upper: bool
+) -> int:
+    numerator = get_sqrt_price(right_point - left_point + 1) - sqrt_rate_96
+    denominator = get_sqrt_price(right_point + 1) - sqrt_price_r_96
+    if upper:
+        return mul_div_ceil(liquidity, numerator, denominator)
+    return mul_div_floor(liquidity, numerator, denominator)
+
+
+def get_amount_y(
+    liquidity: int,
+    sqrt_price_l_96: int,
+    sqrt_price_r_96: int,
+    sqrt_rate_96: int,
+    upper: bool
+) -> int:
+    numerator = sqrt_price_r_96 - sqrt_price_l_96
+    denominator = sqrt_rate_96 - POW_96
+    if upper:
+        return mul_div_ceil(liquidity, numerator, denominator)
+    return mul_div_floor(liquidity, numerator, denominator)
+
+
+def fee_amount(amount: int, amount_no_fee: int, cost: int, fee: int) -> int:
+    if cost >= amount_no_fee:
+        return amount - cost
+    return mul_div_ceil(cost, fee, FEE_DENOMINATOR - fee)
+
+
+@dataclass
+class RangeResult:
+    finished: bool = False
+    cost: int = 0
+    acquire: int = 0
+    final_point: int = 0
+    sqrt_final_price_96: int = 0
+    liquidity_x: int = 0
+
+
+def x2y_at_price(amount_x: int, sqrt_price_96: int, curr_y: int) -> tuple[int, int]:
+    liquidity = mul_div_floor(amount_x, sqrt_price_96, POW_96)
+    acquire_y = min(mul_div_floor(liquidity, sqrt_price_96, POW_96), curr_y)
+    liquidity = mul_div_ceil(acquire_y, POW_96, sqrt_price_96)
+    cost_x = mul_div_ceil(liquidity, POW_96, sqrt_price_96)
+    return cost_x, acquire_y
+
+
+def x2y_at_price_liquidity(
+    amount_x: int,
+    sqrt_price_96: int,
+    liquidity: int,
+    liquidity_x: int
+) -> tuple[int, int, int]:
+    liquidity_y = liquidity - liquidity_x
+    transform_liquidity_x = min(mul_div_floor(amount_x, sqrt_price_96, POW_96), liquidity_y)
+    cost_x = mul_div_ceil(transform_liquidity_x, POW_96, sqrt_price_96)
+    acquire_y = mul_div_floor(transform_liquidity_x, sqrt_price_96, POW_96)
+    return cost_x, acquire_y, liquidity_x + transform_liquidity_x
+
+
+def x2y_range_complete(
+    liquidity: int,
+    sqrt_price_l_96: int,
+    left_point: int,
+    sqrt_price_r_96: int,
+    right_point: int,
+    sqrt_rate_96: int,
+    amount_x: int
+):
+    sqrt_price_pr_m1_96 = mul_div_ceil(sqrt_price_r_96, POW_96, sqrt_rate_96)
+    sqrt_price_pr_ml_96 = get_sqrt_price(right_point - left_point)
+
+    max_x = mul_div_ceil(liquidity, sqrt_price_pr_ml_96 - POW_96, sqrt_price_r_96 - sqrt_price_pr_m1_96)
+    if max_x <= amount_x:
+        acquire_y = get_amount_y(liquidity, sqrt_price_l_96, sqrt_price_r_96, sqrt_rate_96, False)
+        return max_x, acquire_y, True, left_point, sqrt_price_l_96
+
+    sqrt_value_96 = mul_div_floor(amount_x, sqrt_price_r_96 - sqrt_price_pr_m1_96, liquidity) + POW_96
+    loc_point = right_point - get_log_sqrt_price_floor(sqrt_value_96)
+    loc_point = max(min(loc_point, right_point), left_point + 1)
+
+    if loc_point == right_point:
+        return 0, 0, False, loc_point - 1, get_sqrt_price(loc_point - 1)
+
+    sqrt_price_pr_mloc_96 = get_sqrt_price(right_point - loc_point)
+    cost_x = mul_div_ceil(liquidity, sqrt_price_pr_mloc_96 - POW_96, sqrt_price_r_96 - sqrt_price_pr_m1_96)
+    acquire_y = get_amount_y(liquidity, get_sqrt_price(loc_point), sqrt_price_r_96, sqrt_rate_96, False)
+
+    return cost_x, acquire_y, False, loc_point - 1, get_sqrt_price(loc_point - 1)
+
+
+def x2y_range(
+    sqrt_price_96: int,
+    current_point: int,
+    liquidity: int,
+    liquidity_x: int,
+    left_point: int,
+    sqrt_rate_96: int,
+    amount_x: int
+) -> RangeResult:
+    result = RangeResult()
+
+    current_has_y = liquidity_x < liquidity
+    if current_has_y and (liquidity_x > 0 or left_point == current_point):
+        result.cost, result.acquire, result.liquidity_x = x2y_at_price_liquidity(
+            amount_x, sqrt_price_96, liquidity, liquidity_x
+        )
+        if result.liquidity_x < liquidity or result.cost >= amount_x:
+            result.finished = True
+            result.final_point = current_point
+            result.sqrt_final_price_96 = sqrt_price_96
+            return result
+        amount_x -= result.cost
+    elif current_has_y:
+        current_point += 1
+        sqrt_price_96 = sqrt_price_96 + mul_div_floor(sqrt_price_96, sqrt_rate_96 - POW_96, POW_96)
+    else:
+        result.liquidity_x = liquidity_x
+
+    if left_point >= current_point:
+        result.final_point = current_point
+        result.sqrt_final_price_96 = sqrt_price_96
+        return result
+
+    sqrt_price_l_96 = get_sqrt_price(left_point)
+    cost_x, acquire_y, complete, loc_point, sqrt_loc_96 = x2y_range_complete(
+        liquidity, sqrt_price_l_96, left_point, sqrt_price_96, current_point, sqrt_rate_96, amount_x
+    )
+
+    result.cost += cost_x
+    result.acquire += acquire_y
+    amount_x -= cost_x
+
+    if complete:
+        result.finished = amount_x == 0
+        result.final_point = left_point
+        result.sqrt_final_price_96 = sqrt_price_l_96
+        result.liquidity_x = liquidity
+    else:
+        loc_cost_x, loc_acquire_y, result.liquidity_x = x2y_at_price_liquidity(amount_x, sqrt_loc_96, liquidity, 0)
+        result.cost += loc_cost_x
+        result.acquire += loc_acquire_y
+        result.finished = True
+        result.final_point = loc_point
+        result.sqrt_final_price_96 = sqrt_loc_96
+
+    return result
+
+
+def y2x_at_price(amount_y: int, sqrt_price_96: int, curr_x: int) -> tuple[int, int]:
+    liquidity = mul_div_floor(amount_y, POW_96, sqrt_price_96)
+    acquire_x = min(mul_div_floor(liquidity, POW_96, sqrt_price_96), curr_x)
+    liquidity = mul_div_ceil(acquire_x, sqrt_price_96, POW_96)
+    cost_y = mul_div_ceil(liquidity, sqrt_price_96, POW_96)
+    return cost_y, acquire_x
+
+
+def y2x_at_price_liquidity(amount_y: int, sqrt_price_96: int, liquidity_x: int) -> tuple[int, int, int]:
+    transform_liquidity_y = min(amount_y * POW_96 // sqrt_price_96, liquidity_x)
+    cost_y = mul_div_ceil(transform_liquidity_y, sqrt_price_96, POW_96)
+    acquire_x = transform_liquidity_y * POW_96 // sqrt_price_96
+    return cost_y, acquire_x, liquidity_x - transform_liquidity_y
+
+
+def y2x_range_complete(
+    liquidity: int,
+    sqrt_price_l_96: int,
+    left_point: int,
+    sqrt_price_r_96: int,
+    right_point: int,
+    sqrt_rate_96: int,
+    amount_y: int
+):
+    max_y = get_amount_y(liquidity, sqrt_price_l_96, sqrt_price_r_96, sqrt_rate_96, True)
+    if max_y <= amount_y:
+        acquire_x = get_amount_x(liquidity, left_point, right_point, sqrt_price_r_96, sqrt_rate_96, False)
+        return max_y, acquire_x, True, right_point, sqrt_price_r_96
+
+    sqrt_loc_96 = mul_div_floor(amount_y, sqrt_rate_96 - POW_96, liquidity) + sqrt_price_l_96
+    loc_point = get_log_sqrt_price_floor(sqrt_loc_96)
+    loc_point = min(max(loc_point, left_point), right_point - 1)
+    sqrt_loc_96 = get_sqrt_price(loc_point)
+
+    if loc_point == left_point:
+        return 0, 0, False, loc_point, sqrt_loc_96
+
+    cost_y = min(get_amount_y(liquidity, sqrt_price_l_96, sqrt_loc_96, sqrt_rate_96, True), amount_y)
+    acquire_x = get_amount_x(liquidity, left_point, loc_point, sqrt_loc_96, sqrt_rate_96, False)
+
+    return cost_y, acquire_x, False, loc_point, sqrt_loc_96
+
+
+def y2x_range(
+    sqrt_price_96: int,
+    current_point: int,
+    liquidity: int,
+    liquidity_x: int,
+    right_point: int,
+    sqrt_rate_96: int,
+    amount_y: int
+) -> RangeResult:
+    result = RangeResult()
+
+    if liquidity_x < liquidity:
+        result.cost, result.acquire, result.liquidity_x = y2x_at_price_liquidity(amount_y, sqrt_price_96, liquidity_x)
+        if result.liquidity_x > 0 or result.cost >= amount_y:
+            result.finished = True
+            result.final_point = current_point
+            result.sqrt_final_price_96 = sqrt_price_96
+            return result
+
+        amount_y -= result.cost
+        current_point += 1
+        if current_point == right_point:
+            result.final_point = current_point
+            result.sqrt_final_price_96 = get_sqrt_price(right_point)
+            return result
+        sqrt_price_96 = sqrt_price_96 + sqrt_price_96 * (sqrt_rate_96 - POW_96) // POW_96
+
+    sqrt_price_r_96 = get_sqrt_price(right_point)
+    cost_y, acquire_x, complete, loc_point, sqrt_loc_96 = y2x_range_complete(
+        liquidity, sqrt_price_96, current_point, sqrt_price_r_96, right_point, sqrt_rate_96, amount_y
+    )
+
+    result.cost += cost_y
+    result.acquire += acquire_x
+    amount_y -= cost_y
+
+    if complete:
+        result.finished = amount_y == 0
+        result.final_point = right_point
+        result.sqrt_final_price_96 = sqrt_price_r_96
+    else:
+        loc_cost_y, loc_acquire_x, result.liquidity_x = y2x_at_price_liquidity(amount_y, sqrt_loc_96, liquidity)
+        result.cost += loc_cost_y
+        result.acquire += loc_acquire_x
+        result.finished = True
+        result.final_point = loc_point
+        result.sqrt_final_price_96 = sqrt_loc_96
+
+    return result
+
+
+def deposit_amounts(
+    liquidity: int,
+    left_point: int,
+    right_point: int,
+    current_point: int,
+    sqrt_rate_96: int
+) -> tuple[int, int]:
+    amount_x = 0
+    amount_y = 0
+
+    if right_point > current_point + 1:
+        amount_x = get_amount_x(
+            liquidity,
+            max(left_point, current_point + 1),
+            right_point,
+            get_sqrt_price(right_point),
+            sqrt_rate_96,
+            True
+        )
+
+    if left_point <= current_point:
+        amount_y = get_amount_y(
+            liquidity,
+            get_sqrt_price(left_point),
+            get_sqrt_price(min(current_point + 1, right_point)),
+            sqrt_rate_96,
+            True
+        )
+
+    return amount_x, amount_y
+
+
+@dataclass(frozen=True)
+class Quote:
+    amount_in: int
+    amount_out: int
+    final_point: int
+    sqrt_final_price_96: int
+    filled: bool
+
+
+@dataclass
+class PoolSnapshot:
+    address: str
+    token_x: str
+    token_y: str
+    fee: int
+    point_delta: int
+    sqrt_rate_96: int
+    left_most_point: int
+    right_most_point: int
+    sqrt_price_96: int
+    current_point: int
+    liquidity: int
+    liquidity_x: int
+    block_number: int
+    bitmap: dict = field(default_factory=dict)
+    endpoints: dict = field(default_factory=dict)
+    orders: dict = field(default_factory=dict)
+
+    @property
+    def window_words(self) -> range:
+        if not self.bitmap:
+            word = (self.current_point // self.point_delta) >> 8
+            return range(word, word + 1)
+        return range(min(self.bitmap), max(self.bitmap) + 1)
+
+    @property
+    def window_low(self) -> int:
+        return self.window_words.start * 256 * self.point_delta
+
+    @property
+    def window_high(self) -> int:
+        return (self.window_words.stop * 256 - 1) * self.point_delta
+
+    def flags(self, point: int) -> int:
+        flags = 0
+        if point in self.endpoints:
+            flags |= ENDPOINT_FLAG
+        if point in self.orders:
+            flags |= ORDER_FLAG
+        return flags
+
+    def nearest_left(self, point: int) -> int:
+        map_point = point // self.point_delta
+        bit = map_point % 256
+        ones = self.bitmap.get(map_point >> 8, 0) & ((1 << (bit + 1)) - 1)
+        if ones:
+            map_point -= bit - (ones.bit_length() - 1)
+        else:
+            map_point -= bit
+        return map_point * self.point_delta
+
+    def nearest_right(self, point: int) -> int:
+        map_point = point // self.point_delta + 1
+        bit = map_point % 256
+        ones = self.bitmap.get(map_point >> 8, 0) & (MAX_UINT256 ^ ((1 << bit) - 1))
+        if ones:
+            map_point += ((ones & -ones).bit_length() - 1) - bit
+        else:
+            map_point += 255 - bit
+        return map_point * self.point_delta
+
+    def swap_x2y(self, amount: int, low_point: int = MIN_POINT) -> Quote:
+        low_point = max(low_point, self.left_most_point, self.window_low)
+
+        sqrt_price_96 = self.sqrt_price_96
+        current_point = self.current_point
+        liquidity = self.liquidity
+        liquidity_x = self.liquidity_x
+        current_flags = self.flags(current_point)
+
+        amount_in = amount
+        amount_out = 0
+        finished = False
+
+        while low_point <= current_point and not finished:
+            if current_flags & ORDER_FLAG:
+                amount_no_fee = amount * (FEE_DENOMINATOR - self.fee) // FEE_DENOMINATOR
+                if amount_no_fee > 0:
+                    selling_y = self.orders[current_point][1]
+                    cost_x, acquire_y = x2y_at_price(amount_no_fee, sqrt_price_96, selling_y)
+                    if acquire_y < selling_y or cost_x >= amount_no_fee:
+                        finished = True
+                    amount -= cost_x + fee_amount(amount, amount_no_fee, cost_x, self.fee)
+                    amount_out += acquire_y
+                else:
+                    finished = True
+
+            if finished:
+                break
+
+            search_start = current_point - 1
+
+            if current_flags & ENDPOINT_FLAG:
+                amount_no_fee = amount * (FEE_DENOMINATOR - self.fee) // FEE_DENOMINATOR
+                if amount_no_fee > 0:
+                    if liquidity > 0:
+                        result = x2y_range(
+                            sqrt_price_96, current_point, liquidity, liquidity_x,
+                            current_point, self.sqrt_rate_96, amount_no_fee
+                        )
+                        finished = result.finished
+                        amount -= result.cost + fee_amount(amount, amount_no_fee, result.cost, self.fee)
+                        amount_out += result.acquire
+                        current_point = result.final_point
+                        sqrt_price_96 = result.sqrt_final_price_96
+                        liquidity_x = result.liquidity_x
+                    if not finished:
+                        liquidity -= self.endpoints[current_point]
+                        current_point -= 1
+                        sqrt_price_96 = get_sqrt_price(current_point)
+                        liquidity_x = 0
+                else:
+                    finished = True
+
+                if finished or current_point < low_point:
+                    break
+
+                search_start = current_point
+
+            next_point = max(self.nearest_left(search_start), low_point)
+            next_flags = self.flags(next_point)
+
+            if liquidity == 0:
+                current_point = next_point
+                sqrt_price_96 = get_sqrt_price(current_point)
+                current_flags = next_flags
+            else:
+                amount_no_fee = amount * (FEE_DENOMINATOR - self.fee) // FEE_DENOMINATOR
+                if amount_no_fee > 0:
+                    result = x2y_range(
+                        sqrt_price_96, current_point, liquidity, liquidity_x,
+                        next_point, self.sqrt_rate_96, amount_no_fee
+                    )
+                    finished = result.finished
+                    amount -= result.cost + fee_amount(amount, amount_no_fee, result.cost, self.fee)
+                    amount_out += result.acquire
+                    current_point = result.final_point
+                    sqrt_price_96 = result.sqrt_final_price_96
+                    liquidity_x = result.liquidity_x
+                else:
+                    finished = True
+                current_flags = next_flags if current_point == next_point else 0
+
+            if current_point <= low_point:
+                break
+
+        return Quote(amount_in - amount, amount_out, current_point, sqrt_price_96, finished)
+
+    def swap_y2x(self, amount: int, high_point: int = MAX_POINT) -> Quote:
+        high_point = min(high_point, self.right_most_point, self.window_high)
+
+        sqrt_price_96 = self.sqrt_price_96
+        current_point = self.current_point
+        liquidity = self.liquidity
+        liquidity_x = self.liquidity_x
+        current_flags = self.flags(current_point)
+
+        amount_in = amount
+        amount_out = 0
+        finished = False
+
+        while current_point < high_point and not finished:
+            if current_flags & ORDER_FLAG:
+                amount_no_fee = amount * (FEE_DENOMINATOR - self.fee) // FEE_DENOMINATOR
+                if amount_no_fee > 0:
+                    selling_x = self.orders[current_point][0]
+                    cost_y, acquire_x = y2x_at_price(amount_no_fee, sqrt_price_96, selling_x)
+                    if acquire_x < selling_x or cost_y >= amount_no_fee:
+                        finished = True
+                    amount -= cost_y + fee_amount(amount, amount_no_fee, cost_y, self.fee)
+                    amount_out += acquire_x
+                else:
+                    finished = True
+
+            if finished:
+                break
+
+            next_point = self.nearest_right(current_point)
+            next_flags = self.flags(next_point)
+            if next_point > high_point:
+                next_point = high_point
+                next_flags = 0
+
+            if liquidity == 0:
+                current_point = next_point
+                sqrt_price_96 = get_sqrt_price(current_point)
+                if next_flags & ENDPOINT_FLAG:
+                    liquidity += self.endpoints[next_point]
+                    liquidity_x = liquidity
+                current_flags = next_flags
+            else:
+                amount_no_fee = amount * (FEE_DENOMINATOR - self.fee) // FEE_DENOMINATOR
+                if amount_no_fee > 0:
+                    result = y2x_range(
+                        sqrt_price_96, current_point, liquidity, liquidity_x,
+                        next_point, self.sqrt_rate_96, amount_no_fee
+                    )
+                    finished = result.finished
+                    amount -= result.cost + fee_amount(amount, amount_no_fee, result.cost, self.fee)
+                    amount_out += result.acquire
+                    current_point = result.final_point
+                    sqrt_price_96 = result.sqrt_final_price_96
+                    liquidity_x = result.liquidity_x
+                else:
+                    finished = True
+
+                if current_point == next_point:
+                    if next_flags & ENDPOINT_FLAG:
+                        liquidity += self.endpoints[next_point]
+                    liquidity_x = liquidity
+                    current_flags = next_flags
+                else:
+                    current_flags = 0
+
+        return Quote(amount_in - amount, amount_out, current_point, sqrt_price_96, finished)
+
+    def quote(self, amount_in: int, x_to_y: bool, boundary_point: int = None) -> Quote:
+        if x_to_y:
+            return self.swap_x2y(amount_in, MIN_POINT if boundary_point is None else boundary_point)
+        return self.swap_y2x(amount_in, MAX_POINT if boundary_point is None else boundary_point)
+
+    def quote_many(self, amounts: list[int], x_to_y: bool, boundary_point: int = None) -> list[Quote]:
+        return [self.quote(amount_in, x_to_y, boundary_point) for amount_in in amounts]
+
+
+def _chunks(items: list, size: int = MULTICALL_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _set_bits(word_index: int, word: int) -> list[int]:
+    bits = []
+    while word:
+        lowest = word & -word
+        bits.append(word_index * 256 + lowest.bit_length() - 1)
+        word ^= lowest
+    return bits
+
+
+def load_snapshot(
+    zk_web3: Web3,
+    info: izumi_pools.PoolInfo,
+    state: izumi_pools.PoolState,
+    words: int = BITMAP_WORDS
+) -> PoolSnapshot:
+    snapshot = PoolSnapshot(
+        address=info.address,
+        token_x=info.token_x,
+        token_y=info.token_y,
+        fee=info.fee,
+        point_delta=info.point_delta,
+        sqrt_rate_96=info.sqrt_rate_96,
+        left_most_point=info.left_most_point,
+        right_most_point=info.right_most_point,
+        sqrt_price_96=state.sqrt_price_96,
+        current_point=state.current_point,
+        liquidity=state.liquidity,
+        liquidity_x=state.liquidity_x,
+        block_number=state.block_number
+    )
+
+    current_word = (snapshot.current_point // info.point_delta) >> 8
+    _load_words(zk_web3, snapshot, list(range(current_word - words, current_word + words + 1)))
+
+    return snapshot
+
+
+def _load_words(zk_web3: Web3, snapshot: PoolSnapshot, word_indexes: list[int]):
+    pool_address = snapshot.address
+    point_delta = snapshot.point_delta
+    block_identifier = hex(snapshot.block_number)
+
+    bitmap = multicall.aggregate(zk_web3, [
+        multicall.Call(pool_address, 'pointBitmap(int16)', (word_index,))
+        for word_index in word_indexes
+    ], block_identifier)
+
+    words = {word_index: word or 0 for word_index, word in zip(word_indexes, bitmap)}
+    snapshot.bitmap.update(words)
+
+    points = [
+        map_point * point_delta
+        for word_index, word in words.items()
+        for map_point in _set_bits(word_index, word)
+    ]
+
+    for chunk in _chunks(points, MULTICALL_CHUNK_SIZE // 2):
+        calls = []
+        for point in chunk:
+            calls.append(multicall.Call(pool_address, 'points(int24)', (point,), output_types=POINT_OUTPUT_TYPES))
+            calls.append(multicall.Call(
+                pool_address,
+                'limitOrderData(int24)',
+                (point,),
+                output_types=LIMIT_ORDER_OUTPUT_TYPES
+            ))
+
+        values = multicall.aggregate(zk_web3, calls, block_identifier)
+
+        for point, point_data, order_data in zip(chunk, values[::2], values[1::2]):
+            if point_data is not None and point_data[4]:
+                snapshot.endpoints[point] = point_data[1]
+            if order_data is not None and (order_data[0] > 0 or order_data[5] > 0):
+                snapshot.orders[point] = (order_data[0], order_data[5])
+
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def _store_snapshot(snapshot: PoolSnapshot):
+    key = snapshot.address.lower()
+    with _snapshots_lock:
+        current = _snapshots.get(key)
+        if current is None or current.block_number <= snapshot.block_number:
+            _snapshots[key] = snapshot
+
+
+def get_snapshots(
+    zk_web3: Web3,
+    infos: list[izumi_pools.PoolInfo],
+    block_number: int = None
+) -> list[PoolSnapshot]:
+    states = izumi_pools.cache.states(zk_web3, [info.address for info in infos], block_number)
+
+    snapshots = [None] * len(infos)
+    missing = []
+
+    for position, (info, state) in enumerate(zip(infos, states)):
+        snapshot = _snapshots.get(info.address.lower())
+        if snapshot is not None and snapshot.block_number == state.block_number:
+            snapshots[position] = snapshot
+        else:
+            missing.append(position)
+
+    if len(missing) == 1:
+        (position,) = missing
+        snapshots[position] = load_snapshot(zk_web3, infos[position], states[position])
+    elif missing:
+        with ThreadPoolExecutor(max_workers=min(len(missing), SNAPSHOT_WORKERS)) as executor:
+            futures = {
+                position: executor.submit(
+                    contextvars.copy_context().run,
+                    load_snapshot,
+                    zk_web3,
+                    infos[position],
+                    states[position]
+                )
+                for position in missing
+            }
+            for position, future in futures.items():
+                snapshots[position] = future.result()
+
+    for position in missing:
+        _store_snapshot(snapshots[position])
+
+    return snapshots
+
+
+def get_snapshot(zk_web3: Web3, info: izumi_pools.PoolInfo, block_number: int = None) -> PoolSnapshot:
+    return get_snapshots(zk_web3, [info], block_number)[0]
+
+
+def fill_quote(
+    zk_web3: Web3,
+    snapshot: PoolSnapshot,
+    amount_in: int,
+    x_to_y: bool,
+    max_words: int = MAX_BITMAP_WORDS
+) -> tuple[PoolSnapshot, Quote]:
+    quote = snapshot.quote(amount_in, x_to_y)
+
+    while not quote.filled:
+        words = snapshot.window_words
+        if x_to_y:
+            exhausted = snapshot.window_low <= snapshot.left_most_point
+            extra_words = range(words.start - len(words), words.start)
+        else:
+            exhausted = snapshot.window_high >= snapshot.right_most_point
+            extra_words = range(words.stop, words.stop + len(words))
+
+        if exhausted or len(words) >= max_words:
+            break
+
+        snapshot = replace(
+            snapshot,
+            bitmap=dict(snapshot.bitmap),
+            endpoints=dict(snapshot.endpoints),
+            orders=dict(snapshot.orders)
+        )
+        _load_words(zk_web3, snapshot, list(extra_words))
+        _store_snapshot(snapshot)
+
+        quote = snapshot.quote(amount_in, x_to_y)
+
+    return snapshot, quote
+
+
+def zap_swap_amount(
+    snapshot: PoolSnapshot,
+    amount_in: int,
+    x_to_y: bool,
+    left_point: int,
+    right_point: int
+) -> tuple[int, Quote]:
+    low = 0
+    high = amount_in
+
+    while high - low > 1:
+        middle = (low + high) // 2
+        quote = snapshot.quote(middle, x_to_y)
+
+        amount_x, amount_y = deposit_amounts(
+            POW_96, left_point, right_point, quote.final_point, snapshot.sqrt_rate_96
+        )
+        need_in, need_out = (amount_x, amount_y) if x_to_y else (amount_y, amount_x)
+
+        if quote.amount_out * need_in < (amount_in - quote.amount_in) * need_out:
+            low = middle
+        else:
+            high = middle
+
+    return high, snapshot.quote(high, x_to_y)
+
+
+def best_quote(
+    snapshots: list[PoolSnapshot],
+    amount_in: int,
+    token_in: str
+) -> tuple[PoolSnapshot, Quote] | tuple[None, None]:
+    quotes = []
+
+    for snapshot in snapshots:
+        quote = snapshot.quote(amount_in, token_in.lower() == snapshot.token_x.lower())
+        if quote.amount_out > 0:
+            quotes.append((snapshot, quote))
+
+    if not quotes:
+        return None, None
+
+    return max(quotes, key=lambda item: (item[1].filled, item[1].amount_out))
+
+
+def deepest_pool(
+    infos: list[izumi_pools.PoolInfo],
+    states: list[izumi_pools.PoolState]
+) -> tuple[izumi_pools.PoolInfo, izumi_pools.PoolState] | tuple[None, None]:
+    if not infos:
+        return None, None
+    return max(zip(infos, states), key=lambda pool: pool[1].liquidity)
@@ -0,0 +1,325 @@
+import threading
+import time
+from dataclasses import dataclass
+
+from web3 import Web3
+
+import enums
+import multicall
+import pool_registry
+
+
+POOLS_SECTION = 'iZUMiPools'
+POOL_INFO_SECTION = 'iZUMiPoolInfo'
+FEE_TIERS_SECTION = 'iZUMiFeeTiers'
+LIQUIDITY_MANAGER_SECTION = 'iZUMiLiquidityManager'
+DECIMALS_SECTION = 'TokenDecimals'
+
+ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
+
+STATE_TTL = 1
+
+FEE_TIERS = (100, 400, 2000, 10000)
+FEE_TIERS_TTL = 24 * 60 * 60
+
+STATE_OUTPUT_TYPES = ('uint160', 'int24', 'uint16', 'uint16', 'uint16', 'bool', 'uint128', 'uint128')
+
+
+@dataclass(frozen=True)
+class PoolInfo:
+    address: str
+    token_x: str
+    token_y: str
+    fee: int
+    point_delta: int
+    sqrt_rate_96: int
+    left_most_point: int
+    right_most_point: int
+    pool_id: int
+
+    def to_entry(self) -> list:
+        return [
+            self.token_x,
+            self.token_y,
+            self.fee,
+            self.point_delta,
+            self.sqrt_rate_96,
+            self.left_most_point,
+            self.right_most_point,
+            self.pool_id
+        ]
+
+    @classmethod
+    def from_entry(cls, address: str, entry: list):
+        return cls(address, *entry)
+
+
+@dataclass(frozen=True)
+class PoolState:
+    sqrt_price_96: int
+    current_point: int
+    liquidity: int
+    liquidity_x: int
+    block_number: int
+    fetched_at: float
+
+    @classmethod
+    def from_state(cls, state: tuple, block_number: int):
+        return cls(state[0], state[1], state[6], state[7], block_number, time.monotonic())
+
+
+def _pool_key(first_token_address: str, second_token_address: str, fee: int) -> str:
+    return f'{pool_registry.pair_key(first_token_address, second_token_address)}:{fee}'
+
+
+def _info_calls(liquidity_manager_address: str, pool_address: str) -> list[multicall.Call]:
+    return [
+        multicall.Call(pool_address, 'tokenX()', output_types=('address',)),
+        multicall.Call(pool_address, 'tokenY()', output_types=('address',)),
+        multicall.Call(pool_address, 'fee()', output_types=('uint24',)),
+        multicall.Call(pool_address, 'pointDelta()', output_types=('int24',)),
+        multicall.Call(pool_address, 'sqrtRate_96()', output_types=('uint160',)),
+        multicall.Call(pool_address, 'leftMostPt()', output_types=('int24',)),
+        multicall.Call(pool_address, 'rightMostPt()', output_types=('int24',)),
+        multicall.Call(liquidity_manager_address, 'poolIds(address)', (pool_address,), output_types=('uint128',)),
+    ]
+
+
+def _is_zero_address(address) -> bool:
+    return address is None or int(address, 16) == 0
+
+
+class PoolCache:
+    def __init__(self, registry: pool_registry.PoolRegistry = pool_registry.registry, state_ttl: float = STATE_TTL):
+        self._registry = registry
+        self.state_ttl = state_ttl
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def weth(self, zk_web3: Web3, network_name: enums.NetworkNames, liquidity_manager_address: str) -> str:
+        weth = self._registry.get(network_name, LIQUIDITY_MANAGER_SECTION, 'wETH')
+
+        if weth is None:
+            (weth,) = multicall.aggregate(zk_web3, [
+                multicall.Call(liquidity_manager_address, 'WETH9()', output_types=('address',))
+            ])
+            weth = Web3.to_checksum_address(weth)
+            self._registry.set(network_name, LIQUIDITY_MANAGER_SECTION, 'wETH', weth)
+
+        return weth
+
+    def decimals(self, zk_web3: Web3, network_name: enums.NetworkNames, token_address: str) -> int:
+        token_address = Web3.to_checksum_address(token_address)
+        decimals = self._registry.get(network_name, DECIMALS_SECTION, token_address)
+
+        if decimals is None:
+            (decimals,) = multicall.aggregate(zk_web3, [
+                multicall.Call(token_address, 'decimals()', output_types=('uint8',))
+            ])
+            self._registry.set(network_name, DECIMALS_SECTION, token_address, decimals)
+
+        return decimals
+
+    def pool_address(
+        self,
+        zk_web3: Web3,
+        network_name: enums.NetworkNames,
+        liquidity_manager_address: str,
+        first_token_address: str,
+        second_token_address: str,
+        fee: int
+    ) -> str:
+        key = _pool_key(first_token_address, second_token_address, fee)
+        pool_address = self._registry.get(network_name, POOLS_SECTION, key)
+
+        if pool_address is None:
+            (pool_address,) = multicall.aggregate(zk_web3, [
+                multicall.Call(
+                    liquidity_manager_address,
+                    'pool(address,address,uint24)',
+                    (first_token_address, second_token_address, fee),
+                    output_types=('address',)
+                )
+            ])
+            if _is_zero_address(pool_address):
+                return ZERO_ADDRESS
+            pool_address = Web3.to_checksum_address(pool_address)
+            self._registry.set(network_name, POOLS_SECTION, key, pool_address)
+
+        return pool_address
+
+    def infos(
+        self,
+        zk_web3: Web3,
+        network_name: enums.NetworkNames,
+        liquidity_manager_address: str,
+        pool_addresses: list[str]
+    ) -> list[PoolInfo]:
+        pool_addresses = [Web3.to_checksum_address(pool_address) for pool_address in pool_addresses]
+
+        infos = {}
+        missing = []
+
+        for pool_address in pool_addresses:
+            entry = self._registry.get(network_name, POOL_INFO_SECTION, pool_address)
+            if entry is None:
+                missing.append(pool_address)
+            else:
+                infos[pool_address] = PoolInfo.from_entry(pool_address, entry)
+
+        if missing:
+            calls = [
+                call
+                for pool_address in missing
+                for call in _info_calls(liquidity_manager_address, pool_address)
+            ]
+            size = len(calls) // len(missing)
+            values = multicall.aggregate(zk_web3, calls)
+
+            for index, pool_address in enumerate(missing):
+                pool_values = values[index * size:(index + 1) * size]
+                if any(value is None for value in pool_values):
+                    raise ValueError(f'Failed to read iZUMi pool {pool_address}')
+                token_x, token_y, *rest = pool_values
+                infos[pool_address] = PoolInfo(
+                    pool_address,
+                    Web3.to_checksum_address(token_x),
+                    Web3.to_checksum_address(token_y),
+                    *rest
+                )
+
+            self._registry.update(network_name, POOL_INFO_SECTION, {
+                pool_address: infos[pool_address].to_entry() for pool_address in missing
+            })
+
+        return [infos[pool_address] for pool_address in pool_addresses]
+
+    def info(
+        self,
+        zk_web3: Web3,
+        network_name: enums.NetworkNames,
+        liquidity_manager_address: str,
+        pool_address: str
+    ) -> PoolInfo:
+        return self.infos(zk_web3, network_name, liquidity_manager_address, [pool_address])[0]
+
+    def pool(
+        self,
+        zk_web3: Web3,
+        network_name: enums.NetworkNames,
+        liquidity_manager_address: str,
+        first_token_address: str,
+        second_token_address: str,
+        fee: int
+    ):
+        pool_address = self.pool_address(
+            zk_web3,
+            network_name,
+            liquidity_manager_address,
+            first_token_address,
+            second_token_address,
+            fee
+        )
+        if pool_address == ZERO_ADDRESS:
+            return None
+        return self.info(zk_web3, network_name, liquidity_manager_address, pool_address)
+
+    def pools(
+        self,
+        zk_web3: Web3,
+        network_name: enums.NetworkNames,
+        liquidity_manager_address: str,
+        first_token_address: str,
+        second_token_address: str,
+        fee_tiers: tuple = FEE_TIERS
+    ) -> list[PoolInfo]:
+        key = pool_registry.pair_key(first_token_address, second_token_address)
+        entry = self._registry.get(network_name, FEE_TIERS_SECTION, key)
+
+        if entry is not None and time.time() - entry['updated_at'] <= FEE_TIERS_TTL:
+            pool_addresses = [
+                self._registry.get(network_name, POOLS_SECTION, f'{key}:{fee}')
+                for fee in entry['fees']
+            ]
+            if all(pool_address is not None for pool_address in pool_addresses):
+                return self.infos(zk_web3, network_name, liquidity_manager_address, pool_addresses)
+
+        addresses = multicall.aggregate(zk_web3, [
+            multicall.Call(
+                liquidity_manager_address,
+                'pool(address,address,uint24)',
+                (first_token_address, second_token_address, fee),
+                output_types=('address',)
+            )
+            for fee in fee_tiers
+        ])
+
+        found = {
+            fee: Web3.to_checksum_address(pool_address)
+            for fee, pool_address in zip(fee_tiers, addresses)
+            if not _is_zero_address(pool_address)
+        }
+
+        self._registry.update(network_name, POOLS_SECTION, {
+            f'{key}:{fee}': pool_address for fee, pool_address in found.items()
+        })
+        self._registry.set(network_name, FEE_TIERS_SECTION, key, {
+            'fees': list(found),
+            'updated_at': int(time.time())
+        })
+
+        return self.infos(zk_web3, network_name, liquidity_manager_address, list(found.values()))
+
+    def states(self, zk_web3: Web3, pool_addresses: list[str], block_number: int = None) -> list[PoolState]:
+        now = time.monotonic()
+        states = {}
+        missing = []
+
+        for pool_address in pool_addresses:
+            cached = self._states.get(pool_address.lower())
+            if cached is not None and (
+                (block_number is None and now - cached.fetched_at <= self.state_ttl)
+                or (block_number is not None and cached.block_number == block_number)
+            ):
+                states[pool_address.lower()] = cached
+            else:
+                missing.append(pool_address)
+
+        if missing:
+            calls = [
+                multicall.Call(pool_address, 'state()', output_types=STATE_OUTPUT_TYPES)
+                for pool_address in missing
+            ]
+
+            if block_number is None:
+                block_result, state_result = multicall.batch_request(zk_web3, [
+                    ('eth_blockNumber', []),
+                    multicall.eth_call_request(calls)
+                ])
+                fetched_block_number = int(block_result, 16)
+                values = multicall.decode_aggregate3(calls, bytes.fromhex(state_result[2:]))
+            else:
+                fetched_block_number = block_number
+                values = multicall.aggregate(zk_web3, calls, hex(block_number))
+
+            with self._lock:
+                for pool_address, state in zip(missing, values):
+                    if state is None:
+                        raise ValueError(f'Failed to read state of pool {pool_address}')
+                    key = pool_address.lower()
+                    states[key] = PoolState.from_state(state, fetched_block_number)
+                    current = self._states.get(key)
+                    if current is None or current.block_number <= fetched_block_number:
+                        self._states[key] = states[key]
+
+        return [states[pool_address.lower()] for pool_address in pool_addresses]
+
+    def state(self, zk_web3: Web3, pool_address: str, block_number: int = None) -> PoolState:
+        return self.states(zk_web3, [pool_address], block_number)[0]
+
+    def invalidate(self, pool_address: str):
+        with self._lock:
+            self._states.pop(pool_address.lower(), None)
+
+
+cache = PoolCache()
@@ -0,0 +1,265 @@
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+from web3 import Web3
+
+import enums
+import multicall
+import pool_registry
+from logger import logging
+
+
+POSITIONS_PATH = pool_registry.CACHE_DIRECTORY / 'izumi_positions.json'
+
+SYNCED_BLOCKS_SECTION = 'SyncedBlocks'
+
+MULTICALL_CHUNK_SIZE = 500
+
+TRANSFER_TOPIC = Web3.to_hex(Web3.keccak(text='Transfer(address,address,uint256)'))
+
+LIQUIDITIES_OUTPUT_TYPES = ('int24', 'int24', 'uint128', 'uint256', 'uint256', 'uint256', 'uint256', 'uint128')
+
+
+@dataclass(frozen=True)
+class Position:
+    token_id: int
+    pool_id: int
+    left_point: int
+    right_point: int
+    liquidity: int
+    remain_x: int
+    remain_y: int
+
+    @property
+    def is_drained(self) -> bool:
+        return self.liquidity == 0 and self.remain_x == 0 and self.remain_y == 0
+
+    def to_entry(self) -> list:
+        return [self.pool_id, self.left_point, self.right_point, self.liquidity, self.remain_x, self.remain_y]
+
+    @classmethod
+    def from_entry(cls, token_id: int, entry: list):
+        return cls(token_id, *entry)
+
+    @classmethod
+    def from_liquidities(cls, token_id: int, liquidities: tuple):
+        left_point, right_point, liquidity, _, _, remain_x, remain_y, pool_id = liquidities
+        return cls(token_id, pool_id, left_point, right_point, liquidity, remain_x, remain_y)
+
+
+def _chunks(items: list, size: int = MULTICALL_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _address_topic(address: str) -> str:
+    return '0x' + address[2:].lower().rjust(64, '0')
+
+
+class PositionIndex:
+    def __init__(self, path: Path = POSITIONS_PATH):
+        self._store = pool_registry.PoolRegistry(path)
+
+    @staticmethod
+    def _section(owner: str) -> str:
+        return Web3.to_checksum_address(owner)
+
+    def positions(self, network_name: enums.NetworkNames, owner: str) -> list[Position]:
+        return [
+            Position.from_entry(int(token_id), entry)
+            for token_id, entry in self._store.items(network_name, self._section(owner))
+        ]
+
+    def find(
+        self,
+        network_name: enums.NetworkNames,
+        owner: str,
+        pool_id: int = None,
+        *,
+        pool_ids: set[int] = None,
+        live: bool = None,
+        drained: bool = None
+    ) -> list[Position]:
+        positions = []
+        for position in self.positions(network_name, owner):
+            if pool_id is not None and position.pool_id != pool_id:
+                continue
+            if pool_ids is not None and position.pool_id not in pool_ids:
+                continue
+            if live is not None and (position.liquidity > 0) != live:
+                continue
+            if drained is not None and position.is_drained != drained:
+                continue
+            positions.append(position)
+        return positions
+
+    def choice(self, network_name: enums.NetworkNames, owner: str, pool_id: int = None, **kwargs):
+        positions = self.find(network_name, owner, pool_id, **kwargs)
+        if not positions:
+            return None
+        return random.choice(positions)
+
+    def store(self, network_name: enums.NetworkNames, owner: str, positions: list[Position], removed: list = ()):
+        self._store.update(
+            network_name,
+            self._section(owner),
+            {str(position.token_id): position.to_entry() for position in positions},
+            [str(token_id) for token_id in removed]
+        )
+
+    def remove(self, network_name: enums.NetworkNames, owner: str, token_ids: list[int]):
+        self.store(network_name, owner, [], token_ids)
+
+    def load_positions(
+        self,
+        zk_web3: Web3,
+        liquidity_manager_address: str,
+        token_ids: list[int]
+    ) -> list[Position]:
+        positions = []
+        for chunk in _chunks(list(token_ids)):
+            values = multicall.aggregate(zk_web3, [
+                multicall.Call(
+                    liquidity_manager_address,
+                    'liquidities(uint256)',
+                    (token_id,),
+                    output_types=LIQUIDITIES_OUTPUT_TYPES
+                )
+                for token_id in chunk
+            ])
+            for token_id, value in zip(chunk, values):
+                if value is not None:
+                    positions.append(Position.from_liquidities(token_id, value))
+        return positions
+
+    def refresh(
+        self,
+        zk_web3: Web3,
+        network_name: enums.NetworkNames,
+        owner: str,
+        liquidity_manager_address: str,
+        token_ids: list[int]
+    ) -> list[Position]:
+        positions = self.load_positions(zk_web3, liquidity_manager_address, token_ids)
+        found = {position.token_id for position in positions}
+        self.store(network_name, owner, positions, [token_id for token_id in token_ids if token_id not in found])
+        return positions
+
+    def rescan(
+        self,
+        zk_web3: Web3,
+        network_name: enums.NetworkNames,
+        owner: str,
+        liquidity_manager_address: str
+    ) -> list[Position]:
+        balance_calls = [multicall.Call(liquidity_manager_address, 'balanceOf(address)', (owner,))]
+
+        block_number, balance_result = multicall.batch_request(zk_web3, [
+            ('eth_blockNumber', []),
+            multicall.eth_call_request(balance_calls)
+        ])
+
+        (balance,) = multicall.decode_aggregate3(balance_calls, bytes.fromhex(balance_result[2:]))
+
+        token_ids = []
+        for chunk in _chunks(list(range(balance or 0))):
+            token_ids.extend(multicall.aggregate(zk_web3, [
+                multicall.Call(liquidity_manager_address, 'tokenOfOwnerByIndex(address,uint256)', (owner, index))
+                for index in chunk
+            ]))
+
+        positions = self.load_positions(zk_web3, liquidity_manager_address, [
+            token_id for token_id in token_ids if token_id is not None
+        ])
+
+        self._store.clear(network_name, self._section(owner))
+        self.store(network_name, owner, positions)
+        self._store.set(network_name, SYNCED_BLOCKS_SECTION, self._section(owner), int(block_number, 16))
+
+        logging.info(f'[iZUMi] Indexed {len(positions)} positions of {owner}')
+
+        return positions
+
+    def transfers(self, logs: list, owner: str) -> tuple[set[int], set[int]]:
+        owner_topic = _address_topic(owner)
+        received, sent = set(), set()
+
+        for log in logs:
+            topics = [Web3.to_hex(topic) if isinstance(topic, bytes) else topic for topic in log['topics']]
+            if len(topics) != 4 or topics[0] != TRANSFER_TOPIC:
+                continue
+            token_id = int(topics[3], 16)
+            if topics[2] == owner_topic:
+                received.add(token_id)
+                sent.discard(token_id)
+            elif topics[1] == owner_topic:
+                sent.add(token_id)
+                received.discard(token_id)
+
+        return received, sent
+
+    def sync(
+        self,
+        zk_web3: Web3,
+        network_name: enums.NetworkNames,
+        owner: str,
+        liquidity_manager_address: str
+    ):
+        synced_block = self._store.get(network_name, SYNCED_BLOCKS_SECTION, self._section(owner))
+        if synced_block is None:
+            return self.rescan(zk_web3, network_name, owner, liquidity_manager_address)
+
+        owner_topic = _address_topic(owner)
+        log_filter = {
+            'address': liquidity_manager_address,
+            'fromBlock': hex(synced_block + 1),
+            'toBlock': 'latest'
+        }
+
+        try:
+            block_number, received_logs, sent_logs = multicall.batch_request(zk_web3, [
+                ('eth_blockNumber', []),
+                ('eth_getLogs', [{**log_filter, 'topics': [TRANSFER_TOPIC, None, owner_topic]}]),
+                ('eth_getLogs', [{**log_filter, 'topics': [TRANSFER_TOPIC, owner_topic]}]),
+            ])
+        except Exception as e:
+            logging.warning(f'[iZUMi] Failed to fetch position transfers, rescanning: {e}')
+            return self.rescan(zk_web3, network_name, owner, liquidity_manager_address)
+
+        logs = sorted(
+            received_logs + sent_logs,
+            key=lambda log: (int(log['blockNumber'], 16), int(log['logIndex'], 16))
+        )
+        received, sent = self.transfers(logs, owner)
+
+        if sent:
+            self.remove(network_name, owner, list(sent))
+        if received:
+            self.refresh(zk_web3, network_name, owner, liquidity_manager_address, list(received))
+
+        self._store.set(network_name, SYNCED_BLOCKS_SECTION, self._section(owner), int(block_number, 16))
+
+        return self.positions(network_name, owner)
+
+    def apply_receipt(
+        self,
+        zk_web3: Web3,
+        network_name: enums.NetworkNames,
+        owner: str,
+        liquidity_manager_address: str,
+        receipt,
+        token_ids: list[int] = ()
+    ):
+        logs = [log for log in receipt['logs'] if log['address'].lower() == liquidity_manager_address.lower()]
+        received, sent = self.transfers(logs, owner)
+
+        if sent:
+            self.remove(network_name, owner, list(sent))
+
+        affected = (received | set(token_ids)) - sent
+        if affected:
+            self.refresh(zk_web3, network_name, owner, liquidity_manager_address, list(affected))
+
+
+index = PositionIndex()
@@ -0,0 +1,377 @@
+import atexit
+import contextvars
+import functools
+import hashlib
+import inspect
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from eth_account import Account
+from web3 import Web3
+
+import allowances
+import clients
+import constants
+import enums
+import pool_registry
+import receipts
+import rpc_metrics
+from logger import logging
+
+
+JOURNAL_PATH = pool_registry.CACHE_DIRECTORY / 'journal.sqlite3'
+
+FLUSH_INTERVAL = 0.05
+MAX_BATCH = 1000
+
+STARTED = 'started'
+QUOTED = 'quoted'
+SIGNED = 'signed'
+SENT = 'sent'
+CONFIRMED = 'confirmed'
+FINISHED = 'finished'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    action_id TEXT NOT NULL,
+    key TEXT,
+    stage TEXT,
+    event TEXT NOT NULL,
+    tx_hash TEXT,
+    raw TEXT,
+    data TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_key ON entries (key, event);
+CREATE INDEX IF NOT EXISTS entries_action ON entries (action_id, event);
+'''
+
+INSERT = '''
+INSERT INTO entries (action_id, key, stage, event, tx_hash, raw, data, created_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_current = contextvars.ContextVar('journal_action', default=None)
+
+
+def _to_json(value) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def action_key(name: str, wallet: str, params: dict) -> str:
+    return hashlib.sha256(_to_json([name, wallet, params]).encode()).hexdigest()
+
+
+class Journal:
+    def __init__(self, path: Path = JOURNAL_PATH, flush_interval: float = FLUSH_INTERVAL, max_batch: int = MAX_BATCH):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.RLock()
+        self._unfinished = None
+
+        self.writes = 0
+        self.commits = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=FULL')
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                connection = self._connect()
+                self._thread = threading.Thread(target=self._run, args=(connection,), name='Journal', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _next_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.max_batch and batch[-1] is not None:
+            if any(item[1] is not None for item in batch):
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            else:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+        return batch
+
+    def _run(self, connection: sqlite3.Connection):
+        while True:
+            batch = self._next_batch()
+            rows = [item[0] for item in batch if item is not None and item[0] is not None]
+
+            if rows:
+                try:
+                    connection.executemany(INSERT, rows)
+                    connection.commit()
+                    self.writes += len(rows)
+                    self.commits += 1
+                except Exception as e:
+                    logging.error(f'Failed to write {len(rows)} journal entries: {e}')
+
+            for item in batch:
+                if item is not None and item[1] is not None:
+                    item[1].set()
+
+            if batch[-1] is None:
+                connection.close()
+                return
+
+    def write(self, row: tuple, durable: bool = False):
+        self._ensure_thread()
+
+        if not durable:
+            self._queue.put((row, None))
+            return
+
+        written = threading.Event()
+        self._queue.put((row, written))
+        written.wait()
+
+    def flush(self):
+        if self._thread is None:
+            return
+        written = threading.Event()
+        self._queue.put((None, written))
+        written.wait()
+
+    def close(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _query(self, sql: str, params: tuple) -> list:
+        self.flush()
+        if not self.path.exists():
+            return []
+        connection = sqlite3.connect(self.path)
+        try:
+            return connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    def unfinished(self) -> dict[str, str]:
+        with self._lock:
+            if self._unfinished is None:
+                rows = self._query(
+                    '''
+                    SELECT key, action_id FROM entries
+                    WHERE event = ? AND action_id NOT IN (SELECT action_id FROM entries WHERE event = ?)
+                    ORDER BY id
+                    ''',
+                    (STARTED, FINISHED)
+                )
+                self._unfinished = dict(rows)
+            return self._unfinished
+
+    def signed(self, action_id: str) -> list[tuple[str, str, str, str]]:
+        return self._query(
+            'SELECT stage, tx_hash, raw, data FROM entries WHERE action_id = ? AND event = ? ORDER BY id',
+            (action_id, SIGNED)
+        )
+
+    def begin(self, name: str, wallet: str, params: dict):
+        key = action_key(name, wallet, params)
+
+        with self._lock:
+            action_id = self.unfinished().pop(key, None)
+        if action_id is not None:
+            return Action(self, action_id, key, name, resumed=True)
+
+        action = Action(self, uuid.uuid4().hex, key, name)
+        action.record(None, STARTED, wallet=wallet, params=params)
+        return action
+
+    def suspend(self, action):
+        with self._lock:
+            self.unfinished()[action.key] = action.action_id
+
+
+class Action:
+    def __init__(self, journal: Journal, action_id: str, key: str, name: str, resumed: bool = False):
+        self.journal = journal
+        self.action_id = action_id
+        self.key = key
+        self.name = name
+        self.resumed = resumed
+        self.signed = 0
+        self.completed = {}
+
+    def record(self, stage: str, event: str, *, tx_hash: str = None, raw: str = None, durable: bool = False, **data):
+        self.journal.write((
+            self.action_id,
+            self.key if event in (STARTED, FINISHED) else None,
+            stage,
+            event,
+            tx_hash,
+            raw,
+            _to_json(data) if data else None,
+            time.time()
+        ), durable)
+
+    def sign(self, stage: str, signed, **data):
+        self.signed += 1
+        self.record(
+            stage,
+            SIGNED,
+            tx_hash=Web3.to_hex(signed.hash),
+            raw=Web3.to_hex(signed.rawTransaction),
+            durable=True,
+            **data
+        )
+
+    def finish(self, status):
+        self.record(None, FINISHED, status=status)
+
+    def resume(self, zk_web3: Web3, network_name: enums.NetworkNames, final_stages: tuple, logging_prefix: str):
+        signed = self.journal.signed(self.action_id)
+
+        logging.info(f'[{logging_prefix}] Resuming {self.name} with {len(signed)} signed transactions')
+
+        for stage, tx_hash, raw, _ in signed:
+            try:
+                zk_web3.eth.send_raw_transaction(raw)
+            except Exception as e:
+                logging.info(f'[{logging_prefix}] Transaction {tx_hash} was not rebroadcast: {e}')
+
+        statuses = {}
+        for stage, tx_hash, raw, data in signed:
+            receipt = receipts.wait_for_transaction_receipt(
+                zk_web3=zk_web3,
+                txn_hash=tx_hash,
+                logging_prefix=logging_prefix
+            )
+            succeeded = bool(receipt) and receipt['status'] == 1
+            if succeeded:
+                allowances.ledger.record_receipt(network_name, receipt)
+                self.completed.setdefault(stage, []).append(json.loads(data) if data else {})
+            statuses[stage] = statuses.get(stage, True) and succeeded
+            self.record(stage, CONFIRMED, tx_hash=tx_hash, status=int(succeeded))
+
+        if any(statuses.get(stage) is False for stage in final_stages):
+            return enums.TransactionStatus.FAILED
+        if final_stages and all(statuses.get(stage) for stage in final_stages):
+            return enums.TransactionStatus.SUCCESS
+
+        # the action is re-run and skips the stages in self.completed
+        return None
+
+
+journal = Journal()
+
+
+def current():
+    return _current.get()
+
+
+def completed(stage: str) -> list[dict]:
+    action = _current.get()
+    if action is None:
+        return []
+    return action.completed.get(stage, [])
+
+
+def record(stage: str, event: str, **data):
+    rpc_metrics.set_stage(stage)
+    action = _current.get()
+    if action is not None:
+        action.record(stage, event, **data)
+
+
+def send_raw_transaction(zk_web3: Web3, stage: str, signed, **data):
+    rpc_metrics.set_stage(stage)
+    action = _current.get()
+
+    if action is not None:
+        action.sign(stage, signed, **data)
+
+    tx_hash = zk_web3.eth.send_raw_transaction(signed.rawTransaction)
+
+    if action is not None:
+        action.record(stage, SENT, tx_hash=Web3.to_hex(tx_hash))
+
+    return tx_hash
+
+
+def journaled(name: str, final_stages: tuple = (), logging_prefix: str = None):
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is not None:
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+
+            params = dict(bound.arguments)
+            private_key = params.pop('private_key')
+            proxy = params.pop('proxy', None)
+
+            wallet = Account.from_key(private_key).address
+            action = journal.begin(name, wallet, params)
+
+            tags = rpc_metrics.tag(logging_prefix or name, 'resume' if action.resumed else 'quote')
+            try:
+                if action.resumed:
+                    network = constants.NETWORKS[params['network_name']]
+                    status = action.resume(
+                        clients.get_client(network.rpc_url, proxy),
+                        params['network_name'],
+                        final_stages,
+                        logging_prefix or name
+                    )
+                    if status is not None:
+                        action.finish(status)
+                        return status
+                    rpc_metrics.set_stage('quote')
+
+                token = _current.set(action)
+                try:
+                    status = func(*args, **kwargs)
+                finally:
+                    _current.reset(token)
+            except Exception:
+                if action.signed or action.resumed:
+                    journal.suspend(action)
+                else:
+                    action.finish(enums.TransactionStatus.FAILED)
+                raise
+            finally:
+                rpc_metrics.reset(tags)
+
+            action.finish(status)
+            return status
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,186 @@
+import json
+import time
+from dataclasses import dataclass
+
+import eth_abi
+import requests
+from web3 import Web3
+
+import contract_registry
+import rpc_metrics
+
+
+MULTICALL3_ADDRESS = '0xF9cda624FBC7e059355ce98a31693d299FACd963'
+
+AGGREGATE3_SIGNATURE = 'aggregate3((address,bool,bytes)[])'
+
+_session = requests.Session()
+
+
+def split_types(types: str) -> list[str]:
+    result = []
+    depth = 0
+    current = ''
+    for char in types:
+        if char == ',' and depth == 0:
+            result.append(current)
+            current = ''
+            continue
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        current += char
+    if current:
+        result.append(current)
+    return result
+
+
+@dataclass(frozen=True)
+class Call:
+    target: str
+    signature: str
+    args: tuple = ()
+    output_types: tuple = ('uint256',)
+
+    @property
+    def input_types(self) -> list[str]:
+        return split_types(self.signature[self.signature.index('(') + 1:-1])
+
+    def encode(self) -> bytes:
+        return contract_registry.selector(self.signature) + eth_abi.encode(self.input_types, list(self.args))
+
+    def decode(self, data: bytes):
+        values = eth_abi.decode(list(self.output_types), data)
+        if len(values) == 1:
+            return values[0]
+        return values
+
+
+def encode_aggregate3(calls: list[Call]) -> bytes:
+    return contract_registry.selector(AGGREGATE3_SIGNATURE) + eth_abi.encode(
+        ['(address,bool,bytes)[]'],
+        [[(call.target, True, call.encode()) for call in calls]]
+    )
+
+
+def decode_aggregate3(calls: list[Call], data: bytes) -> list:
+    (results,) = eth_abi.decode(['(bool,bytes)[]'], data)
+
+    values = []
+    for call, (success, return_data) in zip(calls, results):
+        if not success:
+            values.append(None)
+            continue
+        try:
+            values.append(call.decode(return_data))
+        except Exception:
+            values.append(None)
+
+    return values
+
+
+def eth_call_request(calls: list[Call], block_identifier: str = 'latest'):
+    return (
+        'eth_call',
+        [{'to': MULTICALL3_ADDRESS, 'data': Web3.to_hex(encode_aggregate3(calls))}, block_identifier]
+    )
+
+
+def call(zk_web3: Web3, single_call: Call, block_identifier: str = 'latest'):
+    data = zk_web3.eth.call({'to': single_call.target, 'data': Web3.to_hex(single_call.encode())}, block_identifier)
+    return single_call.decode(bytes(data))
+
+
+def aggregate(zk_web3: Web3, calls: list[Call], block_identifier: str = 'latest') -> list:
+    if not calls:
+        return []
+
+    data = zk_web3.eth.call(
+        {'to': MULTICALL3_ADDRESS, 'data': Web3.to_hex(encode_aggregate3(calls))},
+        block_identifier
+    )
+
+    return decode_aggregate3(calls, bytes(data))
+
+
+async def async_aggregate(async_web3, calls: list[Call], block_identifier: str = 'latest') -> list:
+    if not calls:
+        return []
+
+    data = await async_web3.eth.call(
+        {'to': MULTICALL3_ADDRESS, 'data': Web3.to_hex(encode_aggregate3(calls))},
+        block_identifier
+    )
+
+    return decode_aggregate3(calls, bytes(data))
+
+
+def encode_batch(rpc_requests: list[tuple[str, list]]) -> list[dict]:
+    return [
+        {'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}
+        for request_id, (method, params) in enumerate(rpc_requests)
+    ]
+
+
+def decode_batch(rpc_requests: list[tuple[str, list]], response: list[dict]) -> list:
+    responses = {item['id']: item for item in response}
+
+    results = []
+    for request_id, (method, _) in enumerate(rpc_requests):
+        item = responses.get(request_id)
+        if item is None:
+            raise ValueError(f'No response for {method} in JSON-RPC batch')
+        if 'error' in item:
+            raise ValueError(item['error'])
+        results.append(item['result'])
+
+    return results
+
+
+def batch_request(zk_web3: Web3, rpc_requests: list[tuple[str, list]]) -> list:
+    if not rpc_requests:
+        return []
+
+    provider = zk_web3.provider
+    session = getattr(provider, 'session', _session)
+    methods = [method for method, _ in rpc_requests]
+    request_data = json.dumps(encode_batch(rpc_requests)).encode()
+
+    started = time.perf_counter()
+    response_size = 0
+    try:
+        response = session.post(
+            provider.endpoint_uri,
+            data=request_data,
+            **provider.get_request_kwargs()
+        )
+        response.raise_for_status()
+        response_size = len(response.content)
+        results = decode_batch(rpc_requests, response.json())
+    except Exception:
+        rpc_metrics.metrics.observe_batch(methods, time.perf_counter() - started, True, len(request_data), response_size)
+        raise
+
+    rpc_metrics.metrics.observe_batch(methods, time.perf_counter() - started, False, len(request_data), response_size)
+    return results
+
+
+async def async_batch_request(async_web3, rpc_requests: list[tuple[str, list]]) -> list:
+    if not rpc_requests:
+        return []
+
+    methods = [method for method, _ in rpc_requests]
+    request_data = json.dumps(encode_batch(rpc_requests)).encode()
+
+    started = time.perf_counter()
+    response = b''
+    try:
+        response = await async_web3.provider.post(request_data)
+        results = decode_batch(rpc_requests, json.loads(response))
+    except Exception:
+        rpc_metrics.metrics.observe_batch(methods, time.perf_counter() - started, True, len(request_data), len(response))
+        raise
+
+    rpc_metrics.metrics.observe_batch(methods, time.perf_counter() - started, False, len(request_data), len(response))
+    return results
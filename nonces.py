@@ -0,0 +1,128 @@
+import threading
+import time
+from dataclasses import dataclass, field
+
+from web3 import Web3
+
+import enums
+import journal
+
+
+PENDING_TIMEOUT = 600
+
+
+@dataclass
+class AccountNonces:
+    next_nonce: int = None
+    pending: dict[int, tuple[float, str]] = field(default_factory=dict)
+    released: set[int] = field(default_factory=set)
+    needs_resync: bool = False
+
+
+class NonceManager:
+    def __init__(self, pending_timeout: float = PENDING_TIMEOUT):
+        self.pending_timeout = pending_timeout
+        self._accounts = {}
+        self._lock = threading.Lock()
+
+    def _state(self, network_name: enums.NetworkNames, address: str) -> AccountNonces:
+        key = (network_name, address.lower())
+        state = self._accounts.get(key)
+        if state is None:
+            state = self._accounts[key] = AccountNonces()
+        return state
+
+    def _sync(self, state: AccountNonces, chain_nonce: int):
+        for nonce in [nonce for nonce in state.pending if nonce < chain_nonce]:
+            del state.pending[nonce]
+        state.released = {nonce for nonce in state.released if nonce >= chain_nonce}
+
+        now = time.monotonic()
+        stale = any(now - sent_at > self.pending_timeout for sent_at, _ in state.pending.values())
+
+        if (
+            state.next_nonce is None
+            or chain_nonce > state.next_nonce
+            or state.needs_resync
+            or stale
+        ):
+            state.next_nonce = chain_nonce
+            state.pending.clear()
+            state.released.clear()
+            state.needs_resync = False
+
+    def sync(self, network_name: enums.NetworkNames, address: str, chain_nonce: int):
+        with self._lock:
+            self._sync(self._state(network_name, address), chain_nonce)
+
+    def acquire(self, network_name: enums.NetworkNames, address: str, chain_nonce: int = None) -> int:
+        with self._lock:
+            state = self._state(network_name, address)
+            if chain_nonce is not None:
+                self._sync(state, chain_nonce)
+            if state.next_nonce is None:
+                raise ValueError(f'Nonce of {address} is unknown, pass the chain nonce to acquire()')
+
+            if state.released:
+                nonce = min(state.released)
+                state.released.remove(nonce)
+            else:
+                nonce = state.next_nonce
+                state.next_nonce += 1
+            state.pending[nonce] = (time.monotonic(), None)
+            return nonce
+
+    def sent(self, network_name: enums.NetworkNames, address: str, nonce: int, txn_hash):
+        with self._lock:
+            state = self._state(network_name, address)
+            state.pending[nonce] = (time.monotonic(), txn_hash.hex() if isinstance(txn_hash, bytes) else txn_hash)
+
+    def confirm(self, network_name: enums.NetworkNames, address: str, nonce: int, mined: bool = True):
+        with self._lock:
+            state = self._state(network_name, address)
+            state.pending.pop(nonce, None)
+            if not mined:
+                state.needs_resync = True
+
+    def release(self, network_name: enums.NetworkNames, address: str, nonce: int):
+        with self._lock:
+            state = self._state(network_name, address)
+            state.pending.pop(nonce, None)
+            if state.next_nonce is None or nonce >= state.next_nonce:
+                return
+            state.released.add(nonce)
+            while state.next_nonce - 1 in state.released:
+                state.next_nonce -= 1
+                state.released.remove(state.next_nonce)
+
+    def release_all(self, network_name: enums.NetworkNames, address: str, nonces: list[int]):
+        for nonce in sorted(nonces, reverse=True):
+            self.release(network_name, address, nonce)
+
+    def pending(self, network_name: enums.NetworkNames, address: str) -> dict[int, str]:
+        with self._lock:
+            return {
+                nonce: txn_hash
+                for nonce, (_, txn_hash) in self._state(network_name, address).pending.items()
+            }
+
+
+manager = NonceManager()
+
+
+def send_raw_transaction(
+    zk_web3: Web3,
+    network_name: enums.NetworkNames,
+    address: str,
+    nonce: int,
+    stage: str,
+    signed,
+    **data
+):
+    try:
+        txn_hash = journal.send_raw_transaction(zk_web3, stage, signed, **data)
+    except Exception:
+        manager.release(network_name, address, nonce)
+        raise
+    manager.sent(network_name, address, nonce, txn_hash)
+    return txn_hash
@@ -0,0 +1,147 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+from web3 import Web3
+
+import enums
+from logger import logging
+
+
+CACHE_DIRECTORY = Path(__file__).parent / 'cache'
+REGISTRY_PATH = CACHE_DIRECTORY / 'pool_registry.json'
+
+ZKSYNC_CREATE2_PREFIX = bytes(Web3.keccak(text='zksyncCreate2'))
+EMPTY_INPUT_HASH = bytes(Web3.keccak(b''))
+
+SAVE_DELAY = 1
+
+
+class PoolRegistry:
+    def __init__(self, path: Path = REGISTRY_PATH, save_delay: float = SAVE_DELAY):
+        self.path = path
+        self.save_delay = save_delay
+        self._lock = threading.Lock()
+        self._data = None
+        self._dirty = False
+        self._timer = None
+        self._registered = False
+
+    def _load(self):
+        if self._data is not None:
+            return self._data
+
+        try:
+            with open(self.path) as file:
+                self._data = json.load(file)
+        except FileNotFoundError:
+            self._data = {}
+        except json.JSONDecodeError:
+            logging.warning(f'Pool registry {self.path} is corrupted, starting from scratch')
+            self._data = {}
+
+        return self._data
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.path.with_suffix('.tmp')
+        with open(temporary_path, 'w') as file:
+            json.dump(self._data, file, indent=2, sort_keys=True)
+        os.replace(temporary_path, self.path)
+
+    def _schedule_save(self):
+        self._dirty = True
+        if self.save_delay is None:
+            self._save()
+            self._dirty = False
+            return
+        if self._timer is None:
+            self._timer = threading.Timer(self.save_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+        if not self._registered:
+            atexit.register(self.flush)
+            self._registered = True
+
+    def flush(self):
+        with self._lock:
+            timer, self._timer = self._timer, None
+            if self._dirty:
+                self._save()
+                self._dirty = False
+        if timer is not None:
+            timer.cancel()
+
+    def get(self, network_name: enums.NetworkNames, section: str, key: str):
+        with self._lock:
+            return self._load().get(network_name.name, {}).get(section, {}).get(key)
+
+    def items(self, network_name: enums.NetworkNames, section: str):
+        with self._lock:
+            return list(self._load().get(network_name.name, {}).get(section, {}).items())
+
+    def set(self, network_name: enums.NetworkNames, section: str, key: str, value):
+        with self._lock:
+            data = self._load()
+            data.setdefault(network_name.name, {}).setdefault(section, {})[key] = value
+            self._schedule_save()
+
+    def update(self, network_name: enums.NetworkNames, section: str, values: dict, removed: list = ()):
+        with self._lock:
+            entries = self._load().setdefault(network_name.name, {}).setdefault(section, {})
+            entries.update(values)
+            for key in removed:
+                entries.pop(key, None)
+            self._schedule_save()
+
+    def clear(self, network_name: enums.NetworkNames, section: str):
+        with self._lock:
+            if self._load().get(network_name.name, {}).pop(section, None) is not None:
+                self._schedule_save()
+
+    def delete(self, network_name: enums.NetworkNames, section: str, key: str):
+        with self._lock:
+            entries = self._load().get(network_name.name, {}).get(section, {})
+            if entries.pop(key, None) is not None:
+                self._schedule_save()
+
+
+registry = PoolRegistry()
+
+
+def sort_tokens(first_token_address: str, second_token_address: str):
+    if int(first_token_address, 16) < int(second_token_address, 16):
+        return first_token_address, second_token_address
+    return second_token_address, first_token_address
+
+
+def pair_key(first_token_address: str, second_token_address: str) -> str:
+    return ':'.join(
+        Web3.to_checksum_address(address)
+        for address in sort_tokens(first_token_address, second_token_address)
+    )
+
+
+def zksync_bytecode_hash(bytecode: bytes) -> bytes:
+    # version byte, zero byte, length in 32-byte words, then the tail of sha256
+    digest = hashlib.sha256(bytecode).digest()
+    return bytes([1, 0]) + (len(bytecode) // 32).to_bytes(2, 'big') + digest[4:]
+
+
+def zksync_create2_address(
+    sender: str,
+    salt: bytes,
+    bytecode_hash: bytes,
+    constructor_input_hash: bytes = EMPTY_INPUT_HASH
+) -> str:
+    digest = Web3.keccak(
+        ZKSYNC_CREATE2_PREFIX
+        + bytes.fromhex(sender[2:]).rjust(32, b'\x00')
+        + salt
+        + bytecode_hash
+        + constructor_input_hash
+    )
+    return Web3.to_checksum_address(digest[12:])
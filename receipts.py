@@ -0,0 +1,362 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+
+import clients
+import multicall
+import rpc_metrics
+from logger import logging
+
+
+POLL_INTERVAL = 1
+MAX_BATCH_SIZE = 100
+RECEIPT_TIMEOUT = 300
+RESULT_GRACE = 5
+
+RECEIPT_INTEGER_FIELDS = (
+    'blockNumber',
+    'cumulativeGasUsed',
+    'effectiveGasPrice',
+    'gasUsed',
+    'l1BatchNumber',
+    'l1BatchTxIndex',
+    'status',
+    'transactionIndex',
+    'type',
+)
+
+LOG_INTEGER_FIELDS = (
+    'blockNumber',
+    'l1BatchNumber',
+    'logIndex',
+    'transactionIndex',
+    'transactionLogIndex',
+)
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def _to_int(value):
+    if isinstance(value, str):
+        return int(value, 16)
+    return value
+
+
+def format_log(log: dict) -> AttributeDict:
+    log = dict(log)
+    for name in LOG_INTEGER_FIELDS:
+        if log.get(name) is not None:
+            log[name] = _to_int(log[name])
+    log['topics'] = [HexBytes(topic) for topic in log.get('topics', [])]
+    log['data'] = HexBytes(log.get('data', '0x'))
+    if log.get('transactionHash') is not None:
+        log['transactionHash'] = HexBytes(log['transactionHash'])
+    if log.get('address') is not None:
+        log['address'] = Web3.to_checksum_address(log['address'])
+    return AttributeDict(log)
+
+
+def format_receipt(receipt: dict) -> AttributeDict:
+    receipt = dict(receipt)
+    for name in RECEIPT_INTEGER_FIELDS:
+        if receipt.get(name) is not None:
+            receipt[name] = _to_int(receipt[name])
+    receipt['transactionHash'] = HexBytes(receipt['transactionHash'])
+    receipt['logs'] = [format_log(log) for log in receipt.get('logs', [])]
+    return AttributeDict(receipt)
+
+
+def _hash_key(txn_hash) -> str:
+    if isinstance(txn_hash, (bytes, bytearray)):
+        return Web3.to_hex(txn_hash)
+    return txn_hash.lower()
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _receipt_requests(hashes: list[str]):
+    return [('eth_getTransactionReceipt', [txn_hash]) for txn_hash in hashes]
+
+
+class ReceiptWatcher:
+    def __init__(
+        self,
+        zk_web3: Web3,
+        poll_interval: float = POLL_INTERVAL,
+        max_batch_size: int = MAX_BATCH_SIZE
+    ):
+        self.zk_web3 = zk_web3
+        self.poll_interval = poll_interval
+        self.max_batch_size = max_batch_size
+
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+        self.polls = 0
+        self.requests_sent = 0
+        self.receipts_found = 0
+        self.timeouts = 0
+
+    def watch(self, txn_hash, timeout: float = RECEIPT_TIMEOUT) -> Future:
+        key = _hash_key(txn_hash)
+        deadline = time.monotonic() + timeout
+
+        with self._lock:
+            watched = self._pending.get(key)
+            if watched is None:
+                watched = self._pending[key] = [Future(), deadline]
+            else:
+                watched[1] = max(watched[1], deadline)
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='ReceiptWatcher',
+                    daemon=True
+                )
+                self._thread.start()
+
+        self._wakeup.set()
+        return watched[0]
+
+    def wait(self, txn_hash, timeout: float = RECEIPT_TIMEOUT):
+        return self.wait_all([txn_hash], timeout)[0]
+
+    def wait_all(self, txn_hashes: list, timeout: float = RECEIPT_TIMEOUT) -> list:
+        futures = [self.watch(txn_hash, timeout) for txn_hash in txn_hashes]
+        deadline = time.monotonic() + timeout + RESULT_GRACE * self.poll_interval
+
+        results = []
+        for txn_hash, future in zip(txn_hashes, futures):
+            try:
+                results.append(future.result(max(0, deadline - time.monotonic())))
+            except FutureTimeoutError:
+                logging.warning(f'Receipt watcher did not resolve {_hash_key(txn_hash)} in time')
+                self._resolve(_hash_key(txn_hash), None)
+                results.append(None)
+        return results
+
+    def poll(self):
+        now = time.monotonic()
+
+        with self._lock:
+            hashes = list(self._pending)
+
+        self.polls += 1
+
+        for chunk in _chunks(hashes, self.max_batch_size):
+            try:
+                results = multicall.batch_request(self.zk_web3, _receipt_requests(chunk))
+            except Exception as e:
+                logging.warning(f'Failed to poll {len(chunk)} transaction receipts: {e}')
+                continue
+            finally:
+                self.requests_sent += 1
+
+            for txn_hash, receipt in zip(chunk, results):
+                if receipt is None or receipt.get('blockNumber') is None:
+                    continue
+                self._resolve(txn_hash, format_receipt(receipt))
+                self.receipts_found += 1
+
+        with self._lock:
+            expired = [key for key, (_, deadline) in self._pending.items() if deadline <= now]
+        for txn_hash in expired:
+            self._resolve(txn_hash, None)
+            self.timeouts += 1
+
+    def _resolve(self, txn_hash: str, receipt):
+        with self._lock:
+            watched = self._pending.pop(txn_hash, None)
+        if watched is not None and not watched[0].done():
+            watched[0].set_result(receipt)
+
+    def _run(self):
+        rpc_metrics.tag(stage='receipts')
+        while True:
+            self._wakeup.clear()
+            self.poll()
+
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+
+            self._wakeup.wait(self.poll_interval)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+
+        return {
+            'pending': pending,
+            'polls': self.polls,
+            'requests_sent': self.requests_sent,
+            'receipts_found': self.receipts_found,
+            'timeouts': self.timeouts,
+        }
+
+
+class AsyncReceiptWatcher:
+    def __init__(
+        self,
+        async_web3,
+        poll_interval: float = POLL_INTERVAL,
+        max_batch_size: int = MAX_BATCH_SIZE
+    ):
+        self.async_web3 = async_web3
+        self.poll_interval = poll_interval
+        self.max_batch_size = max_batch_size
+
+        self._pending = {}
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+        self.polls = 0
+        self.requests_sent = 0
+        self.receipts_found = 0
+        self.timeouts = 0
+
+    def watch(self, txn_hash, timeout: float = RECEIPT_TIMEOUT) -> asyncio.Future:
+        key = _hash_key(txn_hash)
+        deadline = time.monotonic() + timeout
+
+        watched = self._pending.get(key)
+        if watched is None:
+            watched = self._pending[key] = [asyncio.get_running_loop().create_future(), deadline]
+        else:
+            watched[1] = max(watched[1], deadline)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+        self._wakeup.set()
+        return watched[0]
+
+    async def wait(self, txn_hash, timeout: float = RECEIPT_TIMEOUT):
+        return (await self.wait_all([txn_hash], timeout))[0]
+
+    async def wait_all(self, txn_hashes: list, timeout: float = RECEIPT_TIMEOUT) -> list:
+        futures = [self.watch(txn_hash, timeout) for txn_hash in txn_hashes]
+        if futures:
+            await asyncio.wait(set(futures), timeout=timeout + RESULT_GRACE * self.poll_interval)
+
+        results = []
+        for txn_hash, future in zip(txn_hashes, futures):
+            if not future.done():
+                logging.warning(f'Receipt watcher did not resolve {_hash_key(txn_hash)} in time')
+                self._resolve(_hash_key(txn_hash), None)
+            results.append(future.result())
+        return results
+
+    async def _poll_chunk(self, chunk: list[str]):
+        try:
+            return await multicall.async_batch_request(self.async_web3, _receipt_requests(chunk))
+        except Exception as e:
+            logging.warning(f'Failed to poll {len(chunk)} transaction receipts: {e}')
+            return [None] * len(chunk)
+        finally:
+            self.requests_sent += 1
+
+    async def poll(self):
+        now = time.monotonic()
+        hashes = list(self._pending)
+        chunks = list(_chunks(hashes, self.max_batch_size))
+
+        self.polls += 1
+
+        results = await asyncio.gather(*[self._poll_chunk(chunk) for chunk in chunks])
+
+        for chunk, chunk_results in zip(chunks, results):
+            for txn_hash, receipt in zip(chunk, chunk_results):
+                if receipt is None or receipt.get('blockNumber') is None:
+                    continue
+                self._resolve(txn_hash, format_receipt(receipt))
+                self.receipts_found += 1
+
+        for txn_hash in [key for key, (_, deadline) in self._pending.items() if deadline <= now]:
+            self._resolve(txn_hash, None)
+            self.timeouts += 1
+
+    def _resolve(self, txn_hash: str, receipt):
+        watched = self._pending.pop(txn_hash, None)
+        if watched is not None and not watched[0].done():
+            watched[0].set_result(receipt)
+
+    async def _run(self):
+        while self._pending:
+            self._wakeup.clear()
+            await self.poll()
+            if not self._pending:
+                return
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            'pending': len(self._pending),
+            'polls': self.polls,
+            'requests_sent': self.requests_sent,
+            'receipts_found': self.receipts_found,
+            'timeouts': self.timeouts,
+        }
+
+
+def get_watcher(zk_web3: Web3) -> ReceiptWatcher:
+    with _watchers_lock:
+        watcher = _watchers.get(id(zk_web3))
+        if watcher is None:
+            watcher = _watchers[id(zk_web3)] = ReceiptWatcher(zk_web3)
+    return watcher
+
+
+def get_async_watcher(async_web3) -> AsyncReceiptWatcher:
+    watcher = _watchers.get(id(async_web3))
+    if watcher is None:
+        watcher = _watchers[id(async_web3)] = AsyncReceiptWatcher(async_web3)
+    return watcher
+
+
+def evict(web3):
+    with _watchers_lock:
+        _watchers.pop(id(web3), None)
+
+
+clients.eviction_observers.append(evict)
+
+
+def wait_for_transaction_receipt(
+    zk_web3: Web3,
+    txn_hash,
+    logging_prefix: str,
+    timeout: float = RECEIPT_TIMEOUT
+):
+    receipt = get_watcher(zk_web3).wait(txn_hash, timeout)
+    if receipt is None:
+        logging.error(f'[{logging_prefix}] Transaction {_hash_key(txn_hash)} is not mined after {timeout} seconds')
+    return receipt
+
+
+async def async_wait_for_transaction_receipt(
+    async_web3,
+    txn_hash,
+    logging_prefix: str,
+    timeout: float = RECEIPT_TIMEOUT
+):
+    receipt = await get_async_watcher(async_web3).wait(txn_hash, timeout)
+    if receipt is None:
+        logging.error(f'[{logging_prefix}] Transaction {_hash_key(txn_hash)} is not mined after {timeout} seconds')
+    return receipt
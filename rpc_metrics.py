@@ -0,0 +1,238 @@
+import bisect
+import contextvars
+import threading
+import time
+from dataclasses import dataclass, field
+
+from logger import logging
+
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SUMMARY_INTERVAL = 60
+SUMMARY_TOP = 10
+
+NAMESPACE = 'sabbe_rpc'
+
+_tags = contextvars.ContextVar('rpc_metrics_tags', default=(None, None))
+_transfer = contextvars.ContextVar('rpc_metrics_transfer', default=None)
+
+
+def current_tags() -> tuple[str, str]:
+    return _tags.get()
+
+
+def tag(dex: str = None, stage: str = None) -> contextvars.Token:
+    current_dex, current_stage = _tags.get()
+    return _tags.set((dex or current_dex, stage or current_stage))
+
+
+def reset(token: contextvars.Token):
+    _tags.reset(token)
+
+
+def set_stage(stage: str):
+    dex, _ = _tags.get()
+    if dex is not None:
+        _tags.set((dex, stage))
+
+
+def record_transfer(bytes_out: int, bytes_in: int):
+    transfer = _transfer.get()
+    if transfer is not None:
+        transfer[0] += bytes_out
+        transfer[1] += bytes_in
+
+
+@dataclass
+class MethodStats:
+    count: int = 0
+    errors: int = 0
+    bytes_out: int = 0
+    bytes_in: int = 0
+    seconds: float = 0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(BUCKETS) + 1))
+
+    def observe(self, elapsed: float, error: bool, bytes_out: int, bytes_in: int):
+        self.count += 1
+        self.errors += error
+        self.bytes_out += bytes_out
+        self.bytes_in += bytes_in
+        self.seconds += elapsed
+        self.buckets[bisect.bisect_left(BUCKETS, elapsed)] += 1
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS + (float('inf'),), self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+def _label(value: str) -> str:
+    return (value or 'none').replace('\\', '\\\\').replace('"', '\\"')
+
+
+class RpcMetrics:
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._reporter = None
+        self._stopped = threading.Event()
+
+    def observe(self, method: str, elapsed: float, error: bool = False, bytes_out: int = 0, bytes_in: int = 0):
+        dex, stage = _tags.get()
+        key = (method, dex, stage)
+
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = MethodStats()
+            stats.observe(elapsed, error, bytes_out, bytes_in)
+
+    def observe_batch(self, methods: list[str], elapsed: float, error: bool, bytes_out: int, bytes_in: int):
+        if not methods:
+            return
+        share = len(methods)
+        for index, method in enumerate(methods):
+            self.observe(
+                method,
+                elapsed,
+                error,
+                bytes_out // share + (index < bytes_out % share),
+                bytes_in // share + (index < bytes_in % share)
+            )
+
+    def snapshot(self) -> dict[tuple[str, str, str], MethodStats]:
+        with self._lock:
+            return {
+                key: MethodStats(
+                    stats.count,
+                    stats.errors,
+                    stats.bytes_out,
+                    stats.bytes_in,
+                    stats.seconds,
+                    list(stats.buckets)
+                )
+                for key, stats in self._stats.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+
+    def prometheus(self) -> str:
+        snapshot = sorted(self.snapshot().items(), key=lambda item: tuple(value or '' for value in item[0]))
+
+        lines = []
+        counters = (
+            ('requests_total', 'JSON-RPC requests sent', 'count'),
+            ('errors_total', 'JSON-RPC requests that failed or returned an error', 'errors'),
+            ('request_bytes_total', 'Bytes sent in JSON-RPC requests', 'bytes_out'),
+            ('response_bytes_total', 'Bytes received in JSON-RPC responses', 'bytes_in'),
+        )
+
+        for name, description, attribute in counters:
+            lines.append(f'# HELP {NAMESPACE}_{name} {description}')
+            lines.append(f'# TYPE {NAMESPACE}_{name} counter')
+            for (method, dex, stage), stats in snapshot:
+                labels = f'method="{_label(method)}",dex="{_label(dex)}",stage="{_label(stage)}"'
+                lines.append(f'{NAMESPACE}_{name}{{{labels}}} {getattr(stats, attribute)}')
+
+        lines.append(f'# HELP {NAMESPACE}_duration_seconds JSON-RPC request latency')
+        lines.append(f'# TYPE {NAMESPACE}_duration_seconds histogram')
+        for (method, dex, stage), stats in snapshot:
+            labels = f'method="{_label(method)}",dex="{_label(dex)}",stage="{_label(stage)}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS + (float('inf'),), stats.buckets):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f'{NAMESPACE}_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f'{NAMESPACE}_duration_seconds_sum{{{labels}}} {stats.seconds:.6f}')
+            lines.append(f'{NAMESPACE}_duration_seconds_count{{{labels}}} {stats.count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def log_summary(self, top: int = SUMMARY_TOP):
+        snapshot = self.snapshot()
+        if not snapshot:
+            return
+
+        total = sum(stats.count for stats in snapshot.values())
+        errors = sum(stats.errors for stats in snapshot.values())
+        logging.info(f'[RPC] {total} requests, {errors} errors across {len(snapshot)} method tags')
+
+        slowest = sorted(snapshot.items(), key=lambda item: item[1].seconds, reverse=True)[:top]
+        for (method, dex, stage), stats in slowest:
+            logging.info(
+                f'[RPC] {dex or "-"}/{stage or "-"} {method}: {stats.count} calls, {stats.errors} errors, '
+                f'{stats.seconds:.2f}s total, p50 <= {stats.quantile(0.5) * 1000:.0f} ms, '
+                f'p99 <= {stats.quantile(0.99) * 1000:.0f} ms, '
+                f'{stats.bytes_out / 1024:.1f} KiB out, {stats.bytes_in / 1024:.1f} KiB in'
+            )
+
+    def _report(self, interval: float):
+        while not self._stopped.wait(interval):
+            try:
+                self.log_summary()
+            except Exception as e:
+                logging.error(f'[RPC] Failed to log metrics summary: {e}')
+
+    def start_reporter(self, interval: float = SUMMARY_INTERVAL):
+        with self._lock:
+            if self._reporter is not None:
+                return
+            self._stopped.clear()
+            self._reporter = threading.Thread(target=self._report, args=(interval,), name='RpcMetrics', daemon=True)
+            self._reporter.start()
+
+    def stop_reporter(self):
+        with self._lock:
+            reporter, self._reporter = self._reporter, None
+        if reporter is not None:
+            self._stopped.set()
+            reporter.join()
+
+
+metrics = RpcMetrics()
+
+
+def _is_error(response) -> bool:
+    return isinstance(response, dict) and response.get('error') is not None
+
+
+def middleware(make_request, w3):
+    def instrumented(method, params):
+        token = _transfer.set([0, 0])
+        started = time.perf_counter()
+        error = True
+        try:
+            response = make_request(method, params)
+            error = _is_error(response)
+            return response
+        finally:
+            bytes_out, bytes_in = _transfer.get()
+            _transfer.reset(token)
+            metrics.observe(method, time.perf_counter() - started, error, bytes_out, bytes_in)
+
+    return instrumented
+
+
+async def async_middleware(make_request, w3):
+    async def instrumented(method, params):
+        token = _transfer.set([0, 0])
+        started = time.perf_counter()
+        error = True
+        try:
+            response = await make_request(method, params)
+            error = _is_error(response)
+            return response
+        finally:
+            bytes_out, bytes_in = _transfer.get()
+            _transfer.reset(token)
+            metrics.observe(method, time.perf_counter() - started, error, bytes_out, bytes_in)
+
+    return instrumented
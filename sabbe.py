@@ -1,14 +1,26 @@
-from pathlib import Path
+import threading
+from dataclasses import dataclass, field
 
 from eth_account import Account
 from eth_account.signers.local import LocalAccount
 from web3 import Web3
 
+import allowances
+import clients
+import contract_registry
+import fees
+import journal
+import multicall
+import nonces
+import pool_registry
+import receipts
+import signing
+import syncswap_math
+import syncswap_routes
 import utils
 from logger import logging
 from zksync2.core.types import EthBlockParams
 
-from zksync2.module.module_builder import ZkSyncBuilder
 from zksync2.manage_contracts.erc20_contract import ERC20Contract
 import eth_abi
 import enums
@@ -34,19 +46,115 @@ CONTRACT_ADRESSES = {
 }
 
 
-def get_pool_contract(
+POOL_REGISTRY_SECTION = 'SyncSwapClassicPools'
+BYTECODE_HASH_REGISTRY_SECTION = 'SyncSwapBytecodeHashes'
+
+
+def derive_pool_address(
+    network_name: enums.NetworkNames,
+    first_token_address: str,
+    second_token_address: str,
+    bytecode_hash: bytes
+):
+    salt = Web3.keccak(eth_abi.encode(
+        ['address', 'address'],
+        pool_registry.sort_tokens(first_token_address, second_token_address)
+    ))
+
+    return pool_registry.zksync_create2_address(
+        CONTRACT_ADRESSES[ContractTypes.POOL_FACTORY][network_name],
+        bytes(salt),
+        bytecode_hash
+    )
+
+
+def learn_pool_bytecode_hash(
+    network_name: enums.NetworkNames,
+    first_token_address: str,
+    second_token_address: str,
+    pool_address: str,
+    bytecode: bytes
+):
+    bytecode_hash = pool_registry.zksync_bytecode_hash(bytecode)
+
+    derived_address = derive_pool_address(
+        network_name,
+        first_token_address,
+        second_token_address,
+        bytecode_hash
+    )
+
+    if derived_address != pool_address:
+        logging.warning(f'[SyncSwap] Derived pool address {derived_address} does not match {pool_address}')
+        return
+
+    pool_registry.registry.set(network_name, BYTECODE_HASH_REGISTRY_SECTION, 'classic', bytecode_hash.hex())
+
+
+def lookup_pool_address(
+    network_name: enums.NetworkNames,
+    first_token_address: str,
+    second_token_address: str
+):
+    pair_key = pool_registry.pair_key(first_token_address, second_token_address)
+    return pool_registry.registry.get(network_name, POOL_REGISTRY_SECTION, pair_key)
+
+
+def predict_pool_address(
+    network_name: enums.NetworkNames,
+    first_token_address: str,
+    second_token_address: str
+):
+    bytecode_hash = pool_registry.registry.get(network_name, BYTECODE_HASH_REGISTRY_SECTION, 'classic')
+    if bytecode_hash is None:
+        return None
+
+    return derive_pool_address(
+        network_name,
+        first_token_address,
+        second_token_address,
+        bytes.fromhex(bytecode_hash)
+    )
+
+
+def needs_bytecode_hash(network_name: enums.NetworkNames):
+    return pool_registry.registry.get(network_name, BYTECODE_HASH_REGISTRY_SECTION, 'classic') is None
+
+
+def remember_pool_address(
+    network_name: enums.NetworkNames,
+    first_token_address: str,
+    second_token_address: str,
+    pool_address: str
+):
+    pool_registry.registry.set(
+        network_name,
+        POOL_REGISTRY_SECTION,
+        pool_registry.pair_key(first_token_address, second_token_address),
+        pool_address
+    )
+
+
+def get_pool_address(
     zk_web3: Web3,
     network_name: enums.NetworkNames,
-    account: LocalAccount,
     first_token_address: str,
     second_token_address: str
 ):
-    with open(Path(__file__).parent / 'abi' / 'SyncSwapClassicPoolFactory.json') as file:
-        pool_factory_abi = file.read()
+    pool_address = lookup_pool_address(network_name, first_token_address, second_token_address)
+    if pool_address:
+        return pool_address
+
+    pool_address = predict_pool_address(network_name, first_token_address, second_token_address)
+    if pool_address and zk_web3.eth.get_code(pool_address):
+        remember_pool_address(network_name, first_token_address, second_token_address, pool_address)
+        return pool_address
 
-    pool_factory_contract = zk_web3.eth.contract(
-        address=CONTRACT_ADRESSES[ContractTypes.POOL_FACTORY][network_name],
-        abi=pool_factory_abi
+    pool_factory_contract = contract_registry.get_contract(
+        zk_web3,
+        network_name,
+        CONTRACT_ADRESSES[ContractTypes.POOL_FACTORY][network_name],
+        'SyncSwapClassicPoolFactory'
     )
 
     pool_address = pool_factory_contract.functions.getPool(
@@ -54,18 +162,497 @@ def get_pool_contract(
         second_token_address
     ).call()
 
-    with open(
-        Path(__file__).parent / 'abi' / 'SyncSwapClassicPool.json') as file:
-        pool_abi = file.read()
+    if pool_address == ZERO_ADDRESS:
+        return pool_address
+
+    remember_pool_address(network_name, first_token_address, second_token_address, pool_address)
+
+    if needs_bytecode_hash(network_name):
+        try:
+            learn_pool_bytecode_hash(
+                network_name,
+                first_token_address,
+                second_token_address,
+                pool_address,
+                bytes(zk_web3.eth.get_code(pool_address))
+            )
+        except Exception as e:
+            logging.warning(f'[SyncSwap] Failed to learn pool bytecode hash: {e}')
+
+    return pool_address
+
+
+def get_pool_contract(
+    zk_web3: Web3,
+    network_name: enums.NetworkNames,
+    account: LocalAccount,
+    first_token_address: str,
+    second_token_address: str
+):
+    pool_address = get_pool_address(
+        zk_web3,
+        network_name,
+        first_token_address,
+        second_token_address
+    )
 
-    pool_contract = zk_web3.eth.contract(
-        address=pool_address,
-        abi=pool_abi
+    pool_contract = contract_registry.get_contract(
+        zk_web3,
+        network_name,
+        pool_address,
+        'SyncSwapClassicPool'
     )
 
     return pool_contract
 
 
+ROUTER_REGISTRY_SECTION = 'SyncSwapRouter'
+
+ROUTER_MULTICALL_SIGNATURE = 'multicall(bytes[])'
+
+PIPELINED_GAS_LIMIT = 5_000_000
+
+OPTIONAL_SNAPSHOT_FIELDS = ('reserves', 'swap_fee')
+
+
+@dataclass
+class PreTradeSnapshot:
+    chain_id: int
+    nonce: int
+    timestamp: int
+    balance: int
+    allowance: int = 0
+    reserves: tuple[int, int] = None
+    swap_fee: int = syncswap_math.DEFAULT_SWAP_FEE
+    decimals: int = None
+    values: dict = field(default_factory=dict)
+
+
+def get_weth(
+    zk_web3: Web3,
+    network_name: enums.NetworkNames,
+    swap_router_contract
+):
+    weth = pool_registry.registry.get(network_name, ROUTER_REGISTRY_SECTION, 'wETH')
+
+    if weth is None:
+        weth_address = swap_router_contract.functions.wETH().call()
+        weth_decimals = multicall.aggregate(zk_web3, [
+            multicall.Call(weth_address, 'decimals()', output_types=('uint8',))
+        ])[0]
+        weth = [weth_address, weth_decimals]
+        pool_registry.registry.set(network_name, ROUTER_REGISTRY_SECTION, 'wETH', weth)
+
+    return weth
+
+
+def get_pool_master(
+    zk_web3: Web3,
+    network_name: enums.NetworkNames
+):
+    master = pool_registry.registry.get(network_name, ROUTER_REGISTRY_SECTION, 'master')
+
+    if master is None:
+        master = multicall.aggregate(zk_web3, [
+            multicall.Call(
+                CONTRACT_ADRESSES[ContractTypes.POOL_FACTORY][network_name],
+                'master()',
+                output_types=('address',)
+            )
+        ])[0]
+        if master is None:
+            return None
+        master = Web3.to_checksum_address(master)
+        pool_registry.registry.set(network_name, ROUTER_REGISTRY_SECTION, 'master', master)
+
+    return master
+
+
+def network_token_addresses(network_name: enums.NetworkNames, weth_address: str):
+    token_addresses = {weth_address}
+    for (token_network_name, _), token in constants.NETWORK_TOKENS.items():
+        if token_network_name == network_name:
+            token_addresses.add(token.contract_address)
+    return sorted(token_addresses)
+
+
+def discover_pools(
+    zk_web3: Web3,
+    network_name: enums.NetworkNames,
+    token_addresses: list[str]
+):
+    pairs = [
+        (first_token_address, second_token_address)
+        for index, first_token_address in enumerate(token_addresses)
+        for second_token_address in token_addresses[index + 1:]
+    ]
+
+    pools = {}
+    missing = []
+    for pair in pairs:
+        pool_address = lookup_pool_address(network_name, *pair)
+        if pool_address:
+            pools[pair] = pool_address
+        else:
+            missing.append(pair)
+
+    factory_address = CONTRACT_ADRESSES[ContractTypes.POOL_FACTORY][network_name]
+    pool_addresses = multicall.aggregate(zk_web3, [
+        multicall.Call(factory_address, 'getPool(address,address)', pair, output_types=('address',))
+        for pair in missing
+    ])
+
+    for pair, pool_address in zip(missing, pool_addresses):
+        if pool_address is None or int(pool_address, 16) == 0:
+            continue
+        pool_address = Web3.to_checksum_address(pool_address)
+        remember_pool_address(network_name, *pair, pool_address)
+        pools[pair] = pool_address
+
+    return [(pool_address, *pool_registry.sort_tokens(*pair)) for pair, pool_address in pools.items()]
+
+
+def load_pool_reserves(
+    zk_web3: Web3,
+    network_name: enums.NetworkNames,
+    account_address: str,
+    pools: list[tuple[str, str, str]]
+):
+    pool_master = get_pool_master(zk_web3, network_name)
+
+    calls = []
+    for pool_address, token0, token1 in pools:
+        calls.append(multicall.Call(pool_address, 'getReserves()', output_types=('uint256', 'uint256')))
+        calls.append(multicall.Call(
+            pool_master or ZERO_ADDRESS,
+            'getSwapFee(address,address,address,address,bytes)',
+            (pool_address, account_address, token0, token1, b''),
+            output_types=('uint24',)
+        ))
+
+    values = multicall.aggregate(zk_web3, calls)
+
+    reserves = []
+    for (pool_address, token0, token1), reserve_values, swap_fee in zip(pools, values[::2], values[1::2]):
+        if reserve_values is None or 0 in reserve_values:
+            continue
+        reserves.append(syncswap_math.PoolReserves(
+            pool_address,
+            token0,
+            token1,
+            *reserve_values,
+            syncswap_math.DEFAULT_SWAP_FEE if swap_fee is None else swap_fee
+        ))
+
+    return reserves
+
+
+_pool_graphs = {}
+_pool_graphs_lock = threading.Lock()
+
+
+def get_pool_graph(
+    zk_web3: Web3,
+    network_name: enums.NetworkNames,
+    weth_address: str,
+    ttl: float = syncswap_routes.RESERVES_TTL
+):
+    # one graph per network quoted with the default swap fee; a published graph
+    # is never mutated, callers re-quote their route on a with_reserves() copy
+    graph = _pool_graphs.get(network_name)
+    if graph is not None and not graph.is_stale(ttl):
+        return graph
+
+    with _pool_graphs_lock:
+        graph = _pool_graphs.get(network_name)
+        if graph is not None and not graph.is_stale(ttl):
+            return graph
+
+        if graph is None or not graph.pools:
+            pools = discover_pools(zk_web3, network_name, network_token_addresses(network_name, weth_address))
+        else:
+            pools = [(pool.address, pool.token0, pool.token1) for pool in graph.pools.values()]
+
+        fresh = syncswap_routes.PoolGraph(load_pool_reserves(zk_web3, network_name, ZERO_ADDRESS, pools))
+        if graph is None or fresh.pools:
+            graph = _pool_graphs[network_name] = fresh
+
+    return graph
+
+
+def find_route(
+    zk_web3: Web3,
+    network_name: enums.NetworkNames,
+    account_address: str,
+    weth_address: str,
+    from_token_address: str,
+    to_token_address: str,
+    amount_in_wei: int,
+    direct_amount_out: int,
+    max_hops: int = syncswap_routes.MAX_HOPS
+):
+    graph = get_pool_graph(zk_web3, network_name, weth_address)
+
+    route = graph.best_route(from_token_address, to_token_address, amount_in_wei, max_hops)
+    if route is None or route.hops == 1 or route.amount_out <= direct_amount_out:
+        return None
+
+    pools = [(pool.address, pool.token0, pool.token1) for pool in map(graph.get, route.pools)]
+    graph = graph.with_reserves(load_pool_reserves(zk_web3, network_name, account_address, pools))
+
+    route = graph.quote(tuple(address.lower() for address in route.pools), from_token_address, amount_in_wei)
+    if route is None or route.amount_out <= direct_amount_out:
+        return None
+
+    return route
+
+
+def find_split(
+    zk_web3: Web3,
+    network_name: enums.NetworkNames,
+    account_address: str,
+    weth_address: str,
+    from_token_address: str,
+    to_token_address: str,
+    amount_in_wei: int,
+    direct_amount_out: int,
+    max_hops: int = syncswap_routes.MAX_HOPS,
+    max_splits: int = syncswap_routes.MAX_SPLITS
+):
+    graph = get_pool_graph(zk_web3, network_name, weth_address)
+    optimizer = syncswap_routes.SplitOptimizer(graph)
+
+    split = optimizer.optimize(from_token_address, to_token_address, amount_in_wei, max_hops, max_splits)
+    if split is None or split.amount_out <= direct_amount_out:
+        return None
+
+    pools = {
+        pool.address: (pool.address, pool.token0, pool.token1)
+        for route in split.routes
+        for pool in map(graph.get, route.pools)
+    }
+    graph = graph.with_reserves(load_pool_reserves(zk_web3, network_name, account_address, list(pools.values())))
+
+    split = syncswap_routes.SplitOptimizer(graph).quote_split(
+        [(tuple(address.lower() for address in route.pools), route.amount_in) for route in split.routes],
+        from_token_address
+    )
+    if split is None or split.amount_out <= direct_amount_out:
+        return None
+
+    return split
+
+
+def build_snapshot_requests(
+    account_address: str,
+    *,
+    token_address: str = None,
+    spender: str = None,
+    pool_address: str = None,
+    swap_tokens: tuple[str, str] = None,
+    pool_master: str = None,
+    with_decimals: bool = False,
+    extra_calls: dict[str, multicall.Call] = None
+):
+    calls = {}
+
+    if token_address is not None:
+        calls['balance'] = multicall.Call(token_address, 'balanceOf(address)', (account_address,))
+        if spender is not None:
+            calls['allowance'] = multicall.Call(
+                token_address,
+                'allowance(address,address)',
+                (account_address, spender)
+            )
+        if with_decimals:
+            calls['decimals'] = multicall.Call(token_address, 'decimals()', output_types=('uint8',))
+
+    if pool_address is not None:
+        calls['reserves'] = multicall.Call(
+            pool_address,
+            'getReserves()',
+            output_types=('uint256', 'uint256')
+        )
+        if swap_tokens is not None and pool_master is not None:
+            calls['swap_fee'] = multicall.Call(
+                pool_master,
+                'getSwapFee(address,address,address,address,bytes)',
+                (pool_address, account_address, *swap_tokens, b''),
+                output_types=('uint24',)
+            )
+
+    calls.update(extra_calls or {})
+
+    rpc_requests = [
+        ('eth_chainId', []),
+        ('eth_getTransactionCount', [account_address, EthBlockParams.LATEST.value]),
+        ('eth_getBlockByNumber', ['latest', False]),
+    ]
+
+    if token_address is None:
+        rpc_requests.append(('eth_getBalance', [account_address, 'latest']))
+
+    if calls:
+        rpc_requests.append(multicall.eth_call_request(list(calls.values())))
+
+    return rpc_requests, calls
+
+
+def parse_snapshot(results: list, calls: dict, native_balance: bool):
+    snapshot = PreTradeSnapshot(
+        chain_id=int(results[0], 16),
+        nonce=int(results[1], 16),
+        timestamp=int(results[2]['timestamp'], 16),
+        balance=int(results[3], 16) if native_balance else 0
+    )
+
+    if calls:
+        values = multicall.decode_aggregate3(list(calls.values()), bytes.fromhex(results[-1][2:]))
+
+        failed = [
+            name for name, value in zip(calls, values)
+            if value is None and name not in OPTIONAL_SNAPSHOT_FIELDS
+        ]
+        if failed:
+            raise ValueError(f'Failed to read {", ".join(failed)} in the pre-trade snapshot')
+
+        for name, value in zip(calls, values):
+            if name not in PreTradeSnapshot.__dataclass_fields__:
+                snapshot.values[name] = value
+            elif value is not None:
+                setattr(snapshot, name, value)
+
+    if snapshot.reserves is not None:
+        snapshot.reserves = tuple(snapshot.reserves)
+
+    return snapshot
+
+
+def get_pre_trade_snapshot(
+    zk_web3: Web3,
+    account_address: str,
+    **kwargs
+):
+    rpc_requests, calls = build_snapshot_requests(account_address, **kwargs)
+
+    results = multicall.batch_request(zk_web3, rpc_requests)
+
+    return parse_snapshot(results, calls, kwargs.get('token_address') is None)
+
+
+def build_swap_paths(
+    pool_address: str,
+    from_token_address: str,
+    account_address: str,
+    amount_in_wei: int,
+    is_from_eth: bool
+):
+    withdraw_mode = 1
+
+    swap_data = eth_abi.encode(
+        ['address', 'address', 'uint8'],
+        [from_token_address, account_address, withdraw_mode]
+    )
+
+    steps = [
+        (
+            pool_address,
+            swap_data,
+            ZERO_ADDRESS,
+            b'0x'
+        )
+    ]
+
+    return [
+        (
+            steps,
+            ZERO_ADDRESS if is_from_eth else from_token_address,
+            amount_in_wei
+        )
+    ]
+
+
+def build_add_liquidity_data(
+    pool_address: str,
+    first_token_address: str,
+    second_token_address: str,
+    account_address: str,
+    amount_in_wei: int,
+    is_first_eth: bool
+):
+    return {
+        'pool': pool_address,
+        'inputs': [
+            {
+                'token': ZERO_ADDRESS if is_first_eth else first_token_address,
+                'amount': amount_in_wei
+            },
+            {
+                'token': second_token_address,
+                'amount': 0
+            }
+        ],
+        'data': eth_abi.encode(['address'], [account_address]),
+        'minLiquidity': 0,
+        'callback': ZERO_ADDRESS,
+        'callbackData': b''
+    }
+
+
+def build_route_paths(
+    route: syncswap_routes.Route,
+    account_address: str,
+    is_from_eth: bool
+):
+    steps = []
+
+    for index, (pool_address, token_in_address) in enumerate(zip(route.pools, route.tokens)):
+        if index == route.hops - 1:
+            to_address, withdraw_mode = account_address, 1
+        else:
+            to_address, withdraw_mode = route.pools[index + 1], 0
+
+        steps.append((
+            pool_address,
+            eth_abi.encode(
+                ['address', 'address', 'uint8'],
+                [token_in_address, to_address, withdraw_mode]
+            ),
+            ZERO_ADDRESS,
+            b'0x'
+        ))
+
+    return [
+        (
+            steps,
+            ZERO_ADDRESS if is_from_eth else route.tokens[0],
+            route.amount_in
+        )
+    ]
+
+
+def build_split_paths(
+    split: syncswap_routes.Split,
+    account_address: str,
+    is_from_eth: bool
+):
+    return [
+        path
+        for route in split.routes
+        for path in build_route_paths(route, account_address, is_from_eth)
+    ]
+
+
+def build_burn_data(token_out_address: str, account_address: str):
+    withdraw_mode = 1
+
+    return eth_abi.encode(
+        ['address', 'address', 'uint8'],
+        [token_out_address, account_address, withdraw_mode]
+    )
+
+
+@journal.journaled('syncswap.swap', final_stages=('swap',), logging_prefix='SyncSwap')
 def swap(
     private_key: str,
     network_name: enums.NetworkNames,
@@ -75,7 +662,10 @@ def swap(
     *,
     amount: float = None,
     percentage: float = None,
-    proxy: dict[str, str] = None
+    proxy: dict[str, str] = None,
+    pipeline_approval: bool = False,
+    max_hops: int = 1,
+    max_splits: int = 1
 ):
     if not any([amount, percentage]):
         raise ValueError('Either amount or percentage must be specified')
@@ -83,44 +673,63 @@ def swap(
         raise ValueError('Only one of amount or percentage must be specified')
 
     network = constants.NETWORKS[network_name]
-    zk_web3 = ZkSyncBuilder.build(network.rpc_url, proxy=proxy)
+    zk_web3 = clients.get_client(network.rpc_url, proxy)
     account: LocalAccount = Account.from_key(private_key)
 
-    with open(Path(__file__).parent / 'abi' / 'SyncSwapRouter.json') as file:
-        swap_router_abi = file.read()
-
-    swap_router_contract = zk_web3.eth.contract(
-        address=CONTRACT_ADRESSES[ContractTypes.SWAP][network_name],
-        abi=swap_router_abi
+    swap_router_contract = contract_registry.get_contract(
+        zk_web3,
+        network_name,
+        CONTRACT_ADRESSES[ContractTypes.SWAP][network_name],
+        'SyncSwapRouter'
     )
 
-    weth_address = swap_router_contract.functions.wETH().call()
+    weth_address, weth_decimals = get_weth(zk_web3, network_name, swap_router_contract)
     weth_contract = ERC20Contract(zk_web3.zksync, weth_address, account)
-    weth_decimals = weth_contract.contract.functions.decimals().call()
 
     if from_token_name in constants.ETH_TOKENS:
         from_token_address = weth_address
         from_token_contract = weth_contract
         from_token_decimals = weth_decimals
-        balance_in_wei = zk_web3.zksync.get_balance(account.address)
     else:
         from_token = constants.NETWORK_TOKENS[network_name, from_token_name]
         from_token_address = from_token.contract_address
         from_token_contract = ERC20Contract(zk_web3.zksync, from_token_address, account)
         from_token_decimals = from_token.decimals
-        balance_in_wei = from_token_contract.contract.functions.balanceOf(
-            account.address
-        ).call()
 
     if to_token_name in constants.ETH_TOKENS:
         to_token_address = weth_address
-        to_token_contract = weth_contract
-        to_token_decimals = weth_decimals
     else:
         to_token = constants.NETWORK_TOKENS[network_name, to_token_name]
         to_token_address = to_token.contract_address
-        to_token_contract = ERC20Contract(zk_web3.zksync, to_token_address, account)
-        to_token_decimals = to_token.decimals
+
+    pool_contract = get_pool_contract(
+        zk_web3,
+        network_name,
+        account,
+        from_token_address,
+        to_token_address
+    )
+
+    is_from_eth = from_token_name in constants.ETH_TOKENS
+
+    known_allowance = None if is_from_eth else allowances.ledger.get(
+        network_name,
+        account.address,
+        from_token_address,
+        swap_router_contract.address
+    )
+
+    snapshot = get_pre_trade_snapshot(
+        zk_web3,
+        account.address,
+        token_address=None if is_from_eth else from_token_address,
+        spender=None if is_from_eth or known_allowance is not None else swap_router_contract.address,
+        pool_address=pool_contract.address,
+        swap_tokens=(from_token_address, to_token_address),
+        pool_master=get_pool_master(zk_web3, network_name)
+    )
+
+    balance_in_wei = snapshot.balance
 
     if amount is None:
         if percentage == 100:
@@ -133,91 +742,116 @@ def swap(
 
     logging.info(f'[SyncSwap] Swapping {amount} {from_token_name} to {to_token_name}')
 
-    pool_contract = get_pool_contract(
-        zk_web3,
-        network_name,
-        account,
-        from_token_address,
-        to_token_address
-    )
+    reserves = snapshot.reserves
+
+    if reserves is None:
+        amount_out = 0
+    else:
+        if int(from_token_address, 16) < int(to_token_address, 16):
+            reserve_first, reserve_second = reserves
+        else:
+            reserve_first, reserve_second = reversed(reserves)
+
+        amount_out = syncswap_math.get_amount_out(
+            amount_in_wei,
+            reserve_first,
+            reserve_second,
+            snapshot.swap_fee
+        )
+
+    split = None
 
     try:
-        reserves = pool_contract.functions.getReserves().call()
+        if max_splits > 1:
+            split = find_split(
+                zk_web3,
+                network_name,
+                account.address,
+                weth_address,
+                from_token_address,
+                to_token_address,
+                amount_in_wei,
+                amount_out,
+                max_hops,
+                max_splits
+            )
+        elif max_hops > 1:
+            route = find_route(
+                zk_web3,
+                network_name,
+                account.address,
+                weth_address,
+                from_token_address,
+                to_token_address,
+                amount_in_wei,
+                amount_out,
+                max_hops
+            )
+            if route is not None:
+                split = syncswap_routes.Split((route,), route.amount_in, route.amount_out)
     except Exception as e:
-        logging.error(f'[SyncSwap] Failed to get pool info')
-        return enums.TransactionStatus.FAILED
+        logging.warning(f'[SyncSwap] Failed to find a multi-hop route: {e}')
 
-    if int(from_token_address, 16) < int(to_token_address, 16):
-        reserve_first, reserve_second = reserves
-    else:
-        reserve_first, reserve_second = reversed(reserves)
+    if split is not None:
+        amount_out = split.amount_out
+        logging.info(
+            f'[SyncSwap] Routing through {len(split.routes)} paths '
+            f'of {", ".join(str(route.hops) for route in split.routes)} pools'
+        )
+    elif reserves is None:
+        logging.error('[SyncSwap] Failed to get pool info')
+        return enums.TransactionStatus.FAILED
 
-    amount_out_min = int(
-        (reserve_second / 10 ** to_token_decimals)
-        / (reserve_first / 10 ** from_token_decimals)
-        * amount
-        * 10 ** to_token_decimals
-    )
+    amount_out_min = syncswap_math.apply_slippage(amount_out, slippage)
 
-    amount_out_min = int(amount_out_min * (1 - slippage / 100))
+    journal.record('swap', journal.QUOTED, amount_in=amount_in_wei, amount_out=amount_out, amount_out_min=amount_out_min)
 
-    if reserve_first < amount_in_wei or reserve_second < amount_out_min:
+    if amount_out_min == 0:
         logging.error('[SyncSwap] Insufficient liquidity in the pool')
         return enums.TransactionStatus.INSUFFICIENT_LIQUIDITY
 
-    withdraw_mode = 1
-
-    swap_data = eth_abi.encode(
-        ['address', 'address', 'uint8'],
-        [from_token_address, account.address, withdraw_mode]
-    )
-
-    steps = [
-        (
+    if split is not None:
+        paths = build_split_paths(split, account.address, is_from_eth)
+    else:
+        paths = build_swap_paths(
             pool_contract.address,
-            swap_data,
-            ZERO_ADDRESS,
-            b'0x'
-        )
-    ]
-
-    native_eth_address = ZERO_ADDRESS
-
-    paths = [
-        (
-            steps,
-            ZERO_ADDRESS if from_token_name in constants.ETH_TOKENS else from_token_address,
-            amount_in_wei
+            from_token_address,
+            account.address,
+            amount_in_wei,
+            is_from_eth
         )
-    ]
 
-    deadline = zk_web3.eth.get_block('latest')['timestamp'] + 1800
-
-    burn_liquidty_data = eth_abi.encode(
-        ['address', 'address', 'uint8'],
-        [from_token_address, account.address, withdraw_mode]
-    )
+    deadline = snapshot.timestamp + 1800
 
     txn_data = {
-        'nonce': zk_web3.zksync.get_transaction_count(account.address, EthBlockParams.LATEST.value),
+        'chainId': snapshot.chain_id,
+        'nonce': nonces.manager.acquire(network_name, account.address, snapshot.nonce),
         'from': account.address,
-        'maxPriorityFeePerGas': 100_000_000,
-        'maxFeePerGas': zk_web3.zksync.gas_price,
+        **fees.get_fees(zk_web3).txn_fields(),
         'value': 0,
         'gas': 0
     }
 
+    pending_approval = None
+
     if from_token_name in constants.ETH_TOKENS:
         txn_data['value'] = amount_in_wei
     else:
-        allowance = from_token_contract.contract.functions.allowance(
-            account.address,
-            swap_router_contract.address
-        ).call()
+        if known_allowance is None:
+            allowances.ledger.set(
+                network_name,
+                account.address,
+                from_token_address,
+                swap_router_contract.address,
+                snapshot.allowance
+            )
+            allowance = snapshot.allowance
+        else:
+            allowance = known_allowance
 
         if allowance < amount_in_wei:
-            approve_amount_in_wei = amount_in_wei * 10
-            approve_amount = amount * 10
+            approve_amount_in_wei = allowances.approve_amount(amount_in_wei)
+            approve_amount = approve_amount_in_wei / 10 ** from_token_decimals
             logging.info(f'[SyncSwap] Approving {approve_amount} {from_token_name}')
             approve_txn = from_token_contract.contract.functions.approve(
                 swap_router_contract.address,
@@ -226,29 +860,48 @@ def swap(
             try:
                 approve_txn['gas'] = zk_web3.zksync.eth_estimate_gas(approve_txn)
             except Exception as e:
+                nonces.manager.release(network_name, account.address, approve_txn['nonce'])
                 if 'insufficient balance' in str(e):
                     logging.critical(f'[SyncSwap] Insufficient balance to approve {from_token_name}')
                     return enums.TransactionStatus.INSUFFICIENT_BALANCE
                 logging.error(f'[SyncSwap] Error while estimating gas: {e}')
                 return enums.TransactionStatus.FAILED
-            signed_approve = account.sign_transaction(approve_txn)
-            approve_tx_hash = zk_web3.eth.send_raw_transaction(
-                signed_approve.rawTransaction
+            signed_approve = signing.sign_transaction(account, approve_txn)
+            approve_tx_hash = nonces.send_raw_transaction(
+                zk_web3,
+                network_name,
+                account.address,
+                approve_txn['nonce'],
+                'approve',
+                signed_approve
             )
             logging.info(f'[SyncSwap] Approve Transaction: {network.txn_explorer_url}{approve_tx_hash.hex()}')
-            approve_receipt = utils.wait_for_transaction_receipt(
-                web3=zk_web3.zksync,
-                txn_hash=approve_tx_hash,
-                logging_prefix='SyncSwap'
-            )
-
-            if approve_receipt and approve_receipt['status'] == 1:
-                logging.info(f'[SyncSwap] Successfully approved {approve_amount} {from_token_name}')
+            if pipeline_approval:
+                pending_approval = approve_txn['nonce'], approve_tx_hash
             else:
-                logging.error(f'[SyncSwap] Failed to approve {approve_amount} {from_token_name}')
-                return enums.TransactionStatus.FAILED
-            txn_data['nonce'] += 1
-            utils.random_sleep()
+                approve_receipt = receipts.wait_for_transaction_receipt(
+                    zk_web3=zk_web3,
+                    txn_hash=approve_tx_hash,
+                    logging_prefix='SyncSwap'
+                )
+                nonces.manager.confirm(network_name, account.address, approve_txn['nonce'], mined=approve_receipt is not None)
+
+                if approve_receipt and approve_receipt['status'] == 1:
+                    allowances.ledger.record_approval(
+                        network_name,
+                        account.address,
+                        from_token_address,
+                        swap_router_contract.address,
+                        approve_amount_in_wei,
+                        approve_receipt
+                    )
+                    logging.info(f'[SyncSwap] Successfully approved {approve_amount} {from_token_name}')
+                else:
+                    logging.error(f'[SyncSwap] Failed to approve {approve_amount} {from_token_name}')
+                    return enums.TransactionStatus.FAILED
+            txn_data['nonce'] = nonces.manager.acquire(network_name, account.address)
+            if not pipeline_approval:
+                utils.random_sleep()
 
     txn = swap_router_contract.functions.swap(
         paths,
@@ -256,26 +909,108 @@ def swap(
         deadline
     ).build_transaction(txn_data)
 
-    try:
-        txn['gas'] = zk_web3.zksync.eth_estimate_gas(txn)
-    except Exception as e:
-        if 'insufficient balance' in str(e):
-            logging.critical(f'[SyncSwap] Insufficient balance to swap {from_token_name} to {to_token_name}')
-            return enums.TransactionStatus.INSUFFICIENT_BALANCE
-        logging.error(f'[SyncSwap] Error while estimating gas: {e}')
-        return enums.TransactionStatus.FAILED
+    if pending_approval is not None:
+        txn['gas'] = PIPELINED_GAS_LIMIT
+    else:
+        try:
+            txn['gas'] = zk_web3.zksync.eth_estimate_gas(txn)
+        except Exception as e:
+            nonces.manager.release(network_name, account.address, txn['nonce'])
+            if (
+                not is_from_eth
+                and known_allowance is not None
+                and known_allowance >= amount_in_wei
+                and allowances.ledger.stale(
+                    zk_web3,
+                    network_name,
+                    account.address,
+                    from_token_address,
+                    swap_router_contract.address,
+                    amount_in_wei
+                )
+            ):
+                logging.warning(f'[SyncSwap] Cached {from_token_name} allowance was stale, retrying')
+                status = allowances.retry_once(
+                    swap,
+                    private_key,
+                    network_name,
+                    from_token_name,
+                    to_token_name,
+                    slippage,
+                    amount=None if percentage else amount,
+                    percentage=percentage,
+                    proxy=proxy,
+                    pipeline_approval=pipeline_approval,
+                    max_hops=max_hops,
+                    max_splits=max_splits
+                )
+                if status is not None:
+                    return status
+            elif not is_from_eth:
+                allowances.ledger.forget(
+                    network_name,
+                    account.address,
+                    from_token_address,
+                    swap_router_contract.address
+                )
+            if 'insufficient balance' in str(e):
+                logging.critical(f'[SyncSwap] Insufficient balance to swap {from_token_name} to {to_token_name}')
+                return enums.TransactionStatus.INSUFFICIENT_BALANCE
+            logging.error(f'[SyncSwap] Error while estimating gas: {e}')
+            return enums.TransactionStatus.FAILED
 
-    signed_txn = account.sign_transaction(txn)
+    signed_txn = signing.sign_transaction(account, txn)
 
-    txn_hash = zk_web3.eth.send_raw_transaction(signed_txn.rawTransaction)
+    txn_hash = nonces.send_raw_transaction(
+        zk_web3,
+        network_name,
+        account.address,
+        txn['nonce'],
+        'swap',
+        signed_txn
+    )
 
     logging.info(f'[SyncSwap] Transaction: {network.txn_explorer_url}{txn_hash.hex()}')
 
-    receipt = utils.wait_for_transaction_receipt(
-        web3=zk_web3.zksync,
+    if pending_approval is not None:
+        receipts.get_watcher(zk_web3).watch(txn_hash)
+        approve_nonce, approve_tx_hash = pending_approval
+        approve_receipt = receipts.wait_for_transaction_receipt(
+            zk_web3=zk_web3,
+            txn_hash=approve_tx_hash,
+            logging_prefix='SyncSwap'
+        )
+        nonces.manager.confirm(network_name, account.address, approve_nonce, mined=approve_receipt is not None)
+
+        if approve_receipt and approve_receipt['status'] == 1:
+            allowances.ledger.record_approval(
+                network_name,
+                account.address,
+                from_token_address,
+                swap_router_contract.address,
+                approve_amount_in_wei,
+                approve_receipt
+            )
+            logging.info(f'[SyncSwap] Successfully approved {approve_amount} {from_token_name}')
+        else:
+            logging.error(f'[SyncSwap] Failed to approve {approve_amount} {from_token_name}')
+
+    receipt = receipts.wait_for_transaction_receipt(
+        zk_web3=zk_web3,
         txn_hash=txn_hash,
         logging_prefix='SyncSwap'
     )
+    nonces.manager.confirm(network_name, account.address, txn['nonce'], mined=receipt is not None)
+
+    if not is_from_eth and receipt and receipt['status'] == 1:
+        allowances.ledger.record_spend(
+            network_name,
+            account.address,
+            from_token_address,
+            swap_router_contract.address,
+            amount_in_wei,
+            receipt
+        )
 
     if receipt and receipt['status'] == 1:
         logging.info(f'[SyncSwap] Successfully swapped {amount} {from_token_name} to {to_token_name}')
@@ -284,6 +1019,7 @@ def swap(
         logging.error(f'[SyncSwap] Failed to swap {amount} {from_token_name} to {to_token_name}')
         return enums.TransactionStatus.FAILED
 
+@journal.journaled('syncswap.add_liquidity', final_stages=('add_liquidity',), logging_prefix='SyncSwap')
 def add_liquidity(
     private_key: str,
     network_name: enums.NetworkNames,
@@ -292,7 +1028,8 @@ def add_liquidity(
     *,
     amount: float = None,
     percentage: float = None,
-    proxy: dict[str, str] = None
+    proxy: dict[str, str] = None,
+    pipeline_approval: bool = False
 ):
     if not any([amount, percentage]):
         raise ValueError('Either amount or percentage must be specified')
@@ -300,34 +1037,28 @@ def add_liquidity(
         raise ValueError('Only one of amount or percentage must be specified')
 
     network = constants.NETWORKS[network_name]
-    zk_web3 = ZkSyncBuilder.build(network.rpc_url, proxy=proxy)
+    zk_web3 = clients.get_client(network.rpc_url, proxy)
     account: LocalAccount = Account.from_key(private_key)
 
-    with open(Path(__file__).parent / 'abi' / 'SyncSwapRouter.json') as file:
-        swap_router_abi = file.read()
-
-    swap_router_contract = zk_web3.eth.contract(
-        address=CONTRACT_ADRESSES[ContractTypes.SWAP][network_name],
-        abi=swap_router_abi
+    swap_router_contract = contract_registry.get_contract(
+        zk_web3,
+        network_name,
+        CONTRACT_ADRESSES[ContractTypes.SWAP][network_name],
+        'SyncSwapRouter'
     )
 
-    weth_address = swap_router_contract.functions.wETH().call()
+    weth_address, weth_decimals = get_weth(zk_web3, network_name, swap_router_contract)
     weth_contract = ERC20Contract(zk_web3.zksync, weth_address, account)
-    weth_decimals = weth_contract.contract.functions.decimals().call()
 
     if first_token_name in constants.ETH_TOKENS:
         first_token_address = weth_address
         first_token_contract = weth_contract
         first_token_decimals = weth_decimals
-        balance_in_wei = zk_web3.zksync.get_balance(account.address)
     else:
         first_token = constants.NETWORK_TOKENS[network_name, first_token_name]
         first_token_address = first_token.contract_address
         first_token_contract = ERC20Contract(zk_web3.zksync, first_token_address, account)
         first_token_decimals = first_token.decimals
-        balance_in_wei = first_token_contract.contract.functions.balanceOf(
-            account.address
-        ).call()
 
     if second_token_name in constants.ETH_TOKENS:
         second_token_address = weth_address
@@ -335,6 +1066,31 @@ def add_liquidity(
         second_token = constants.NETWORK_TOKENS[network_name, second_token_name]
         second_token_address = second_token.contract_address
 
+    pool_contract = get_pool_contract(
+        zk_web3,
+        network_name,
+        account,
+        first_token_address,
+        second_token_address
+    )
+
+    is_first_eth = first_token_name in constants.ETH_TOKENS
+
+    known_allowance = None if is_first_eth else allowances.ledger.get(
+        network_name,
+        account.address,
+        first_token_address,
+        swap_router_contract.address
+    )
+
+    snapshot = get_pre_trade_snapshot(
+        zk_web3,
+        account.address,
+        token_address=None if is_first_eth else first_token_address,
+        spender=None if is_first_eth or known_allowance is not None else swap_router_contract.address
+    )
+
+    balance_in_wei = snapshot.balance
 
     if amount is None:
         if percentage == 100:
@@ -347,105 +1103,197 @@ def add_liquidity(
 
     logging.info(f'[SyncSwap] Adding {amount} {first_token_name} to {first_token_name}/{second_token_name} liquidity pool')
 
-    pool_contract = get_pool_contract(
-        zk_web3,
-        network_name,
-        account,
+    contract_data = build_add_liquidity_data(
+        pool_contract.address,
         first_token_address,
-        second_token_address
+        second_token_address,
+        account.address,
+        amount_in_wei,
+        first_token_name in constants.ETH_TOKENS
     )
 
-    contract_data = {
-        'pool': pool_contract.address,
-        'inputs': [
-            {
-                'token': ZERO_ADDRESS if first_token_name in constants.ETH_TOKENS else first_token_address,
-                'amount': amount_in_wei
-            },
-            {
-                'token': second_token_address,
-                'amount': 0
-            }
-        ],
-        'data': eth_abi.encode(['address'], [account.address]),
-        'minLiquidity': 0,
-        'callback': ZERO_ADDRESS,
-        'callbackData': b''
-    }
-
     txn_data = {
-        'nonce': zk_web3.zksync.get_transaction_count(account.address, EthBlockParams.LATEST.value),
+        'chainId': snapshot.chain_id,
+        'nonce': nonces.manager.acquire(network_name, account.address, snapshot.nonce),
         'from': account.address,
-        'maxPriorityFeePerGas': 100_000_000,
-        'maxFeePerGas': zk_web3.zksync.gas_price,
+        **fees.get_fees(zk_web3).txn_fields(),
         'gas': 0,
         'value': 0
     }
 
+    pending_approval = None
+
     if first_token_name in constants.ETH_TOKENS:
         txn_data['value'] = amount_in_wei
     else:
-        allowance = first_token_contract.contract.functions.allowance(
-            account.address,
-            swap_router_contract.address
-        ).call()
+        if known_allowance is None:
+            allowances.ledger.set(
+                network_name,
+                account.address,
+                first_token_address,
+                swap_router_contract.address,
+                snapshot.allowance
+            )
+            allowance = snapshot.allowance
+        else:
+            allowance = known_allowance
 
         if allowance < amount_in_wei:
-            logging.info(f'[SyncSwap] Approving {amount} {first_token_name}')
-            approve_amount = amount_in_wei * 10
+            approve_amount = allowances.approve_amount(amount_in_wei)
+            logging.info(f'[SyncSwap] Approving {approve_amount / 10 ** first_token_decimals} {first_token_name}')
             approve_txn = first_token_contract.contract.functions.approve(
                 swap_router_contract.address,
-                amount_in_wei * 10
+                approve_amount
             ).build_transaction(txn_data)
             try:
                 approve_txn['gas'] = zk_web3.zksync.eth_estimate_gas(approve_txn)
             except Exception as e:
+                nonces.manager.release(network_name, account.address, approve_txn['nonce'])
                 if 'insufficient balance' in str(e):
                     logging.critical(f'[SyncSwap] Insufficient balance to approve {first_token_name}')
                     return enums.TransactionStatus.INSUFFICIENT_BALANCE
                 logging.error(f'[SyncSwap] Error while estimating gas: {e}')
                 return enums.TransactionStatus.FAILED
-            signed_approve = account.sign_transaction(approve_txn)
-            approve_tx_hash = zk_web3.eth.send_raw_transaction(signed_approve.rawTransaction)
-            logging.info(f'[SyncSwap] Approve Transaction: {network.txn_explorer_url}{approve_tx_hash.hex()}')
-            approve_receipt = utils.wait_for_transaction_receipt(
-                web3=zk_web3.zksync,
-                txn_hash=approve_tx_hash,
-                logging_prefix='SyncSwap'
+            signed_approve = signing.sign_transaction(account, approve_txn)
+            approve_tx_hash = nonces.send_raw_transaction(
+                zk_web3,
+                network_name,
+                account.address,
+                approve_txn['nonce'],
+                'approve',
+                signed_approve
             )
-
-            if approve_receipt and approve_receipt['status'] == 1:
-                logging.info(f'[SyncSwap] Successfully approved {approve_amount / 10 ** first_token_decimals} {first_token_name}')
+            logging.info(f'[SyncSwap] Approve Transaction: {network.txn_explorer_url}{approve_tx_hash.hex()}')
+            if pipeline_approval:
+                pending_approval = approve_txn['nonce'], approve_tx_hash
             else:
-                logging.error(f'[SyncSwap] Failed to approve {approve_amount / 10 ** first_token_decimals} {first_token_name}')
-                return enums.TransactionStatus.FAILED
-            txn_data['nonce'] += 1
-            utils.random_sleep()
+                approve_receipt = receipts.wait_for_transaction_receipt(
+                    zk_web3=zk_web3,
+                    txn_hash=approve_tx_hash,
+                    logging_prefix='SyncSwap'
+                )
+                nonces.manager.confirm(network_name, account.address, approve_txn['nonce'], mined=approve_receipt is not None)
+
+                if approve_receipt and approve_receipt['status'] == 1:
+                    allowances.ledger.record_approval(
+                        network_name,
+                        account.address,
+                        first_token_address,
+                        swap_router_contract.address,
+                        approve_amount,
+                        approve_receipt
+                    )
+                    logging.info(f'[SyncSwap] Successfully approved {approve_amount / 10 ** first_token_decimals} {first_token_name}')
+                else:
+                    logging.error(f'[SyncSwap] Failed to approve {approve_amount / 10 ** first_token_decimals} {first_token_name}')
+                    return enums.TransactionStatus.FAILED
+            txn_data['nonce'] = nonces.manager.acquire(network_name, account.address)
+            if not pipeline_approval:
+                utils.random_sleep()
 
     txn = swap_router_contract.functions.addLiquidity2(
         **contract_data
     ).build_transaction(txn_data)
 
-    try:
-        txn['gas'] = zk_web3.zksync.eth_estimate_gas(txn)
-    except Exception as e:
-        if 'insufficient balance' in str(e):
-            logging.critical(f'[SyncSwap] Insufficient balance to add liquidity')
-            return enums.TransactionStatus.INSUFFICIENT_BALANCE
-        logging.error(f'[SyncSwap] Error while estimating gas: {e}')
-        return enums.TransactionStatus.FAILED
+    if pending_approval is not None:
+        txn['gas'] = PIPELINED_GAS_LIMIT
+    else:
+        try:
+            txn['gas'] = zk_web3.zksync.eth_estimate_gas(txn)
+        except Exception as e:
+            nonces.manager.release(network_name, account.address, txn['nonce'])
+            if (
+                not is_first_eth
+                and known_allowance is not None
+                and known_allowance >= amount_in_wei
+                and allowances.ledger.stale(
+                    zk_web3,
+                    network_name,
+                    account.address,
+                    first_token_address,
+                    swap_router_contract.address,
+                    amount_in_wei
+                )
+            ):
+                logging.warning(f'[SyncSwap] Cached {first_token_name} allowance was stale, retrying')
+                status = allowances.retry_once(
+                    add_liquidity,
+                    private_key,
+                    network_name,
+                    first_token_name,
+                    second_token_name,
+                    amount=None if percentage else amount,
+                    percentage=percentage,
+                    proxy=proxy,
+                    pipeline_approval=pipeline_approval
+                )
+                if status is not None:
+                    return status
+            elif not is_first_eth:
+                allowances.ledger.forget(
+                    network_name,
+                    account.address,
+                    first_token_address,
+                    swap_router_contract.address
+                )
+            if 'insufficient balance' in str(e):
+                logging.critical('[SyncSwap] Insufficient balance to add liquidity')
+                return enums.TransactionStatus.INSUFFICIENT_BALANCE
+            logging.error(f'[SyncSwap] Error while estimating gas: {e}')
+            return enums.TransactionStatus.FAILED
 
-    signed_txn = account.sign_transaction(txn)
+    signed_txn = signing.sign_transaction(account, txn)
 
-    txn_hash = zk_web3.eth.send_raw_transaction(signed_txn.rawTransaction)
+    txn_hash = nonces.send_raw_transaction(
+        zk_web3,
+        network_name,
+        account.address,
+        txn['nonce'],
+        'add_liquidity',
+        signed_txn
+    )
 
     logging.info(f'[SyncSwap] Transaction: {network.txn_explorer_url}{txn_hash.hex()}')
 
-    receipt = utils.wait_for_transaction_receipt(
-        web3=zk_web3.zksync,
+    if pending_approval is not None:
+        receipts.get_watcher(zk_web3).watch(txn_hash)
+        approve_nonce, approve_tx_hash = pending_approval
+        approve_receipt = receipts.wait_for_transaction_receipt(
+            zk_web3=zk_web3,
+            txn_hash=approve_tx_hash,
+            logging_prefix='SyncSwap'
+        )
+        nonces.manager.confirm(network_name, account.address, approve_nonce, mined=approve_receipt is not None)
+
+        if approve_receipt and approve_receipt['status'] == 1:
+            allowances.ledger.record_approval(
+                network_name,
+                account.address,
+                first_token_address,
+                swap_router_contract.address,
+                approve_amount,
+                approve_receipt
+            )
+            logging.info(f'[SyncSwap] Successfully approved {approve_amount / 10 ** first_token_decimals} {first_token_name}')
+        else:
+            logging.error(f'[SyncSwap] Failed to approve {approve_amount / 10 ** first_token_decimals} {first_token_name}')
+
+    receipt = receipts.wait_for_transaction_receipt(
+        zk_web3=zk_web3,
         txn_hash=txn_hash,
         logging_prefix='SyncSwap'
     )
+    nonces.manager.confirm(network_name, account.address, txn['nonce'], mined=receipt is not None)
+
+    if not is_first_eth and receipt and receipt['status'] == 1:
+        allowances.ledger.record_spend(
+            network_name,
+            account.address,
+            first_token_address,
+            swap_router_contract.address,
+            amount_in_wei,
+            receipt
+        )
 
     if receipt and receipt['status'] == 1:
         logging.info(f'[SyncSwap] Successfully added {amount} {first_token_name} to {first_token_name}/{second_token_name} liquidity pool')
@@ -455,6 +1303,7 @@ def add_liquidity(
         return enums.TransactionStatus.FAILED
 
 
+@journal.journaled('syncswap.burn_liquidity', final_stages=('burn',), logging_prefix='SyncSwap')
 def burn_liquidity(
     private_key: str,
     network_name: enums.NetworkNames,
@@ -462,33 +1311,27 @@ def burn_liquidity(
     second_token_name: enums.TokenNames,
     *,
     percentage: float = 100,
-    proxy: dict[str, str] = None
+    proxy: dict[str, str] = None,
+    pipeline_approval: bool = False
 ):
     network = constants.NETWORKS[network_name]
-    zk_web3 = ZkSyncBuilder.build(network.rpc_url, proxy=proxy)
+    zk_web3 = clients.get_client(network.rpc_url, proxy)
     account: LocalAccount = Account.from_key(private_key)
 
-    with open(Path(__file__).parent / 'abi' / 'SyncSwapRouter.json') as file:
-        swap_router_abi = file.read()
-
-    swap_router_contract = zk_web3.eth.contract(
-        address=CONTRACT_ADRESSES[ContractTypes.SWAP][network_name],
-        abi=swap_router_abi
+    swap_router_contract = contract_registry.get_contract(
+        zk_web3,
+        network_name,
+        CONTRACT_ADRESSES[ContractTypes.SWAP][network_name],
+        'SyncSwapRouter'
     )
 
-    weth_address = swap_router_contract.functions.wETH().call()
-    weth_contract = ERC20Contract(zk_web3.zksync, weth_address, account)
-    weth_decimals = weth_contract.contract.functions.decimals().call()
+    weth_address, _ = get_weth(zk_web3, network_name, swap_router_contract)
 
     if first_token_name in constants.ETH_TOKENS:
         first_token_address = weth_address
-        first_token_contract = weth_contract
-        first_token_decimals = weth_decimals
     else:
         first_token = constants.NETWORK_TOKENS[network_name, first_token_name]
         first_token_address = first_token.contract_address
-        first_token_contract = ERC20Contract(zk_web3.zksync, first_token_address, account)
-        first_token_decimals = first_token.decimals
 
     if second_token_name in constants.ETH_TOKENS:
         second_token_address = weth_address
@@ -506,36 +1349,59 @@ def burn_liquidity(
         second_token_address
     )
 
-    balance_in_wei = int(pool_contract.functions.balanceOf(
-        account.address
-    ).call())
+    known_allowance = allowances.ledger.get(
+        network_name,
+        account.address,
+        pool_contract.address,
+        swap_router_contract.address
+    )
+
+    snapshot = get_pre_trade_snapshot(
+        zk_web3,
+        account.address,
+        token_address=pool_contract.address,
+        spender=None if known_allowance is not None else swap_router_contract.address,
+        with_decimals=True
+    )
+
+    balance_in_wei = snapshot.balance
 
     if percentage == 100:
         amount_in_wei = balance_in_wei
     else:
         amount_in_wei = int(balance_in_wei * percentage / 100)
 
-    amount = amount_in_wei / 10 ** pool_contract.functions.decimals().call()
-
-    withdraw_mode = 1
+    amount = amount_in_wei / 10 ** snapshot.decimals
 
-    burn_liquidty_data = eth_abi.encode(
-        ['address', 'address', 'uint8'],
-        [first_token_address, account.address, withdraw_mode]
-    )
+    burn_liquidty_data = build_burn_data(first_token_address, account.address)
 
     txn_data = {
-        'nonce': zk_web3.zksync.get_transaction_count(account.address, EthBlockParams.LATEST.value),
+        'chainId': snapshot.chain_id,
+        'nonce': nonces.manager.acquire(network_name, account.address, snapshot.nonce),
         'from': account.address,
-        'maxPriorityFeePerGas': 100_000_000,
-        'maxFeePerGas': zk_web3.zksync.gas_price,
+        **fees.get_fees(zk_web3).txn_fields(),
         'value': 0,
         'gas': 0
     }
 
-    if pool_contract.functions.allowance(account.address, swap_router_contract.address).call() < amount_in_wei:
-        approve_amount_in_wei = amount_in_wei * 10
-        logging.info(f'[SyncSwap] Approving {amount * 10} pool tokens to SyncSwapRouter contract')
+    pending_approval = None
+
+    if known_allowance is None:
+        allowances.ledger.set(
+            network_name,
+            account.address,
+            pool_contract.address,
+            swap_router_contract.address,
+            snapshot.allowance
+        )
+        allowance = snapshot.allowance
+    else:
+        allowance = known_allowance
+
+    if allowance < amount_in_wei:
+        approve_amount_in_wei = allowances.approve_amount(amount_in_wei)
+        approve_amount = approve_amount_in_wei / 10 ** snapshot.decimals
+        logging.info(f'[SyncSwap] Approving {approve_amount} pool tokens to SyncSwapRouter contract')
 
         approve_txn = pool_contract.functions.approve(
             swap_router_contract.address,
@@ -545,33 +1411,53 @@ def burn_liquidity(
         try:
             approve_txn['gas'] = zk_web3.zksync.eth_estimate_gas(approve_txn)
         except Exception as e:
+            nonces.manager.release(network_name, account.address, approve_txn['nonce'])
             if 'insufficient balance' in str(e):
-                logging.critical(f'[SyncSwap] Insufficient balance to approve {amount * 10} liquidity tokens')
+                logging.critical(f'[SyncSwap] Insufficient balance to approve {approve_amount} liquidity tokens')
                 return enums.TransactionStatus.INSUFFICIENT_BALANCE
             logging.error(f'[SyncSwap] Error while estimating gas: {e}')
             return enums.TransactionStatus.FAILED
 
-        approve_signed = account.sign_transaction(approve_txn)
+        approve_signed = signing.sign_transaction(account, approve_txn)
 
-        approve_tx_hash = zk_web3.eth.send_raw_transaction(approve_signed.rawTransaction)
-
-        logging.info(f'[SyncSwap] Approve transaction: {network.txn_explorer_url}{approve_tx_hash.hex()}')
-
-        approve_receipt = utils.wait_for_transaction_receipt(
-            web3=zk_web3.zksync,
-            txn_hash=approve_tx_hash,
-            logging_prefix='SyncSwap'
+        approve_tx_hash = nonces.send_raw_transaction(
+            zk_web3,
+            network_name,
+            account.address,
+            approve_txn['nonce'],
+            'approve',
+            approve_signed
         )
+        logging.info(f'[SyncSwap] Approve transaction: {network.txn_explorer_url}{approve_tx_hash.hex()}')
 
-        if approve_receipt and approve_receipt['status'] == 1:
-            logging.info(f'[SyncSwap] Successfully approved {amount * 10} liquidity tokens')
+        if pipeline_approval:
+            pending_approval = approve_txn['nonce'], approve_tx_hash
         else:
-            logging.error(f'[SyncSwap] Failed to approve {amount * 10} liquidity tokens')
-            return enums.TransactionStatus.FAILED
+            approve_receipt = receipts.wait_for_transaction_receipt(
+                zk_web3=zk_web3,
+                txn_hash=approve_tx_hash,
+                logging_prefix='SyncSwap'
+            )
+            nonces.manager.confirm(network_name, account.address, approve_txn['nonce'], mined=approve_receipt is not None)
 
-        txn_data['nonce'] += 1
+            if approve_receipt and approve_receipt['status'] == 1:
+                allowances.ledger.record_approval(
+                    network_name,
+                    account.address,
+                    pool_contract.address,
+                    swap_router_contract.address,
+                    approve_amount_in_wei,
+                    approve_receipt
+                )
+                logging.info(f'[SyncSwap] Successfully approved {approve_amount} liquidity tokens')
+            else:
+                logging.error(f'[SyncSwap] Failed to approve {approve_amount} liquidity tokens')
+                return enums.TransactionStatus.FAILED
 
-        utils.random_sleep()
+        txn_data['nonce'] = nonces.manager.acquire(network_name, account.address)
+
+        if not pipeline_approval:
+            utils.random_sleep()
 
     txn = swap_router_contract.functions.burnLiquiditySingle(
         pool_contract.address,
@@ -582,30 +1468,378 @@ def burn_liquidity(
         b''
     ).build_transaction(txn_data)
 
-    try:
-        txn['gas'] = zk_web3.zksync.eth_estimate_gas(txn)
-    except Exception as e:
-        if 'insufficient balance' in str(e):
-            logging.critical(f'[SyncSwap] Insufficient balance to remove {amount} liquidity tokens')
-            return enums.TransactionStatus.INSUFFICIENT_BALANCE
-        logging.error(f'[SyncSwap] Error while estimating gas: {e}')
-        return enums.TransactionStatus.FAILED
+    if pending_approval is not None:
+        txn['gas'] = PIPELINED_GAS_LIMIT
+    else:
+        try:
+            txn['gas'] = zk_web3.zksync.eth_estimate_gas(txn)
+        except Exception as e:
+            nonces.manager.release(network_name, account.address, txn['nonce'])
+            if (
+                known_allowance is not None
+                and known_allowance >= amount_in_wei
+                and allowances.ledger.stale(
+                    zk_web3,
+                    network_name,
+                    account.address,
+                    pool_contract.address,
+                    swap_router_contract.address,
+                    amount_in_wei
+                )
+            ):
+                logging.warning(f'[SyncSwap] Cached {first_token_name}/{second_token_name} allowance was stale, retrying')
+                status = allowances.retry_once(
+                    burn_liquidity,
+                    private_key,
+                    network_name,
+                    first_token_name,
+                    second_token_name,
+                    percentage=percentage,
+                    proxy=proxy,
+                    pipeline_approval=pipeline_approval
+                )
+                if status is not None:
+                    return status
+            else:
+                allowances.ledger.forget(
+                    network_name,
+                    account.address,
+                    pool_contract.address,
+                    swap_router_contract.address
+                )
+            if 'insufficient balance' in str(e):
+                logging.critical(f'[SyncSwap] Insufficient balance to remove {amount} liquidity tokens')
+                return enums.TransactionStatus.INSUFFICIENT_BALANCE
+            logging.error(f'[SyncSwap] Error while estimating gas: {e}')
+            return enums.TransactionStatus.FAILED
 
-    signed = account.sign_transaction(txn)
+    signed = signing.sign_transaction(account, txn)
 
-    tx_hash = zk_web3.eth.send_raw_transaction(signed.rawTransaction)
+    tx_hash = nonces.send_raw_transaction(
+        zk_web3,
+        network_name,
+        account.address,
+        txn['nonce'],
+        'burn',
+        signed
+    )
 
     logging.info(f'[SyncSwap] Transaction: {network.txn_explorer_url}{tx_hash.hex()}')
 
-    receipt = utils.wait_for_transaction_receipt(
-        web3=zk_web3.zksync,
+    if pending_approval is not None:
+        receipts.get_watcher(zk_web3).watch(tx_hash)
+        approve_nonce, approve_tx_hash = pending_approval
+        approve_receipt = receipts.wait_for_transaction_receipt(
+            zk_web3=zk_web3,
+            txn_hash=approve_tx_hash,
+            logging_prefix='SyncSwap'
+        )
+        nonces.manager.confirm(network_name, account.address, approve_nonce, mined=approve_receipt is not None)
+
+        if approve_receipt and approve_receipt['status'] == 1:
+            allowances.ledger.record_approval(
+                network_name,
+                account.address,
+                pool_contract.address,
+                swap_router_contract.address,
+                approve_amount_in_wei,
+                approve_receipt
+            )
+            logging.info(f'[SyncSwap] Successfully approved {approve_amount} liquidity tokens')
+        else:
+            logging.error(f'[SyncSwap] Failed to approve {approve_amount} liquidity tokens')
+
+    receipt = receipts.wait_for_transaction_receipt(
+        zk_web3=zk_web3,
         txn_hash=tx_hash,
         logging_prefix='SyncSwap'
     )
+    nonces.manager.confirm(network_name, account.address, txn['nonce'], mined=receipt is not None)
 
     if receipt and receipt['status'] == 1:
+        allowances.ledger.record_spend(
+            network_name,
+            account.address,
+            pool_contract.address,
+            swap_router_contract.address,
+            amount_in_wei,
+            receipt
+        )
         logging.info(f'[SyncSwap] Successfully removed {amount} liquidity tokens')
         return enums.TransactionStatus.SUCCESS
     else:
         logging.error(f'[SyncSwap] Failed to remove {amount} liquidity tokens')
         return enums.TransactionStatus.FAILED
+
+
+def encode_router_multicall(calls: list[bytes]):
+    return Web3.to_hex(
+        contract_registry.selector(ROUTER_MULTICALL_SIGNATURE)
+        + eth_abi.encode(['bytes[]'], [calls])
+    )
+
+
+@journal.journaled('syncswap.burn_liquidity_batch', logging_prefix='SyncSwap')
+def burn_liquidity_batch(
+    private_key: str,
+    network_name: enums.NetworkNames,
+    positions: list[tuple[enums.TokenNames, enums.TokenNames, float]],
+    *,
+    proxy: dict[str, str] = None
+):
+    network = constants.NETWORKS[network_name]
+    zk_web3 = clients.get_client(network.rpc_url, proxy)
+    account: LocalAccount = Account.from_key(private_key)
+
+    swap_router_contract = contract_registry.get_contract(
+        zk_web3,
+        network_name,
+        CONTRACT_ADRESSES[ContractTypes.SWAP][network_name],
+        'SyncSwapRouter'
+    )
+
+    weth_address, _ = get_weth(zk_web3, network_name, swap_router_contract)
+
+    already_burned = {pool_address for burn in journal.completed('burn') for pool_address in burn['pools']}
+
+    pools = []
+    for first_token_name, second_token_name, percentage in positions:
+        first_token_address, second_token_address = (
+            weth_address if token_name in constants.ETH_TOKENS
+            else constants.NETWORK_TOKENS[network_name, token_name].contract_address
+            for token_name in (first_token_name, second_token_name)
+        )
+        pool_address = get_pool_address(zk_web3, network_name, first_token_address, second_token_address)
+        if pool_address == ZERO_ADDRESS:
+            logging.warning(f'[SyncSwap] {first_token_name}/{second_token_name} pool does not exist')
+            continue
+        if pool_address in already_burned:
+            logging.info(f'[SyncSwap] {first_token_name}/{second_token_name} liquidity was removed before the restart, skipping it')
+            continue
+        pools.append((f'{first_token_name}/{second_token_name}', pool_address, first_token_address, percentage))
+
+    if not pools:
+        if already_burned:
+            return enums.TransactionStatus.SUCCESS
+        return enums.TransactionStatus.FAILED
+
+    extra_calls = {}
+    for index, (_, pool_address, _, _) in enumerate(pools):
+        extra_calls[f'balance_{index}'] = multicall.Call(pool_address, 'balanceOf(address)', (account.address,))
+        extra_calls[f'decimals_{index}'] = multicall.Call(pool_address, 'decimals()', output_types=('uint8',))
+        if allowances.ledger.get(network_name, account.address, pool_address, swap_router_contract.address) is None:
+            extra_calls[f'allowance_{index}'] = multicall.Call(
+                pool_address,
+                'allowance(address,address)',
+                (account.address, swap_router_contract.address)
+            )
+
+    snapshot = get_pre_trade_snapshot(zk_web3, account.address, extra_calls=extra_calls)
+
+    txn_data = {
+        'chainId': snapshot.chain_id,
+        'from': account.address,
+        **fees.get_fees(zk_web3).txn_fields(),
+        'value': 0,
+        'gas': 0
+    }
+
+    burns = []
+    approvals = []
+
+    for index, (pair_name, pool_address, first_token_address, percentage) in enumerate(pools):
+        balance_in_wei = snapshot.values[f'balance_{index}']
+
+        if percentage == 100:
+            amount_in_wei = balance_in_wei
+        else:
+            amount_in_wei = int(balance_in_wei * percentage / 100)
+
+        if amount_in_wei == 0:
+            logging.warning(f'[SyncSwap] No liquidity to remove from {pair_name} pool')
+            continue
+
+        amount = amount_in_wei / 10 ** snapshot.values[f'decimals_{index}']
+        burns.append((pair_name, pool_address, first_token_address, amount_in_wei, amount))
+
+        if f'allowance_{index}' in snapshot.values:
+            allowance = snapshot.values[f'allowance_{index}']
+            allowances.ledger.set(network_name, account.address, pool_address, swap_router_contract.address, allowance)
+        else:
+            allowance = allowances.ledger.get(network_name, account.address, pool_address, swap_router_contract.address)
+
+        if allowance < amount_in_wei:
+            approvals.append((pair_name, pool_address, allowances.approve_amount(amount_in_wei)))
+
+    if not burns:
+        return enums.TransactionStatus.FAILED
+
+    logging.info(f'[SyncSwap] Removing liquidity from {len(burns)} pools')
+
+    approve_txns = []
+
+    for pair_name, pool_address, approve_amount_in_wei in approvals:
+        approve_txn = {
+            **txn_data,
+            'nonce': nonces.manager.acquire(network_name, account.address, snapshot.nonce),
+            'to': pool_address,
+            'data': Web3.to_hex(
+                contract_registry.selector('approve(address,uint256)')
+                + eth_abi.encode(['address', 'uint256'], [swap_router_contract.address, approve_amount_in_wei])
+            )
+        }
+        approve_txns.append((pair_name, pool_address, approve_amount_in_wei, approve_txn))
+        try:
+            approve_txn['gas'] = zk_web3.zksync.eth_estimate_gas(approve_txn)
+        except Exception as e:
+            nonces.manager.release_all(network_name, account.address, [txn['nonce'] for *_, txn in approve_txns])
+            logging.error(f'[SyncSwap] Error while estimating gas to approve {pair_name} liquidity tokens: {e}')
+            return enums.TransactionStatus.FAILED
+
+    pending_approvals = []
+    approvals_failed = False
+
+    for position, (pair_name, pool_address, approve_amount_in_wei, approve_txn) in enumerate(approve_txns):
+        signed_approve = signing.sign_transaction(account, approve_txn)
+        try:
+            approve_tx_hash = nonces.send_raw_transaction(
+                zk_web3,
+                network_name,
+                account.address,
+                approve_txn['nonce'],
+                'approve',
+                signed_approve
+            )
+        except Exception as e:
+            logging.error(f'[SyncSwap] Failed to send approval of {pair_name} liquidity tokens: {e}')
+            nonces.manager.release_all(
+                network_name,
+                account.address,
+                [unsent['nonce'] for *_, unsent in approve_txns[position + 1:]]
+            )
+            approvals_failed = True
+            break
+        logging.info(f'[SyncSwap] Approve transaction: {network.txn_explorer_url}{approve_tx_hash.hex()}')
+        pending_approvals.append((pair_name, pool_address, approve_amount_in_wei, approve_txn['nonce'], approve_tx_hash))
+
+    approve_receipts = receipts.get_watcher(zk_web3).wait_all(
+        [approve_tx_hash for *_, approve_tx_hash in pending_approvals]
+    )
+
+    for (pair_name, pool_address, approve_amount_in_wei, approve_nonce, _), approve_receipt in zip(
+        pending_approvals,
+        approve_receipts
+    ):
+        nonces.manager.confirm(network_name, account.address, approve_nonce, mined=approve_receipt is not None)
+        if not approve_receipt or approve_receipt['status'] != 1:
+            logging.error(f'[SyncSwap] Failed to approve {pair_name} liquidity tokens')
+            approvals_failed = True
+            continue
+        allowances.ledger.record_approval(
+            network_name,
+            account.address,
+            pool_address,
+            swap_router_contract.address,
+            approve_amount_in_wei,
+            approve_receipt
+        )
+
+    if approvals_failed:
+        return enums.TransactionStatus.FAILED
+
+    if pending_approvals:
+        utils.random_sleep()
+
+    calls = [
+        bytes.fromhex(swap_router_contract.encodeABI(
+            fn_name='burnLiquiditySingle',
+            args=[
+                pool_address,
+                amount_in_wei,
+                build_burn_data(first_token_address, account.address),
+                0,
+                ZERO_ADDRESS,
+                b''
+            ]
+        )[2:])
+        for _, pool_address, first_token_address, amount_in_wei, _ in burns
+    ]
+
+    batches = [list(range(len(burns)))]
+    estimated = []
+
+    while batches:
+        batch = batches.pop()
+        txn = {
+            **txn_data,
+            'nonce': nonces.manager.acquire(network_name, account.address, None if pending_approvals else snapshot.nonce),
+            'to': swap_router_contract.address,
+            'data': encode_router_multicall([calls[index] for index in batch])
+        }
+        try:
+            txn['gas'] = zk_web3.zksync.eth_estimate_gas(txn)
+        except Exception as e:
+            nonces.manager.release(network_name, account.address, txn['nonce'])
+            if len(batch) > 1:
+                middle = len(batch) // 2
+                batches.extend([batch[middle:], batch[:middle]])
+                continue
+            pair_name = burns[batch[0]][0]
+            logging.error(f'[SyncSwap] Error while estimating gas to remove {pair_name} liquidity: {e}')
+            continue
+        estimated.append((batch, txn))
+
+    if not estimated:
+        return enums.TransactionStatus.FAILED
+
+    pending = []
+    for position, (batch, txn) in enumerate(estimated):
+        signed_txn = signing.sign_transaction(account, txn)
+        try:
+            txn_hash = nonces.send_raw_transaction(
+                zk_web3,
+                network_name,
+                account.address,
+                txn['nonce'],
+                'burn',
+                signed_txn,
+                pools=[burns[index][1] for index in batch]
+            )
+        except Exception as e:
+            logging.error(f'[SyncSwap] Failed to send a batch of {len(batch)} burns: {e}')
+            nonces.manager.release_all(
+                network_name,
+                account.address,
+                [unsent['nonce'] for _, unsent in estimated[position + 1:]]
+            )
+            break
+        logging.info(f'[SyncSwap] Transaction: {network.txn_explorer_url}{txn_hash.hex()}')
+        pending.append((batch, txn, txn_hash))
+
+    if not pending:
+        return enums.TransactionStatus.FAILED
+
+    batch_receipts = receipts.get_watcher(zk_web3).wait_all([txn_hash for *_, txn_hash in pending])
+
+    removed = 0
+    for (batch, txn, _), receipt in zip(pending, batch_receipts):
+        nonces.manager.confirm(network_name, account.address, txn['nonce'], mined=receipt is not None)
+        for index in batch:
+            pair_name, pool_address, _, amount_in_wei, amount = burns[index]
+            if receipt and receipt['status'] == 1:
+                allowances.ledger.record_spend(
+                    network_name,
+                    account.address,
+                    pool_address,
+                    swap_router_contract.address,
+                    amount_in_wei,
+                    receipt
+                )
+                logging.info(f'[SyncSwap] Successfully removed {amount} {pair_name} liquidity tokens')
+                removed += 1
+            else:
+                logging.error(f'[SyncSwap] Failed to remove {amount} {pair_name} liquidity tokens')
+
+    if removed == len(burns):
+        return enums.TransactionStatus.SUCCESS
+    return enums.TransactionStatus.FAILED
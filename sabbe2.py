@@ -1,17 +1,25 @@
 import random
-import time
-from pathlib import Path
 
 from eth_account import Account
 from eth_account.signers.local import LocalAccount
 
+import allowances
+import clients
 import constants
+import contract_registry
 import enums
+import fees
+import izumi_math
+import izumi_pools
+import izumi_positions
+import journal
+import nonces
+import receipts
+import signing
 import utils
 from logger import logging
 from zksync2.core.types import EthBlockParams
 
-from zksync2.module.module_builder import ZkSyncBuilder
 from zksync2.manage_contracts.erc20_contract import ERC20Contract
 
 ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
@@ -31,7 +39,12 @@ CONTRACT_ADRESSES = {
     }
 }
 
+PIPELINED_GAS_LIMIT = 5_000_000
 
+BURN_GAS_BUDGET = 20_000_000
+
+
+@journal.journaled('izumi.swap', final_stages=('swap',), logging_prefix='iZUMi')
 def swap(
     private_key: str,
     network_name: enums.NetworkNames,
@@ -50,21 +63,20 @@ def swap(
 
     network = constants.NETWORKS[network_name]
 
-    zk_web3 = ZkSyncBuilder.build(network.rpc_url, proxy=proxy)
+    zk_web3 = clients.get_client(network.rpc_url, proxy)
 
     account: LocalAccount = Account.from_key(private_key)
 
-    with open(Path(__file__).parent / 'abi' / 'liquidityManager.json') as file:
-        liquidity_manager_abi = file.read()
-
-    liquidity_manager_contract = zk_web3.eth.contract(
-        address=CONTRACT_ADRESSES[ContractTypes.LIQUIDITY_MANAGER][network_name],
-        abi=liquidity_manager_abi
+    liquidity_manager_contract = contract_registry.get_contract(
+        zk_web3,
+        network_name,
+        CONTRACT_ADRESSES[ContractTypes.LIQUIDITY_MANAGER][network_name],
+        'liquidityManager'
     )
 
-    weth_address = liquidity_manager_contract.functions.WETH9().call()
+    weth_address = izumi_pools.cache.weth(zk_web3, network_name, liquidity_manager_contract.address)
     weth_contract = ERC20Contract(zk_web3.zksync, weth_address, account)
-    weth_decimals = weth_contract.contract.functions.decimals().call()
+    weth_decimals = izumi_pools.cache.decimals(zk_web3, network_name, weth_address)
 
     if from_token_name in constants.ETH_TOKENS:
         from_token_address = weth_address
@@ -101,60 +113,87 @@ def swap(
 
     logging.info(f'[iZUMi] Swapping {amount} {from_token_name} to {to_token_name}')
 
-    fee = 0.2
-    fee = int(fee * 10000)
-
-    pool_address = liquidity_manager_contract.functions.pool(
-        from_token_address, to_token_address, fee
-    ).call()
-
-    with open(Path(__file__).parent / 'abi' / 'pool.json') as file:
-        pool_abi = file.read()
-
-    pool_contract = zk_web3.eth.contract(
-        address=pool_address,
-        abi=pool_abi
-    )
-
     try:
-        state = pool_contract.functions.state().call()
+        pool_infos = izumi_pools.cache.pools(
+            zk_web3,
+            network_name,
+            liquidity_manager_contract.address,
+            from_token_address,
+            to_token_address
+        )
+        if not pool_infos:
+            logging.error(f'[iZUMi] {from_token_name}/{to_token_name} pool does not exist')
+            return enums.TransactionStatus.FAILED
+        snapshots = izumi_math.get_snapshots(zk_web3, pool_infos)
     except Exception as e:
         logging.error(f'[iZUMi] Error getting pool state: {e}')
         return enums.TransactionStatus.FAILED
 
-    with open(Path(__file__).parent / 'abi' / 'swap.json') as file:
-        swap_abi = file.read()
+    snapshot, quote = izumi_math.best_quote(snapshots, amount_in_wei, from_token_address)
+
+    if snapshot is None:
+        logging.error(f'[iZUMi] Insufficient liquidity in {from_token_name}/{to_token_name} pools')
+        return enums.TransactionStatus.INSUFFICIENT_LIQUIDITY
 
-    swap_contract = zk_web3.eth.contract(
-        address=CONTRACT_ADRESSES[ContractTypes.SWAP][network_name],
-        abi=swap_abi
+    if not quote.filled:
+        try:
+            snapshot, quote = izumi_math.fill_quote(
+                zk_web3,
+                snapshot,
+                amount_in_wei,
+                from_token_address.lower() == snapshot.token_x.lower()
+            )
+        except Exception as e:
+            logging.error(f'[iZUMi] Error loading more pool liquidity: {e}')
+            return enums.TransactionStatus.FAILED
+
+    if not quote.filled:
+        logging.error(
+            f'[iZUMi] Only {quote.amount_in / 10 ** from_token_decimals} {from_token_name} '
+            f'can be swapped in {from_token_name}/{to_token_name} pools'
+        )
+        return enums.TransactionStatus.INSUFFICIENT_LIQUIDITY
+
+    fee = snapshot.fee
+
+    logging.info(f'[iZUMi] Routing through {fee / 10000}% pool out of {len(snapshots)} fee tiers')
+
+    swap_contract = contract_registry.get_contract(
+        zk_web3,
+        network_name,
+        CONTRACT_ADRESSES[ContractTypes.SWAP][network_name],
+        'swap'
     )
 
     token_x = from_token_address
     token_y = to_token_address
 
     txn_dict = {
-        'nonce': zk_web3.zksync.get_transaction_count(account.address, EthBlockParams.LATEST.value),
-        'maxPriorityFeePerGas': 100_000_000,
-        'maxFeePerGas': zk_web3.zksync.gas_price,
+        'nonce': nonces.manager.acquire(
+            network_name,
+            account.address,
+            zk_web3.zksync.get_transaction_count(account.address, EthBlockParams.LATEST.value)
+        ),
+        **fees.get_fees(zk_web3).txn_fields(),
         'gas': 0,
         'from': account.address
     }
 
-    price_undecimal = 1.0001 ** state[1]
+    is_x_to_y = from_token_address.lower() < to_token_address.lower()
 
-    if from_token_address.lower() < to_token_address.lower():
+    if is_x_to_y:
         boundary_pt = -799999
         func = swap_contract.functions.swapX2Y
     else:
         boundary_pt = 799999
         token_x, token_y = token_y, token_x
         func = swap_contract.functions.swapY2X
-        price_undecimal = 1 / price_undecimal
 
-    price = price_undecimal  * 10 ** from_token_decimals / 10 ** to_token_decimals
+    logging.info(f'[iZUMi] Quoted {quote.amount_out / 10 ** to_token_decimals} {to_token_name} at block {snapshot.block_number}')
 
-    min_amount_out = int(amount * price * 10 ** to_token_decimals * (1 - slippage / 100))
+    min_amount_out = int(quote.amount_out * (1 - slippage / 100))
+
+    journal.record('swap', journal.QUOTED, amount_in=amount_in_wei, amount_out=quote.amount_out, amount_out_min=min_amount_out)
 
     swap_calling = func(list({
         'tokenX': token_x,
@@ -174,13 +213,26 @@ def swap(
         callings.append(swap_contract.functions.refundETH())
         txn_dict['value'] = amount_in_wei
     else:
-        allowance = from_token_contract.contract.functions.allowance(
-            account.address, swap_contract.address
-        ).call()
+        known_allowance = allowances.ledger.get(
+            network_name,
+            account.address,
+            from_token_address,
+            swap_contract.address
+        )
+
+        allowance = known_allowance
+        if allowance is None:
+            allowance = allowances.ledger.fetch(
+                zk_web3,
+                network_name,
+                account.address,
+                from_token_address,
+                swap_contract.address
+            )
 
         if allowance < amount_in_wei:
-            approve_amount_in_wei = amount_in_wei * 10
-            approve_amount = amount * 10
+            approve_amount_in_wei = allowances.approve_amount(amount_in_wei)
+            approve_amount = approve_amount_in_wei / 10 ** from_token_decimals
             logging.info(f'[iZUMi] Approving {approve_amount} {from_token_name}')
             approve_txn = from_token_contract.contract.functions.approve(
                 swap_contract.address,
@@ -189,34 +241,43 @@ def swap(
             try:
                 approve_txn['gas'] = zk_web3.zksync.eth_estimate_gas(approve_txn)
             except Exception as e:
+                nonces.manager.release(network_name, account.address, approve_txn['nonce'])
                 if 'insufficient balance' in str(e):
                     logging.critical(f'[iZUMi] Insufficient balance to approve {from_token_name}')
                     return enums.TransactionStatus.INSUFFICIENT_BALANCE
                 logging.error(f'[iZUMi] Error while estimating gas: {e}')
                 return enums.TransactionStatus.FAILED
-            signed_approve = account.sign_transaction(approve_txn)
-            approve_tx_hash = zk_web3.eth.send_raw_transaction(signed_approve.rawTransaction)
+            signed_approve = signing.sign_transaction(account, approve_txn)
+            approve_tx_hash = nonces.send_raw_transaction(
+                zk_web3,
+                network_name,
+                account.address,
+                approve_txn['nonce'],
+                'approve',
+                signed_approve
+            )
             logging.info(f'[iZUMi] Approve Transaction: {network.txn_explorer_url}{approve_tx_hash.hex()}')
-            approve_receipt = utils.wait_for_transaction_receipt(
-                web3=zk_web3.zksync,
+            approve_receipt = receipts.wait_for_transaction_receipt(
+                zk_web3=zk_web3,
                 txn_hash=approve_tx_hash,
                 logging_prefix='iZUMi'
             )
+            nonces.manager.confirm(network_name, account.address, approve_txn['nonce'], mined=approve_receipt is not None)
 
-            if approve_receipt and approve_receipt['status'] == 1:
+            if approve_receipt and approve_receipt['status'] == 1 and allowances.ledger.confirm_approval(
+                zk_web3,
+                network_name,
+                account.address,
+                from_token_address,
+                swap_contract.address,
+                amount_in_wei,
+                approve_receipt
+            ):
                 logging.info(f'[iZUMi] Successfully approved {approve_amount} {from_token_name}')
             else:
                 logging.error(f'[iZUMi] Failed to approve {approve_amount} {from_token_name}')
                 return enums.TransactionStatus.FAILED
-            txn_dict['nonce'] += 1
-
-            while True:
-                allowance = from_token_contract.contract.functions.allowance(
-                    account.address, swap_contract.address
-                ).call()
-                if allowance >= amount_in_wei:
-                    break
-                time.sleep(5)
+            txn_dict['nonce'] = nonces.manager.acquire(network_name, account.address)
 
             utils.random_sleep()
 
@@ -239,25 +300,80 @@ def swap(
     try:
         txn['gas'] = zk_web3.zksync.eth_estimate_gas(txn)
     except Exception as e:
+        nonces.manager.release(network_name, account.address, txn['nonce'])
+        if (
+            from_token_name not in constants.ETH_TOKENS
+            and known_allowance is not None
+            and known_allowance >= amount_in_wei
+            and allowances.ledger.stale(
+                zk_web3,
+                network_name,
+                account.address,
+                from_token_address,
+                swap_contract.address,
+                amount_in_wei
+            )
+        ):
+            logging.warning(f'[iZUMi] Cached {from_token_name} allowance was stale, retrying')
+            status = allowances.retry_once(
+                swap,
+                private_key,
+                network_name,
+                from_token_name,
+                to_token_name,
+                slippage,
+                amount=None if percentage else amount,
+                percentage=percentage,
+                proxy=proxy
+            )
+            if status is not None:
+                return status
+        elif from_token_name not in constants.ETH_TOKENS:
+            allowances.ledger.forget(
+                network_name,
+                account.address,
+                from_token_address,
+                swap_contract.address
+            )
         if 'insufficient balance' in str(e):
             logging.critical(f'[iZUMi] Insufficient balance to swap {from_token_name} to {to_token_name}')
             return enums.TransactionStatus.INSUFFICIENT_BALANCE
         logging.error(f'[iZUMi] Error while estimating gas: {e}')
         return enums.TransactionStatus.FAILED
 
-    signed_txn = zk_web3.eth.account.sign_transaction(txn, private_key=private_key)
+    signed_txn = signing.sign_transaction(account, txn)
 
-    txn_hash = zk_web3.eth.send_raw_transaction(signed_txn.rawTransaction)
+    txn_hash = nonces.send_raw_transaction(
+        zk_web3,
+        network_name,
+        account.address,
+        txn['nonce'],
+        'swap',
+        signed_txn,
+        amount_in=amount_in_wei
+    )
 
     logging.info(f'[iZUMi] Transaction: {network.txn_explorer_url}{txn_hash.hex()}')
 
-    receipt = utils.wait_for_transaction_receipt(
-        web3=zk_web3.zksync,
+    receipt = receipts.wait_for_transaction_receipt(
+        zk_web3=zk_web3,
         txn_hash=txn_hash,
         logging_prefix='iZUMi'
     )
 
+    nonces.manager.confirm(network_name, account.address, txn['nonce'], mined=receipt is not None)
+
     if receipt and receipt['status'] == 1:
+        if from_token_name not in constants.ETH_TOKENS:
+            allowances.ledger.record_spend(
+                network_name,
+                account.address,
+                from_token_address,
+                swap_contract.address,
+                amount_in_wei,
+                receipt
+            )
+        izumi_pools.cache.invalidate(snapshot.address)
         logging.info(f'[iZUMi] Successfully swapped {amount} {from_token_name} to {to_token_name}')
         return enums.TransactionStatus.SUCCESS
     else:
@@ -265,6 +381,37 @@ def swap(
         return enums.TransactionStatus.FAILED
 
 
+def choose_point_range(
+    current_point: int,
+    point_delta: int,
+    left_most_point: int,
+    right_most_point: int
+) -> tuple[int, int]:
+    point1 = int(current_point * random.uniform(0.5, 0.75))
+    point2 = int(current_point * random.uniform(1.5, 2))
+
+    left_point = min(point1, point2)
+    right_point = max(point1, point2)
+
+    mod = left_point % point_delta
+    if mod < point_delta / 2:
+        left_point = left_point - mod
+    else:
+        left_point = left_point + point_delta - mod
+
+    mod = right_point % point_delta
+    if mod < point_delta / 2:
+        right_point = right_point - mod
+    else:
+        right_point = right_point + point_delta - mod
+
+    left_point = max(left_point, left_most_point)
+    right_point = min(right_point, right_most_point)
+
+    return left_point, right_point
+
+
+@journal.journaled('izumi.add_liquidity', final_stages=('swap', 'mint'), logging_prefix='iZUMi')
 def add_liquidity(
     private_key: str,
     network_name: enums.NetworkNames,
@@ -273,6 +420,7 @@ def add_liquidity(
     *,
     amount: float = None,
     percentage: float = None,
+    zap: bool = False,
     proxy: dict[str, str] = None
 ):
     if not any([amount, percentage]):
@@ -280,23 +428,33 @@ def add_liquidity(
     elif all([amount, percentage]):
         raise ValueError('Only one of amount or percentage must be specified')
 
+    if zap:
+        return zap_liquidity(
+            private_key=private_key,
+            network_name=network_name,
+            first_token_name=first_token_name,
+            second_token_name=second_token_name,
+            amount=amount,
+            percentage=percentage,
+            proxy=proxy
+        )
+
     network = constants.NETWORKS[network_name]
 
-    zk_web3 = ZkSyncBuilder.build(network.rpc_url, proxy=proxy)
+    zk_web3 = clients.get_client(network.rpc_url, proxy)
 
     account: LocalAccount = Account.from_key(private_key)
 
-    with open(Path(__file__).parent / 'abi' / 'liquidityManager.json') as file:
-        liquidity_manager_abi = file.read()
-
-    liquidity_manager_contract = zk_web3.eth.contract(
-        address=CONTRACT_ADRESSES[ContractTypes.LIQUIDITY_MANAGER][network_name],
-        abi=liquidity_manager_abi
+    liquidity_manager_contract = contract_registry.get_contract(
+        zk_web3,
+        network_name,
+        CONTRACT_ADRESSES[ContractTypes.LIQUIDITY_MANAGER][network_name],
+        'liquidityManager'
     )
 
-    weth_address = liquidity_manager_contract.functions.WETH9().call()
+    weth_address = izumi_pools.cache.weth(zk_web3, network_name, liquidity_manager_contract.address)
     weth_contract = ERC20Contract(zk_web3.zksync, weth_address, account)
-    weth_decimals = weth_contract.contract.functions.decimals().call()
+    weth_decimals = izumi_pools.cache.decimals(zk_web3, network_name, weth_address)
 
     if first_token_name in constants.ETH_TOKENS:
         first_token_address = weth_address
@@ -332,21 +490,29 @@ def add_liquidity(
         max_first_amount_in_wei = int(amount * 10 ** first_token_decimals)
 
     logging.info(f'[iZUMi] Adding {amount} {first_token_name} to {first_token_name}/{second_token_name} liquidity pool')
-    logging.info(f'[iZUMi] Swapping {amount / 2} {first_token_name} to {second_token_name} to add liquidity')
-
-    swap_result = swap(
-        private_key=private_key,
-        network_name=network_name,
-        from_token_name=first_token_name,
-        to_token_name=second_token_name,
-        slippage=0.5,
-        amount=amount / 2
-    )
 
-    if swap_result != enums.TransactionStatus.SUCCESS:
-        return swap_result
+    swapped = journal.completed('swap')
+
+    if swapped:
+        max_first_amount_in_wei = swapped[-1]['amount_in'] * 2
+        logging.info(f'[iZUMi] Swap to {second_token_name} was mined before the restart, skipping it')
+    else:
+        logging.info(f'[iZUMi] Swapping {amount / 2} {first_token_name} to {second_token_name} to add liquidity')
+
+        swap_result = swap(
+            private_key=private_key,
+            network_name=network_name,
+            from_token_name=first_token_name,
+            to_token_name=second_token_name,
+            slippage=0.5,
+            amount=amount / 2,
+            proxy=proxy
+        )
+
+        if swap_result != enums.TransactionStatus.SUCCESS:
+            return swap_result
 
-    utils.random_sleep()
+        utils.random_sleep()
 
     if first_token_name in constants.ETH_TOKENS:
         first_balance_in_wei = zk_web3.zksync.get_balance(account.address)
@@ -370,60 +536,33 @@ def add_liquidity(
 
     logging.info(f'[iZUMi] Adding {max_first_amount} {first_token_name} and {max_second_amount} {second_token_name} to liquidity pool')
 
-    fee = 0.2
-    fee = int(fee * 10000)
-
-    pool_address = liquidity_manager_contract.functions.pool(
-        first_token_address, second_token_address, fee
-    ).call()
-
-    pool_id = liquidity_manager_contract.functions.poolIds(
-        pool_address
-    ).call()
-
-    liquidities = liquidity_manager_contract.functions.liquidities(
-        pool_id
-    ).call()
-
-    with open(Path(__file__).parent / 'abi' / 'pool.json') as file:
-        pool_abi = file.read()
-
-    pool_contract = zk_web3.eth.contract(
-        address=pool_address,
-        abi=pool_abi
-    )
-
     try:
-        state = pool_contract.functions.state().call()
+        pool_infos = izumi_pools.cache.pools(
+            zk_web3,
+            network_name,
+            liquidity_manager_contract.address,
+            first_token_address,
+            second_token_address
+        )
+        if not pool_infos:
+            logging.error(f'[iZUMi] {first_token_name}/{second_token_name} pool does not exist')
+            return enums.TransactionStatus.FAILED
+        pool_info, state = izumi_math.deepest_pool(
+            pool_infos,
+            izumi_pools.cache.states(zk_web3, [pool_info.address for pool_info in pool_infos])
+        )
     except Exception as e:
         logging.error(f'[iZUMi] Error getting pool state: {e}')
         return enums.TransactionStatus.FAILED
 
-    point1 = int(state[1] * random.uniform(0.5, 0.75))
-    point2 = int(state[1] * random.uniform(1.5, 2))
-
-    left_point = min(point1, point2)
-    right_point = max(point1, point2)
-
-    point_delta = pool_contract.functions.pointDelta().call()
+    fee = pool_info.fee
 
-    mod = left_point % point_delta
-    if mod < point_delta / 2:
-        left_point = left_point - mod
-    else:
-        left_point = left_point + point_delta - mod
-
-    mod = right_point % point_delta
-    if mod < point_delta / 2:
-        right_point = right_point - mod
-    else:
-        right_point = right_point + point_delta - mod
-
-    left_most_point = pool_contract.functions.leftMostPt().call()
-    right_most_point = pool_contract.functions.rightMostPt().call()
-
-    left_point = max(left_point, left_most_point)
-    right_point = min(right_point, right_most_point)
+    left_point, right_point = choose_point_range(
+        state.current_point,
+        pool_info.point_delta,
+        pool_info.left_most_point,
+        pool_info.right_most_point
+    )
 
     if first_token_address.lower() < second_token_address.lower():
         token_x = first_token_address
@@ -433,9 +572,12 @@ def add_liquidity(
         token_y = first_token_address
 
     txn_data = {
-        'nonce': zk_web3.zksync.get_transaction_count(account.address, EthBlockParams.LATEST.value),
-        'maxPriorityFeePerGas': 100_000_000,
-        'maxFeePerGas': zk_web3.zksync.gas_price,
+        'nonce': nonces.manager.acquire(
+            network_name,
+            account.address,
+            zk_web3.zksync.get_transaction_count(account.address, EthBlockParams.LATEST.value)
+        ),
+        **fees.get_fees(zk_web3).txn_fields(),
         'gas': 0,
         'from': account.address
     }
@@ -448,14 +590,25 @@ def add_liquidity(
         if token_name in constants.ETH_TOKENS:
             continue
 
-        allowance = token_contract.contract.functions.allowance(
+        allowance = allowances.ledger.get(
+            network_name,
             account.address,
+            token_contract.contract.address,
             liquidity_manager_contract.address
-        ).call()
+        )
+
+        if allowance is None:
+            allowance = allowances.ledger.fetch(
+                zk_web3,
+                network_name,
+                account.address,
+                token_contract.contract.address,
+                liquidity_manager_contract.address
+            )
 
         if allowance < amount_in_wei:
-            approve_amount_in_wei = amount_in_wei * 10
-            approve_amount = approve_amount_in_wei / 10 ** token_contract.contract.functions.decimals().call()
+            approve_amount_in_wei = allowances.approve_amount(amount_in_wei)
+            approve_amount = approve_amount_in_wei / 10 ** izumi_pools.cache.decimals(zk_web3, network_name, token_contract.contract.address)
             logging.info(f'[iZUMi] Approving {approve_amount} {token_name} to liquidity manager contract')
             approve_txn = token_contract.contract.functions.approve(
                 liquidity_manager_contract.address,
@@ -465,34 +618,43 @@ def add_liquidity(
                 approve_txn['gas'] = zk_web3.zksync.eth_estimate_gas(
                     approve_txn)
             except Exception as e:
+                nonces.manager.release(network_name, account.address, approve_txn['nonce'])
                 if 'insufficient balance' in str(e):
                     logging.critical(f'[iZUMi] Insufficient balance to approve {first_token_name}')
                     return enums.TransactionStatus.INSUFFICIENT_BALANCE
                 logging.error(f'[iZUMi] Error while estimating gas: {e}')
                 return enums.TransactionStatus.FAILED
-            signed_approve = account.sign_transaction(approve_txn)
-            approve_tx_hash = zk_web3.eth.send_raw_transaction(signed_approve.rawTransaction)
+            signed_approve = signing.sign_transaction(account, approve_txn)
+            approve_tx_hash = nonces.send_raw_transaction(
+                zk_web3,
+                network_name,
+                account.address,
+                approve_txn['nonce'],
+                'approve',
+                signed_approve
+            )
             logging.info(f'[iZUMi] Approve transaction: {network.txn_explorer_url}{approve_tx_hash.hex()}')
-            approve_receipt = utils.wait_for_transaction_receipt(
-                web3=zk_web3.zksync,
+            approve_receipt = receipts.wait_for_transaction_receipt(
+                zk_web3=zk_web3,
                 txn_hash=approve_tx_hash,
                 logging_prefix='iZUMi'
             )
+            nonces.manager.confirm(network_name, account.address, approve_txn['nonce'], mined=approve_receipt is not None)
 
-            if approve_receipt and approve_receipt['status'] == 1:
+            if approve_receipt and approve_receipt['status'] == 1 and allowances.ledger.confirm_approval(
+                zk_web3,
+                network_name,
+                account.address,
+                token_contract.contract.address,
+                liquidity_manager_contract.address,
+                amount_in_wei,
+                approve_receipt
+            ):
                 logging.info(f'[iZUMi] Successfully approved {approve_amount} liquidity tokens')
             else:
                 logging.error(f'[iZUMi] Failed to approve {approve_amount} liquidity tokens')
                 return enums.TransactionStatus.FAILED
-            txn_data['nonce'] += 1
-
-            while True:
-                allowance = token_contract.contract.functions.allowance(
-                    account.address, liquidity_manager_contract.address
-                ).call()
-                if allowance >= amount_in_wei:
-                    break
-                time.sleep(5)
+            txn_data['nonce'] = nonces.manager.acquire(network_name, account.address)
 
             utils.random_sleep()
 
@@ -533,25 +695,50 @@ def add_liquidity(
     try:
         txn['gas'] = zk_web3.zksync.eth_estimate_gas(txn)
     except Exception as e:
+        nonces.manager.release(network_name, account.address, txn['nonce'])
         if 'insufficient balance' in str(e):
             logging.critical(f'[iZUMi] Insufficient balance to add liquidity')
             return enums.TransactionStatus.INSUFFICIENT_BALANCE
         logging.error(f'[iZUMi] Error while estimating gas: {e}')
         return enums.TransactionStatus.FAILED
 
-    signed_txn = zk_web3.eth.account.sign_transaction(txn, private_key=private_key)
+    signed_txn = signing.sign_transaction(account, txn)
 
-    txn_hash = zk_web3.eth.send_raw_transaction(signed_txn.rawTransaction)
+    txn_hash = nonces.send_raw_transaction(
+        zk_web3,
+        network_name,
+        account.address,
+        txn['nonce'],
+        'mint',
+        signed_txn
+    )
 
     logging.info(f'[iZUMi] Transaction: {network.txn_explorer_url}{txn_hash.hex()}')
 
-    receipt = utils.wait_for_transaction_receipt(
-        web3=zk_web3.zksync,
+    receipt = receipts.wait_for_transaction_receipt(
+        zk_web3=zk_web3,
         txn_hash=txn_hash,
         logging_prefix='iZUMi'
     )
 
+    nonces.manager.confirm(network_name, account.address, txn['nonce'], mined=receipt is not None)
+
     if receipt and receipt['status'] == 1:
+        for token_name, token_contract, amount_in_wei in zip(
+            [first_token_name, second_token_name],
+            [first_token_contract, second_token_contract],
+            [max_first_amount_in_wei, max_second_amount_in_wei]
+        ):
+            if token_name not in constants.ETH_TOKENS:
+                allowances.ledger.record_spend(
+                    network_name,
+                    account.address,
+                    token_contract.contract.address,
+                    liquidity_manager_contract.address,
+                    amount_in_wei,
+                    receipt
+                )
+        izumi_pools.cache.invalidate(pool_info.address)
         logging.info(f'[iZUMi] Successfully added liquidity to {first_token_name}/{second_token_name} pool')
         return enums.TransactionStatus.SUCCESS
     else:
@@ -559,40 +746,60 @@ def add_liquidity(
         return enums.TransactionStatus.FAILED
 
 
-def remove_random_liquidity(
+@journal.journaled('izumi.zap_liquidity', final_stages=('swap', 'mint'), logging_prefix='iZUMi')
+def zap_liquidity(
     private_key: str,
     network_name: enums.NetworkNames,
     first_token_name: enums.TokenNames,
     second_token_name: enums.TokenNames,
+    slippage: float = 0.5,
+    *,
+    amount: float = None,
+    percentage: float = None,
     proxy: dict[str, str] = None
 ):
+    if not any([amount, percentage]):
+        raise ValueError('Either amount or percentage must be specified')
+    elif all([amount, percentage]):
+        raise ValueError('Only one of amount or percentage must be specified')
+
     network = constants.NETWORKS[network_name]
 
-    zk_web3 = ZkSyncBuilder.build(network.rpc_url, proxy=proxy)
+    zk_web3 = clients.get_client(network.rpc_url, proxy)
 
     account: LocalAccount = Account.from_key(private_key)
 
-    with open(Path(__file__).parent / 'abi' / 'liquidityManager.json') as file:
-        liquidity_manager_abi = file.read()
+    liquidity_manager_contract = contract_registry.get_contract(
+        zk_web3,
+        network_name,
+        CONTRACT_ADRESSES[ContractTypes.LIQUIDITY_MANAGER][network_name],
+        'liquidityManager'
+    )
 
-    liquidity_manager_contract = zk_web3.eth.contract(
-        address=CONTRACT_ADRESSES[ContractTypes.LIQUIDITY_MANAGER][network_name],
-        abi=liquidity_manager_abi
+    swap_contract = contract_registry.get_contract(
+        zk_web3,
+        network_name,
+        CONTRACT_ADRESSES[ContractTypes.SWAP][network_name],
+        'swap'
     )
 
-    weth_address = liquidity_manager_contract.functions.WETH9().call()
+    weth_address = izumi_pools.cache.weth(zk_web3, network_name, liquidity_manager_contract.address)
     weth_contract = ERC20Contract(zk_web3.zksync, weth_address, account)
-    weth_decimals = weth_contract.contract.functions.decimals().call()
+    weth_decimals = izumi_pools.cache.decimals(zk_web3, network_name, weth_address)
 
     if first_token_name in constants.ETH_TOKENS:
         first_token_address = weth_address
         first_token_contract = weth_contract
         first_token_decimals = weth_decimals
+        first_balance_in_wei = zk_web3.zksync.get_balance(account.address)
     else:
         first_token = constants.NETWORK_TOKENS[network_name, first_token_name]
         first_token_address = first_token.contract_address
         first_token_contract = ERC20Contract(zk_web3.zksync, first_token_address, account)
         first_token_decimals = first_token.decimals
+        first_balance_in_wei = first_token_contract.contract.functions.balanceOf(
+            account.address
+        ).call()
 
     if second_token_name in constants.ETH_TOKENS:
         second_token_address = weth_address
@@ -604,33 +811,441 @@ def remove_random_liquidity(
         second_token_contract = ERC20Contract(zk_web3.zksync, second_token_address, account)
         second_token_decimals = second_token.decimals
 
-    pool_address = liquidity_manager_contract.functions.pool(
-        first_token_address, second_token_address, 2000
-    ).call()
+    if amount is None:
+        if percentage == 100:
+            amount_in_wei = first_balance_in_wei
+        else:
+            amount_in_wei = int(first_balance_in_wei * percentage / 100)
+        amount = amount_in_wei / 10 ** first_token_decimals
+    else:
+        amount_in_wei = int(amount * 10 ** first_token_decimals)
+
+    try:
+        pool_infos = izumi_pools.cache.pools(
+            zk_web3,
+            network_name,
+            liquidity_manager_contract.address,
+            first_token_address,
+            second_token_address
+        )
+        if not pool_infos:
+            logging.error(f'[iZUMi] {first_token_name}/{second_token_name} pool does not exist')
+            return enums.TransactionStatus.FAILED
+        pool_info, _ = izumi_math.deepest_pool(
+            pool_infos,
+            izumi_pools.cache.states(zk_web3, [pool_info.address for pool_info in pool_infos])
+        )
+        snapshot = izumi_math.get_snapshot(zk_web3, pool_info)
+    except Exception as e:
+        logging.error(f'[iZUMi] Error getting pool state: {e}')
+        return enums.TransactionStatus.FAILED
+
+    fee = pool_info.fee
+
+    left_point, right_point = choose_point_range(
+        snapshot.current_point,
+        snapshot.point_delta,
+        snapshot.left_most_point,
+        snapshot.right_most_point
+    )
+
+    is_x_to_y = first_token_address.lower() < second_token_address.lower()
+
+    swapped = journal.completed('swap')
+
+    if swapped:
+        swap_amount_in_wei = 0
+        first_amount_in_wei = swapped[-1]['first_amount_in_wei']
+        second_amount_in_wei = swapped[-1]['second_amount_in_wei']
+        logging.info(
+            f'[iZUMi] Swap was mined before the restart, adding {first_amount_in_wei / 10 ** first_token_decimals} '
+            f'{first_token_name} and {second_amount_in_wei / 10 ** second_token_decimals} {second_token_name} '
+            f'to {first_token_name}/{second_token_name} pool'
+        )
+    else:
+        swap_amount_in_wei, quote = izumi_math.zap_swap_amount(
+            snapshot,
+            amount_in_wei,
+            is_x_to_y,
+            left_point,
+            right_point
+        )
+
+        first_amount_in_wei = amount_in_wei - swap_amount_in_wei
+        second_amount_in_wei = int(quote.amount_out * (1 - slippage / 100))
+
+        if swap_amount_in_wei > 0 and (second_amount_in_wei == 0 or not quote.filled):
+            logging.error('[iZUMi] Insufficient liquidity in the pool')
+            return enums.TransactionStatus.INSUFFICIENT_LIQUIDITY
+
+        logging.info(
+            f'[iZUMi] Zapping {amount} {first_token_name} into {first_token_name}/{second_token_name} pool: '
+            f'swapping {swap_amount_in_wei / 10 ** first_token_decimals} {first_token_name} '
+            f'for at least {second_amount_in_wei / 10 ** second_token_decimals} {second_token_name}'
+        )
+
+    deadline = zk_web3.zksync.get_block('latest')['timestamp'] + 1800
+
+    txn_data = {
+        'nonce': nonces.manager.acquire(
+            network_name,
+            account.address,
+            zk_web3.zksync.get_transaction_count(account.address, EthBlockParams.LATEST.value)
+        ),
+        **fees.get_fees(zk_web3).txn_fields(),
+        'gas': 0,
+        'from': account.address
+    }
+
+    approvals = []
+
+    if first_token_name not in constants.ETH_TOKENS:
+        approvals.append((first_token_name, first_token_contract, swap_contract.address, swap_amount_in_wei))
+        approvals.append((first_token_name, first_token_contract, liquidity_manager_contract.address, first_amount_in_wei))
+    if second_token_name not in constants.ETH_TOKENS:
+        approvals.append((second_token_name, second_token_contract, liquidity_manager_contract.address, second_amount_in_wei))
+
+    pending_approvals = []
+
+    for token_name, token_contract, spender, token_amount_in_wei in approvals:
+        if token_amount_in_wei == 0:
+            continue
+
+        allowance = allowances.ledger.get(network_name, account.address, token_contract.contract.address, spender)
+
+        if allowance is None:
+            allowance = allowances.ledger.fetch(
+                zk_web3,
+                network_name,
+                account.address,
+                token_contract.contract.address,
+                spender
+            )
+
+        if allowance >= token_amount_in_wei:
+            continue
+
+        approve_amount_in_wei = allowances.approve_amount(token_amount_in_wei)
+        logging.info(f'[iZUMi] Approving {token_name} to {spender}')
+        approve_txn = token_contract.contract.functions.approve(
+            spender,
+            approve_amount_in_wei
+        ).build_transaction(txn_data)
+        try:
+            approve_txn['gas'] = zk_web3.zksync.eth_estimate_gas(approve_txn)
+        except Exception as e:
+            nonces.manager.release(network_name, account.address, approve_txn['nonce'])
+            if 'insufficient balance' in str(e):
+                logging.critical(f'[iZUMi] Insufficient balance to approve {token_name}')
+                return enums.TransactionStatus.INSUFFICIENT_BALANCE
+            logging.error(f'[iZUMi] Error while estimating gas: {e}')
+            return enums.TransactionStatus.FAILED
+        signed_approve = signing.sign_transaction(account, approve_txn)
+        approve_tx_hash = nonces.send_raw_transaction(
+            zk_web3,
+            network_name,
+            account.address,
+            approve_txn['nonce'],
+            'approve',
+            signed_approve
+        )
+        receipts.get_watcher(zk_web3).watch(approve_tx_hash)
+        logging.info(f'[iZUMi] Approve transaction: {network.txn_explorer_url}{approve_tx_hash.hex()}')
+        pending_approvals.append((
+            approve_txn['nonce'],
+            approve_tx_hash,
+            token_name,
+            token_contract.contract.address,
+            spender,
+            approve_amount_in_wei
+        ))
+        txn_data['nonce'] = nonces.manager.acquire(network_name, account.address)
+
+    swap_txn = None
+
+    if swap_amount_in_wei > 0:
+        if is_x_to_y:
+            token_x, token_y = first_token_address, second_token_address
+            func = swap_contract.functions.swapX2Y
+            boundary_pt = -799999
+        else:
+            token_x, token_y = second_token_address, first_token_address
+            func = swap_contract.functions.swapY2X
+            boundary_pt = 799999
+
+        callings = [func(list({
+            'tokenX': token_x,
+            'tokenY': token_y,
+            'fee': fee,
+            'boundaryPt': boundary_pt,
+            'recipient': ZERO_ADDRESS if second_token_name in constants.ETH_TOKENS else account.address,
+            'amount': swap_amount_in_wei,
+            'maxPayed': 0,
+            'minAcquired': second_amount_in_wei,
+            'deadline': deadline
+        }.values()))]
+
+        swap_txn_data = dict(txn_data)
+
+        if first_token_name in constants.ETH_TOKENS:
+            callings.append(swap_contract.functions.refundETH())
+            swap_txn_data['value'] = swap_amount_in_wei
+        if second_token_name in constants.ETH_TOKENS:
+            callings.append(swap_contract.functions.unwrapWETH9(0, account.address))
+
+        if len(callings) == 1:
+            func = callings[0]
+        else:
+            func = swap_contract.functions.multicall([
+                swap_contract.encodeABI(fn_name=calling.fn_name, args=calling.args)
+                for calling in callings
+            ])
+
+        swap_txn = func.build_transaction(swap_txn_data)
+
+        if pending_approvals:
+            swap_txn['gas'] = PIPELINED_GAS_LIMIT
+        else:
+            try:
+                swap_txn['gas'] = zk_web3.zksync.eth_estimate_gas(swap_txn)
+            except Exception as e:
+                nonces.manager.release(network_name, account.address, swap_txn['nonce'])
+                if 'insufficient balance' in str(e):
+                    logging.critical(f'[iZUMi] Insufficient balance to swap {first_token_name} to {second_token_name}')
+                    return enums.TransactionStatus.INSUFFICIENT_BALANCE
+                logging.error(f'[iZUMi] Error while estimating gas: {e}')
+                return enums.TransactionStatus.FAILED
+
+        signed_swap = signing.sign_transaction(account, swap_txn)
+        swap_tx_hash = nonces.send_raw_transaction(
+            zk_web3,
+            network_name,
+            account.address,
+            swap_txn['nonce'],
+            'swap',
+            signed_swap,
+            first_amount_in_wei=first_amount_in_wei,
+            second_amount_in_wei=second_amount_in_wei
+        )
+        receipts.get_watcher(zk_web3).watch(swap_tx_hash)
+        logging.info(f'[iZUMi] Swap transaction: {network.txn_explorer_url}{swap_tx_hash.hex()}')
+        txn_data['nonce'] = nonces.manager.acquire(network_name, account.address)
 
-    pool_id = liquidity_manager_contract.functions.poolIds(
-        pool_address
-    ).call()
+    if is_x_to_y:
+        token_x, token_y = first_token_address, second_token_address
+        x_limit, y_limit = first_amount_in_wei, second_amount_in_wei
+    else:
+        token_x, token_y = second_token_address, first_token_address
+        x_limit, y_limit = second_amount_in_wei, first_amount_in_wei
 
-    total_liquidities = liquidity_manager_contract.functions.balanceOf(account.address).call()
+    mint_data = {
+        'miner': account.address,
+        'tokenX': token_x,
+        'tokenY': token_y,
+        'fee': fee,
+        'pl': left_point,
+        'pr': right_point,
+        'xLim': x_limit,
+        'yLim': y_limit,
+        'amountXMin': 0,
+        'amountYMin': 0,
+        'deadline': deadline
+    }
 
-    random_indexes = random.sample(range(total_liquidities), k=total_liquidities)
+    mint_calling = liquidity_manager_contract.functions.mint(list(mint_data.values()))
 
-    liquidities = []
+    if first_token_name in constants.ETH_TOKENS:
+        txn_data['value'] = first_amount_in_wei
+    elif second_token_name in constants.ETH_TOKENS:
+        txn_data['value'] = second_amount_in_wei
+
+    if txn_data.get('value'):
+        func = liquidity_manager_contract.functions.multicall([
+            liquidity_manager_contract.encodeABI(fn_name=calling.fn_name, args=calling.args)
+            for calling in [mint_calling, liquidity_manager_contract.functions.refundETH()]
+        ])
+    else:
+        func = mint_calling
+
+    txn = func.build_transaction(txn_data)
+
+    if pending_approvals or swap_txn is not None:
+        txn['gas'] = PIPELINED_GAS_LIMIT
+    else:
+        try:
+            txn['gas'] = zk_web3.zksync.eth_estimate_gas(txn)
+        except Exception as e:
+            nonces.manager.release(network_name, account.address, txn['nonce'])
+            if 'insufficient balance' in str(e):
+                logging.critical('[iZUMi] Insufficient balance to add liquidity')
+                return enums.TransactionStatus.INSUFFICIENT_BALANCE
+            logging.error(f'[iZUMi] Error while estimating gas: {e}')
+            return enums.TransactionStatus.FAILED
+
+    signed_txn = signing.sign_transaction(account, txn)
+
+    txn_hash = nonces.send_raw_transaction(
+        zk_web3,
+        network_name,
+        account.address,
+        txn['nonce'],
+        'mint',
+        signed_txn
+    )
+
+    logging.info(f'[iZUMi] Transaction: {network.txn_explorer_url}{txn_hash.hex()}')
+
+    for approve_nonce, approve_tx_hash, token_name, token_address, spender, approve_amount_in_wei in pending_approvals:
+        approve_receipt = receipts.wait_for_transaction_receipt(
+            zk_web3=zk_web3,
+            txn_hash=approve_tx_hash,
+            logging_prefix='iZUMi'
+        )
+        nonces.manager.confirm(network_name, account.address, approve_nonce, mined=approve_receipt is not None)
+
+        if approve_receipt and approve_receipt['status'] == 1:
+            allowances.ledger.record_approval(
+                network_name,
+                account.address,
+                token_address,
+                spender,
+                approve_amount_in_wei,
+                approve_receipt
+            )
+            logging.info(f'[iZUMi] Successfully approved {token_name}')
+        else:
+            logging.error(f'[iZUMi] Failed to approve {token_name}')
+
+    if swap_txn is not None:
+        swap_receipt = receipts.wait_for_transaction_receipt(
+            zk_web3=zk_web3,
+            txn_hash=swap_tx_hash,
+            logging_prefix='iZUMi'
+        )
+        nonces.manager.confirm(network_name, account.address, swap_txn['nonce'], mined=swap_receipt is not None)
+
+        if swap_receipt and swap_receipt['status'] == 1:
+            if first_token_name not in constants.ETH_TOKENS:
+                allowances.ledger.record_spend(
+                    network_name,
+                    account.address,
+                    first_token_address,
+                    swap_contract.address,
+                    swap_amount_in_wei,
+                    swap_receipt
+                )
+            izumi_pools.cache.invalidate(pool_info.address)
+            logging.info(f'[iZUMi] Successfully swapped {first_token_name} to {second_token_name}')
+        else:
+            logging.error(f'[iZUMi] Failed to swap {first_token_name} to {second_token_name}')
+
+    receipt = receipts.wait_for_transaction_receipt(
+        zk_web3=zk_web3,
+        txn_hash=txn_hash,
+        logging_prefix='iZUMi'
+    )
+    nonces.manager.confirm(network_name, account.address, txn['nonce'], mined=receipt is not None)
+
+    if receipt and receipt['status'] == 1:
+        for token_name, token_address, token_amount_in_wei in zip(
+            [first_token_name, second_token_name],
+            [first_token_address, second_token_address],
+            [first_amount_in_wei, second_amount_in_wei]
+        ):
+            if token_name not in constants.ETH_TOKENS:
+                allowances.ledger.record_spend(
+                    network_name,
+                    account.address,
+                    token_address,
+                    liquidity_manager_contract.address,
+                    token_amount_in_wei,
+                    receipt
+                )
+        izumi_pools.cache.invalidate(pool_info.address)
+        logging.info(f'[iZUMi] Successfully added liquidity to {first_token_name}/{second_token_name} pool')
+        return enums.TransactionStatus.SUCCESS
+    else:
+        logging.error(f'[iZUMi] Failed to add liquidity to {first_token_name}/{second_token_name} pool')
+        return enums.TransactionStatus.FAILED
+
+
+@journal.journaled('izumi.remove_liquidity', final_stages=('remove',), logging_prefix='iZUMi')
+def remove_random_liquidity(
+    private_key: str,
+    network_name: enums.NetworkNames,
+    first_token_name: enums.TokenNames,
+    second_token_name: enums.TokenNames,
+    proxy: dict[str, str] = None
+):
+    network = constants.NETWORKS[network_name]
+
+    zk_web3 = clients.get_client(network.rpc_url, proxy)
+
+    account: LocalAccount = Account.from_key(private_key)
+
+    liquidity_manager_contract = contract_registry.get_contract(
+        zk_web3,
+        network_name,
+        CONTRACT_ADRESSES[ContractTypes.LIQUIDITY_MANAGER][network_name],
+        'liquidityManager'
+    )
+
+    weth_address = izumi_pools.cache.weth(zk_web3, network_name, liquidity_manager_contract.address)
+    weth_contract = ERC20Contract(zk_web3.zksync, weth_address, account)
+    weth_decimals = izumi_pools.cache.decimals(zk_web3, network_name, weth_address)
+
+    if first_token_name in constants.ETH_TOKENS:
+        first_token_address = weth_address
+        first_token_contract = weth_contract
+        first_token_decimals = weth_decimals
+    else:
+        first_token = constants.NETWORK_TOKENS[network_name, first_token_name]
+        first_token_address = first_token.contract_address
+        first_token_contract = ERC20Contract(zk_web3.zksync, first_token_address, account)
+        first_token_decimals = first_token.decimals
+
+    if second_token_name in constants.ETH_TOKENS:
+        second_token_address = weth_address
+        second_token_contract = weth_contract
+        second_token_decimals = weth_decimals
+    else:
+        second_token = constants.NETWORK_TOKENS[network_name, second_token_name]
+        second_token_address = second_token.contract_address
+        second_token_contract = ERC20Contract(zk_web3.zksync, second_token_address, account)
+        second_token_decimals = second_token.decimals
+
+    pool_infos = {
+        pool_info.pool_id: pool_info
+        for pool_info in izumi_pools.cache.pools(
+            zk_web3,
+            network_name,
+            liquidity_manager_contract.address,
+            first_token_address,
+            second_token_address
+        )
+    }
+
+    if not pool_infos:
+        logging.error(f'[iZUMi] {first_token_name}/{second_token_name} pool does not exist')
+        return enums.TransactionStatus.FAILED
 
     logging.info(f'[iZUMi] Searching for liquidity in {first_token_name}/{second_token_name} pool')
 
-    for i in random_indexes:
-        token_id = liquidity_manager_contract.functions.tokenOfOwnerByIndex(account.address, i).call()
-        liquidity = liquidity_manager_contract.functions.liquidities(token_id).call()
-        if liquidity[-1] == pool_id and liquidity[2] > 0:
-            liquidities.append((token_id, liquidity))
-            break
+    izumi_positions.index.sync(zk_web3, network_name, account.address, liquidity_manager_contract.address)
+
+    position = izumi_positions.index.choice(
+        network_name,
+        account.address,
+        pool_ids=set(pool_infos),
+        live=True
+    )
 
-    for token_id, liquidity in liquidities:
+    if position is not None:
         logging.info(f'[iZUMi] Found liquidity in {first_token_name}/{second_token_name} pool, removing it')
 
-        liquidity_amount = liquidity[2]
+        token_id = position.token_id
+
+        liquidity_amount = position.liquidity
 
         is_chain_coin = bool({first_token_name, second_token_name}.intersection(constants.ETH_TOKENS))
 
@@ -668,9 +1283,12 @@ def remove_random_liquidity(
 
 
         txn = liquidity_manager_contract.functions.multicall(multicall).build_transaction({
-            'nonce': zk_web3.zksync.get_transaction_count(account.address, EthBlockParams.LATEST.value),
-            'maxPriorityFeePerGas': 100_000_000,
-            'maxFeePerGas': zk_web3.zksync.gas_price,
+            'nonce': nonces.manager.acquire(
+                network_name,
+                account.address,
+                zk_web3.zksync.get_transaction_count(account.address, EthBlockParams.LATEST.value)
+            ),
+            **fees.get_fees(zk_web3).txn_fields(),
             'gas': 0,
             'from': account.address
         })
@@ -678,25 +1296,44 @@ def remove_random_liquidity(
         try:
             txn['gas'] = zk_web3.eth.estimate_gas(txn)
         except Exception as e:
+            nonces.manager.release(network_name, account.address, txn['nonce'])
             if 'insufficient balance' in str(e):
                 logging.critical(f'[iZUMi] Insufficient balance to remove liquidity from {first_token_name}/{second_token_name} pool')
                 return enums.TransactionStatus.INSUFFICIENT_BALANCE
             logging.error(f'[iZUMi] Error while estimating gas: {e}')
             return enums.TransactionStatus.FAILED
 
-        signed_txn = zk_web3.eth.account.sign_transaction(txn, private_key=private_key)
+        signed_txn = signing.sign_transaction(account, txn)
 
-        txn_hash = zk_web3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        txn_hash = nonces.send_raw_transaction(
+            zk_web3,
+            network_name,
+            account.address,
+            txn['nonce'],
+            'remove',
+            signed_txn
+        )
 
         logging.info(f'[iZUMi] Transaction: {network.txn_explorer_url}{txn_hash.hex()}')
 
-        receipt = utils.wait_for_transaction_receipt(
-            web3=zk_web3.zksync,
+        receipt = receipts.wait_for_transaction_receipt(
+            zk_web3=zk_web3,
             txn_hash=txn_hash,
             logging_prefix='iZUMi'
         )
 
+        nonces.manager.confirm(network_name, account.address, txn['nonce'], mined=receipt is not None)
+
         if receipt and receipt['status'] == 1:
+            izumi_positions.index.apply_receipt(
+                zk_web3,
+                network_name,
+                account.address,
+                liquidity_manager_contract.address,
+                receipt,
+                [token_id]
+            )
+            izumi_pools.cache.invalidate(pool_infos[position.pool_id].address)
             logging.info(f'[iZUMi] Successfully removed liquidity from {first_token_name}/{second_token_name} pool')
             return enums.TransactionStatus.SUCCESS
         else:
@@ -708,6 +1345,7 @@ def remove_random_liquidity(
     return enums.TransactionStatus.NO_LIQUIDITIES
 
 
+@journal.journaled('izumi.burn_liquidity', final_stages=('burn',), logging_prefix='iZUMi')
 def burn_random_liquidity(
     private_key: str,
     network_name: enums.NetworkNames,
@@ -717,21 +1355,20 @@ def burn_random_liquidity(
 ):
     network = constants.NETWORKS[network_name]
 
-    zk_web3 = ZkSyncBuilder.build(network.rpc_url, proxy=proxy)
+    zk_web3 = clients.get_client(network.rpc_url, proxy)
 
     account: LocalAccount = Account.from_key(private_key)
 
-    with open(Path(__file__).parent / 'abi' / 'liquidityManager.json') as file:
-        liquidity_manager_abi = file.read()
-
-    liquidity_manager_contract = zk_web3.eth.contract(
-        address=CONTRACT_ADRESSES[ContractTypes.LIQUIDITY_MANAGER][network_name],
-        abi=liquidity_manager_abi
+    liquidity_manager_contract = contract_registry.get_contract(
+        zk_web3,
+        network_name,
+        CONTRACT_ADRESSES[ContractTypes.LIQUIDITY_MANAGER][network_name],
+        'liquidityManager'
     )
 
-    weth_address = liquidity_manager_contract.functions.WETH9().call()
+    weth_address = izumi_pools.cache.weth(zk_web3, network_name, liquidity_manager_contract.address)
     weth_contract = ERC20Contract(zk_web3.zksync, weth_address, account)
-    weth_decimals = weth_contract.contract.functions.decimals().call()
+    weth_decimals = izumi_pools.cache.decimals(zk_web3, network_name, weth_address)
 
     if first_token_name in constants.ETH_TOKENS:
         first_token_address = weth_address
@@ -753,37 +1390,46 @@ def burn_random_liquidity(
         second_token_contract = ERC20Contract(zk_web3.zksync, second_token_address, account)
         second_token_decimals = second_token.decimals
 
-    pool_address = liquidity_manager_contract.functions.pool(
-        first_token_address, second_token_address, 2000
-    ).call()
+    pool_infos = {
+        pool_info.pool_id: pool_info
+        for pool_info in izumi_pools.cache.pools(
+            zk_web3,
+            network_name,
+            liquidity_manager_contract.address,
+            first_token_address,
+            second_token_address
+        )
+    }
 
-    pool_id = liquidity_manager_contract.functions.poolIds(
-        pool_address
-    ).call()
+    if not pool_infos:
+        logging.error(f'[iZUMi] {first_token_name}/{second_token_name} pool does not exist')
+        return enums.TransactionStatus.FAILED
 
-    total_liquidities = liquidity_manager_contract.functions.balanceOf(account.address).call()
+    logging.info(f'[iZUMi] Searching for positions in {first_token_name}/{second_token_name} pool to burn')
 
-    random_indexes = random.sample(range(total_liquidities), k=total_liquidities)
+    izumi_positions.index.sync(zk_web3, network_name, account.address, liquidity_manager_contract.address)
 
-    liquidities = []
+    position = izumi_positions.index.choice(
+        network_name,
+        account.address,
+        pool_ids=set(pool_infos),
+        drained=True
+    )
 
-    logging.info(f'[iZUMi] Searching for positions in {first_token_name}/{second_token_name} pool to burn')
+    if position is not None:
+        logging.info(f'[iZUMi] Found position in {first_token_name}/{second_token_name} pool')
 
-    for i in random_indexes:
-        token_id = liquidity_manager_contract.functions.tokenOfOwnerByIndex(account.address, i).call()
-        liquidity = liquidity_manager_contract.functions.liquidities(token_id).call()
-        if liquidity[-1] == pool_id and liquidity[2] == 0 and liquidity[5] == 0 and liquidity[6] == 0:
-            liquidities.append((token_id, liquidity))
-            break
+        token_id = position.token_id
 
-    for token_id, liquidity in liquidities:
-        logging.info(f'[iZUMi] Found position in {first_token_name}/{second_token_name} pool')
         txn = liquidity_manager_contract.functions.burn(
             token_id
         ).build_transaction({
-            'nonce': zk_web3.zksync.get_transaction_count(account.address, EthBlockParams.LATEST.value),
-            'maxPriorityFeePerGas': 100_000_000,
-            'maxFeePerGas': zk_web3.zksync.gas_price,
+            'nonce': nonces.manager.acquire(
+                network_name,
+                account.address,
+                zk_web3.zksync.get_transaction_count(account.address, EthBlockParams.LATEST.value)
+            ),
+            **fees.get_fees(zk_web3).txn_fields(),
             'gas': 0,
             'from': account.address
         })
@@ -791,25 +1437,43 @@ def burn_random_liquidity(
         try:
             txn['gas'] = zk_web3.eth.estimate_gas(txn)
         except Exception as e:
+            nonces.manager.release(network_name, account.address, txn['nonce'])
             if 'insufficient balance' in str(e):
                 logging.critical(f'[iZUMi] Insufficient balance to remove liquidity from {first_token_name}/{second_token_name} pool')
                 return enums.TransactionStatus.INSUFFICIENT_BALANCE
             logging.error(f'[iZUMi] Error while estimating gas: {e}')
             return enums.TransactionStatus.FAILED
 
-        signed_txn = zk_web3.eth.account.sign_transaction(txn, private_key=private_key)
+        signed_txn = signing.sign_transaction(account, txn)
 
-        txn_hash = zk_web3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        txn_hash = nonces.send_raw_transaction(
+            zk_web3,
+            network_name,
+            account.address,
+            txn['nonce'],
+            'burn',
+            signed_txn
+        )
 
         logging.info(f'[iZUMi] Transaction: {network.txn_explorer_url}{txn_hash.hex()}')
 
-        receipt = utils.wait_for_transaction_receipt(
-            web3=zk_web3.zksync,
+        receipt = receipts.wait_for_transaction_receipt(
+            zk_web3=zk_web3,
             txn_hash=txn_hash,
             logging_prefix='iZUMi'
         )
 
+        nonces.manager.confirm(network_name, account.address, txn['nonce'], mined=receipt is not None)
+
         if receipt and receipt['status'] == 1:
+            izumi_positions.index.apply_receipt(
+                zk_web3,
+                network_name,
+                account.address,
+                liquidity_manager_contract.address,
+                receipt,
+                [token_id]
+            )
             logging.info(f'[iZUMi] Successfully burned liquidity from {first_token_name}/{second_token_name} pool')
             return enums.TransactionStatus.SUCCESS
         else:
@@ -819,3 +1483,164 @@ def burn_random_liquidity(
     logging.warning(f'[iZUMi] No liquidity positions found in {first_token_name}/{second_token_name} pool')
 
     return enums.TransactionStatus.NO_LIQUIDITIES
+
+
+@journal.journaled('izumi.burn_drained_liquidities', logging_prefix='iZUMi')
+def burn_drained_liquidities(
+    private_key: str,
+    network_name: enums.NetworkNames,
+    pairs: list[tuple[enums.TokenNames, enums.TokenNames]] = None,
+    *,
+    gas_budget: int = BURN_GAS_BUDGET,
+    proxy: dict[str, str] = None
+) -> dict[int, enums.TransactionStatus]:
+    network = constants.NETWORKS[network_name]
+
+    zk_web3 = clients.get_client(network.rpc_url, proxy)
+
+    account: LocalAccount = Account.from_key(private_key)
+
+    liquidity_manager_contract = contract_registry.get_contract(
+        zk_web3,
+        network_name,
+        CONTRACT_ADRESSES[ContractTypes.LIQUIDITY_MANAGER][network_name],
+        'liquidityManager'
+    )
+
+    izumi_positions.index.sync(zk_web3, network_name, account.address, liquidity_manager_contract.address)
+
+    if pairs is None:
+        logging.info('[iZUMi] Searching for drained positions in all pools')
+        positions = izumi_positions.index.find(network_name, account.address, drained=True)
+    else:
+        weth_address = izumi_pools.cache.weth(zk_web3, network_name, liquidity_manager_contract.address)
+        positions = []
+        for first_token_name, second_token_name in pairs:
+            first_token_address, second_token_address = (
+                weth_address if token_name in constants.ETH_TOKENS
+                else constants.NETWORK_TOKENS[network_name, token_name].contract_address
+                for token_name in (first_token_name, second_token_name)
+            )
+            pool_infos = izumi_pools.cache.pools(
+                zk_web3,
+                network_name,
+                liquidity_manager_contract.address,
+                first_token_address,
+                second_token_address
+            )
+            if not pool_infos:
+                logging.warning(f'[iZUMi] {first_token_name}/{second_token_name} pool does not exist')
+                continue
+            logging.info(f'[iZUMi] Searching for drained positions in {first_token_name}/{second_token_name} pools')
+            positions.extend(izumi_positions.index.find(
+                network_name,
+                account.address,
+                pool_ids={pool_info.pool_id for pool_info in pool_infos},
+                drained=True
+            ))
+
+    already_burned = [token_id for burn in journal.completed('burn') for token_id in burn['token_ids']]
+
+    if already_burned:
+        logging.info(f'[iZUMi] {len(already_burned)} positions were already_burned before the restart, skipping them')
+        izumi_positions.index.remove(network_name, account.address, already_burned)
+        positions = [position for position in positions if position.token_id not in already_burned]
+
+    if not positions:
+        logging.warning('[iZUMi] No drained liquidity positions found')
+        return {token_id: enums.TransactionStatus.SUCCESS for token_id in already_burned}
+
+    token_ids = [position.token_id for position in positions]
+
+    logging.info(f'[iZUMi] Burning {len(token_ids)} drained positions')
+
+    results = {token_id: enums.TransactionStatus.SUCCESS for token_id in already_burned}
+    results.update({token_id: enums.TransactionStatus.FAILED for token_id in token_ids})
+
+    calls = [
+        liquidity_manager_contract.encodeABI(fn_name='burn', args=[token_id])
+        for token_id in token_ids
+    ]
+
+    txn_data = {
+        **fees.get_fees(zk_web3).txn_fields(),
+        'gas': 0,
+        'from': account.address
+    }
+
+    chain_nonce = zk_web3.zksync.get_transaction_count(account.address, EthBlockParams.LATEST.value)
+
+    batches = [list(range(len(token_ids)))]
+    estimated = []
+
+    while batches:
+        batch = batches.pop()
+        txn = liquidity_manager_contract.functions.multicall(
+            [calls[index] for index in batch]
+        ).build_transaction({
+            **txn_data,
+            'nonce': nonces.manager.acquire(network_name, account.address, chain_nonce)
+        })
+        try:
+            txn['gas'] = zk_web3.zksync.eth_estimate_gas(txn)
+        except Exception as e:
+            nonces.manager.release(network_name, account.address, txn['nonce'])
+            if len(batch) > 1:
+                middle = len(batch) // 2
+                batches.extend([batch[middle:], batch[:middle]])
+                continue
+            if 'insufficient balance' in str(e):
+                logging.critical(f'[iZUMi] Insufficient balance to burn position {token_ids[batch[0]]}')
+                results[token_ids[batch[0]]] = enums.TransactionStatus.INSUFFICIENT_BALANCE
+                continue
+            logging.error(f'[iZUMi] Error while estimating gas to burn position {token_ids[batch[0]]}: {e}')
+            continue
+        if txn['gas'] > gas_budget and len(batch) > 1:
+            nonces.manager.release(network_name, account.address, txn['nonce'])
+            middle = len(batch) // 2
+            batches.extend([batch[middle:], batch[:middle]])
+            continue
+        estimated.append((batch, txn))
+
+    pending = []
+    for position, (batch, txn) in enumerate(estimated):
+        signed_txn = signing.sign_transaction(account, txn)
+        try:
+            txn_hash = nonces.send_raw_transaction(
+                zk_web3,
+                network_name,
+                account.address,
+                txn['nonce'],
+                'burn',
+                signed_txn,
+                token_ids=[token_ids[index] for index in batch]
+            )
+        except Exception as e:
+            logging.error(f'[iZUMi] Failed to send a batch burning {len(batch)} positions: {e}')
+            nonces.manager.release_all(
+                network_name,
+                account.address,
+                [unsent['nonce'] for _, unsent in estimated[position + 1:]]
+            )
+            break
+        logging.info(f'[iZUMi] Transaction burning {len(batch)} positions: {network.txn_explorer_url}{txn_hash.hex()}')
+        pending.append((batch, txn, txn_hash))
+
+    batch_receipts = receipts.get_watcher(zk_web3).wait_all([txn_hash for *_, txn_hash in pending])
+
+    burned = []
+    for (batch, txn, _), receipt in zip(pending, batch_receipts):
+        nonces.manager.confirm(network_name, account.address, txn['nonce'], mined=receipt is not None)
+        for index in batch:
+            token_id = token_ids[index]
+            if receipt and receipt['status'] == 1:
+                logging.info(f'[iZUMi] Successfully burned position {token_id}')
+                results[token_id] = enums.TransactionStatus.SUCCESS
+                burned.append(token_id)
+            else:
+                logging.error(f'[iZUMi] Failed to burn position {token_id}')
+
+    if burned:
+        izumi_positions.index.remove(network_name, account.address, burned)
+
+    return results
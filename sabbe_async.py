@@ -0,0 +1,664 @@
+import asyncio
+import random
+
+import eth_abi
+from eth_account import Account
+from eth_account.signers.local import LocalAccount
+from web3 import AsyncWeb3, Web3
+
+import allowances
+import clients
+import constants
+import contract_registry
+import enums
+import fees
+import multicall
+import nonces
+import pool_registry
+import receipts
+import sabbe
+import syncswap_math
+from logger import logging
+from sabbe import CONTRACT_ADRESSES, ContractTypes, ZERO_ADDRESS
+
+
+RANDOM_SLEEP_RANGE = (5, 15)
+RECEIPT_TIMEOUT = 300
+
+
+async def random_sleep():
+    await asyncio.sleep(random.uniform(*RANDOM_SLEEP_RANGE))
+
+
+async def wait_for_transaction_receipt(async_web3: AsyncWeb3, txn_hash):
+    return await receipts.async_wait_for_transaction_receipt(
+        async_web3,
+        txn_hash,
+        logging_prefix='SyncSwap',
+        timeout=RECEIPT_TIMEOUT
+    )
+
+
+async def get_weth(async_web3: AsyncWeb3, network_name: enums.NetworkNames):
+    weth = await asyncio.to_thread(pool_registry.registry.get, network_name, sabbe.ROUTER_REGISTRY_SECTION, 'wETH')
+
+    if weth is None:
+        (weth_address,) = await multicall.async_aggregate(async_web3, [
+            multicall.Call(
+                CONTRACT_ADRESSES[ContractTypes.SWAP][network_name],
+                'wETH()',
+                output_types=('address',)
+            )
+        ])
+        (weth_decimals,) = await multicall.async_aggregate(async_web3, [
+            multicall.Call(weth_address, 'decimals()', output_types=('uint8',))
+        ])
+        weth = [Web3.to_checksum_address(weth_address), weth_decimals]
+        await asyncio.to_thread(pool_registry.registry.set, network_name, sabbe.ROUTER_REGISTRY_SECTION, 'wETH', weth)
+
+    return weth
+
+
+async def get_pool_master(async_web3: AsyncWeb3, network_name: enums.NetworkNames):
+    master = await asyncio.to_thread(pool_registry.registry.get, network_name, sabbe.ROUTER_REGISTRY_SECTION, 'master')
+
+    if master is None:
+        (master,) = await multicall.async_aggregate(async_web3, [
+            multicall.Call(
+                CONTRACT_ADRESSES[ContractTypes.POOL_FACTORY][network_name],
+                'master()',
+                output_types=('address',)
+            )
+        ])
+        if master is None:
+            return None
+        master = Web3.to_checksum_address(master)
+        await asyncio.to_thread(
+            pool_registry.registry.set,
+            network_name,
+            sabbe.ROUTER_REGISTRY_SECTION,
+            'master',
+            master
+        )
+
+    return master
+
+
+async def get_pool_address(
+    async_web3: AsyncWeb3,
+    network_name: enums.NetworkNames,
+    first_token_address: str,
+    second_token_address: str
+):
+    pool_address = await asyncio.to_thread(
+        sabbe.lookup_pool_address,
+        network_name,
+        first_token_address,
+        second_token_address
+    )
+    if pool_address:
+        return pool_address
+
+    pool_address = await asyncio.to_thread(
+        sabbe.predict_pool_address,
+        network_name,
+        first_token_address,
+        second_token_address
+    )
+    if pool_address and await async_web3.eth.get_code(pool_address):
+        await asyncio.to_thread(
+            sabbe.remember_pool_address,
+            network_name,
+            first_token_address,
+            second_token_address,
+            pool_address
+        )
+        return pool_address
+
+    (pool_address,) = await multicall.async_aggregate(async_web3, [
+        multicall.Call(
+            CONTRACT_ADRESSES[ContractTypes.POOL_FACTORY][network_name],
+            'getPool(address,address)',
+            (first_token_address, second_token_address),
+            output_types=('address',)
+        )
+    ])
+
+    if pool_address is None or int(pool_address, 16) == 0:
+        return ZERO_ADDRESS
+
+    pool_address = Web3.to_checksum_address(pool_address)
+    await asyncio.to_thread(
+        sabbe.remember_pool_address,
+        network_name,
+        first_token_address,
+        second_token_address,
+        pool_address
+    )
+
+    if await asyncio.to_thread(sabbe.needs_bytecode_hash, network_name):
+        try:
+            bytecode = bytes(await async_web3.eth.get_code(pool_address))
+            await asyncio.to_thread(
+                sabbe.learn_pool_bytecode_hash,
+                network_name,
+                first_token_address,
+                second_token_address,
+                pool_address,
+                bytecode
+            )
+        except Exception as e:
+            logging.warning(f'[SyncSwap] Failed to learn pool bytecode hash: {e}')
+
+    return pool_address
+
+
+async def get_pre_trade_snapshot(
+    async_web3: AsyncWeb3,
+    account_address: str,
+    **kwargs
+):
+    rpc_requests, calls = sabbe.build_snapshot_requests(account_address, **kwargs)
+
+    results = await multicall.async_batch_request(async_web3, rpc_requests)
+
+    return sabbe.parse_snapshot(results, calls, kwargs.get('token_address') is None)
+
+
+def resolve_token(
+    network_name: enums.NetworkNames,
+    token_name: enums.TokenNames,
+    weth_address: str,
+    weth_decimals: int
+):
+    if token_name in constants.ETH_TOKENS:
+        return weth_address, weth_decimals
+
+    token = constants.NETWORK_TOKENS[network_name, token_name]
+    return token.contract_address, token.decimals
+
+
+def encode_approve(spender: str, amount_in_wei: int):
+    return Web3.to_hex(
+        contract_registry.selector('approve(address,uint256)')
+        + eth_abi.encode(['address', 'uint256'], [spender, amount_in_wei])
+    )
+
+
+async def send_transaction(
+    async_web3: AsyncWeb3,
+    network_name: enums.NetworkNames,
+    account: LocalAccount,
+    network,
+    txn: dict,
+    *,
+    insufficient_balance_message: str,
+    label: str = 'Transaction'
+):
+    try:
+        txn['gas'] = await async_web3.eth.estimate_gas(txn)
+    except Exception as e:
+        nonces.manager.release(network_name, account.address, txn['nonce'])
+        if 'insufficient balance' in str(e):
+            logging.critical(f'[SyncSwap] {insufficient_balance_message}')
+            return enums.TransactionStatus.INSUFFICIENT_BALANCE
+        logging.error(f'[SyncSwap] Error while estimating gas: {e}')
+        return enums.TransactionStatus.FAILED
+
+    signed_txn = account.sign_transaction(txn)
+
+    try:
+        txn_hash = await async_web3.eth.send_raw_transaction(signed_txn.rawTransaction)
+    except Exception:
+        nonces.manager.release(network_name, account.address, txn['nonce'])
+        raise
+    nonces.manager.sent(network_name, account.address, txn['nonce'], txn_hash)
+
+    logging.info(f'[SyncSwap] {label}: {network.txn_explorer_url}{txn_hash.hex()}')
+
+    receipt = await wait_for_transaction_receipt(async_web3, txn_hash)
+    nonces.manager.confirm(network_name, account.address, txn['nonce'], mined=receipt is not None)
+
+    if receipt and receipt['status'] == 1:
+        return enums.TransactionStatus.SUCCESS
+    return enums.TransactionStatus.FAILED
+
+
+async def approve(
+    async_web3: AsyncWeb3,
+    network_name: enums.NetworkNames,
+    account: LocalAccount,
+    network,
+    txn_data: dict,
+    token_address: str,
+    spender: str,
+    approve_amount_in_wei: int,
+    description: str
+):
+    logging.info(f'[SyncSwap] Approving {description}')
+
+    approve_txn = {
+        **txn_data,
+        'to': token_address,
+        'data': encode_approve(spender, approve_amount_in_wei),
+        'value': 0
+    }
+
+    status = await send_transaction(
+        async_web3,
+        network_name,
+        account,
+        network,
+        approve_txn,
+        insufficient_balance_message=f'Insufficient balance to approve {description}',
+        label='Approve Transaction'
+    )
+
+    if status == enums.TransactionStatus.SUCCESS:
+        logging.info(f'[SyncSwap] Successfully approved {description}')
+        await asyncio.to_thread(
+            allowances.ledger.set,
+            network_name,
+            account.address,
+            token_address,
+            spender,
+            approve_amount_in_wei
+        )
+        txn_data['nonce'] = nonces.manager.acquire(network_name, account.address)
+    elif status == enums.TransactionStatus.FAILED:
+        logging.error(f'[SyncSwap] Failed to approve {description}')
+
+    return status
+
+
+def build_txn_data(
+    network_name: enums.NetworkNames,
+    account: LocalAccount,
+    snapshot: sabbe.PreTradeSnapshot,
+    gas_fees: fees.Fees
+):
+    return {
+        'chainId': snapshot.chain_id,
+        'nonce': nonces.manager.acquire(network_name, account.address, snapshot.nonce),
+        'from': account.address,
+        **gas_fees.txn_fields(),
+        'value': 0,
+        'gas': 0
+    }
+
+
+async def swap(
+    private_key: str,
+    network_name: enums.NetworkNames,
+    from_token_name: enums.TokenNames,
+    to_token_name: enums.TokenNames,
+    slippage: float,
+    *,
+    amount: float = None,
+    percentage: float = None,
+    proxy: dict[str, str] = None
+):
+    if not any([amount, percentage]):
+        raise ValueError('Either amount or percentage must be specified')
+    elif all([amount, percentage]):
+        raise ValueError('Only one of amount or percentage must be specified')
+
+    network = constants.NETWORKS[network_name]
+    async_web3 = clients.get_async_client(network.rpc_url, proxy)
+    account: LocalAccount = Account.from_key(private_key)
+
+    swap_router_contract = contract_registry.get_contract(
+        async_web3,
+        network_name,
+        CONTRACT_ADRESSES[ContractTypes.SWAP][network_name],
+        'SyncSwapRouter'
+    )
+
+    weth_address, weth_decimals = await get_weth(async_web3, network_name)
+
+    from_token_address, from_token_decimals = resolve_token(network_name, from_token_name, weth_address, weth_decimals)
+    to_token_address, _ = resolve_token(network_name, to_token_name, weth_address, weth_decimals)
+
+    is_from_eth = from_token_name in constants.ETH_TOKENS
+
+    pool_address = await get_pool_address(async_web3, network_name, from_token_address, to_token_address)
+
+    snapshot = await get_pre_trade_snapshot(
+        async_web3,
+        account.address,
+        token_address=None if is_from_eth else from_token_address,
+        spender=None if is_from_eth else swap_router_contract.address,
+        pool_address=pool_address,
+        swap_tokens=(from_token_address, to_token_address),
+        pool_master=await get_pool_master(async_web3, network_name)
+    )
+
+    if amount is None:
+        if percentage == 100:
+            amount_in_wei = snapshot.balance
+        else:
+            amount_in_wei = int(snapshot.balance * percentage / 100)
+        amount = amount_in_wei / 10 ** from_token_decimals
+    else:
+        amount_in_wei = int(amount * 10 ** from_token_decimals)
+
+    logging.info(f'[SyncSwap] Swapping {amount} {from_token_name} to {to_token_name}')
+
+    if snapshot.reserves is None:
+        logging.error('[SyncSwap] Failed to get pool info')
+        return enums.TransactionStatus.FAILED
+
+    if int(from_token_address, 16) < int(to_token_address, 16):
+        reserve_first, reserve_second = snapshot.reserves
+    else:
+        reserve_first, reserve_second = reversed(snapshot.reserves)
+
+    amount_out = syncswap_math.get_amount_out(
+        amount_in_wei,
+        reserve_first,
+        reserve_second,
+        snapshot.swap_fee
+    )
+
+    amount_out_min = syncswap_math.apply_slippage(amount_out, slippage)
+
+    if amount_out_min == 0:
+        logging.error('[SyncSwap] Insufficient liquidity in the pool')
+        return enums.TransactionStatus.INSUFFICIENT_LIQUIDITY
+
+    paths = sabbe.build_swap_paths(
+        pool_address,
+        from_token_address,
+        account.address,
+        amount_in_wei,
+        is_from_eth
+    )
+
+    txn_data = build_txn_data(
+        network_name,
+        account,
+        snapshot,
+        await fees.async_get_fees(async_web3)
+    )
+
+    if is_from_eth:
+        txn_data['value'] = amount_in_wei
+    elif snapshot.allowance < amount_in_wei:
+        status = await approve(
+            async_web3,
+            network_name,
+            account,
+            network,
+            txn_data,
+            from_token_address,
+            swap_router_contract.address,
+            allowances.approve_amount(amount_in_wei),
+            f'{from_token_name}'
+        )
+        if status != enums.TransactionStatus.SUCCESS:
+            return status
+        await random_sleep()
+
+    txn = {
+        **txn_data,
+        'to': swap_router_contract.address,
+        'data': swap_router_contract.encodeABI(
+            fn_name='swap',
+            args=[paths, amount_out_min, snapshot.timestamp + 1800]
+        )
+    }
+
+    status = await send_transaction(
+        async_web3,
+        network_name,
+        account,
+        network,
+        txn,
+        insufficient_balance_message=f'Insufficient balance to swap {from_token_name} to {to_token_name}'
+    )
+
+    if status == enums.TransactionStatus.SUCCESS:
+        if not is_from_eth:
+            await asyncio.to_thread(
+                allowances.ledger.record_spend,
+                network_name,
+                account.address,
+                from_token_address,
+                swap_router_contract.address,
+                amount_in_wei
+            )
+        logging.info(f'[SyncSwap] Successfully swapped {amount} {from_token_name} to {to_token_name}')
+    elif status == enums.TransactionStatus.FAILED:
+        logging.error(f'[SyncSwap] Failed to swap {amount} {from_token_name} to {to_token_name}')
+
+    return status
+
+
+async def add_liquidity(
+    private_key: str,
+    network_name: enums.NetworkNames,
+    first_token_name: enums.TokenNames,
+    second_token_name: enums.TokenNames,
+    *,
+    amount: float = None,
+    percentage: float = None,
+    proxy: dict[str, str] = None
+):
+    if not any([amount, percentage]):
+        raise ValueError('Either amount or percentage must be specified')
+    elif all([amount, percentage]):
+        raise ValueError('Only one of amount or percentage must be specified')
+
+    network = constants.NETWORKS[network_name]
+    async_web3 = clients.get_async_client(network.rpc_url, proxy)
+    account: LocalAccount = Account.from_key(private_key)
+
+    swap_router_contract = contract_registry.get_contract(
+        async_web3,
+        network_name,
+        CONTRACT_ADRESSES[ContractTypes.SWAP][network_name],
+        'SyncSwapRouter'
+    )
+
+    weth_address, weth_decimals = await get_weth(async_web3, network_name)
+
+    first_token_address, first_token_decimals = resolve_token(network_name, first_token_name, weth_address, weth_decimals)
+    second_token_address, _ = resolve_token(network_name, second_token_name, weth_address, weth_decimals)
+
+    is_first_eth = first_token_name in constants.ETH_TOKENS
+
+    pool_address = await get_pool_address(async_web3, network_name, first_token_address, second_token_address)
+
+    snapshot = await get_pre_trade_snapshot(
+        async_web3,
+        account.address,
+        token_address=None if is_first_eth else first_token_address,
+        spender=None if is_first_eth else swap_router_contract.address
+    )
+
+    if amount is None:
+        if percentage == 100:
+            amount_in_wei = snapshot.balance
+        else:
+            amount_in_wei = int(snapshot.balance * percentage / 100)
+        amount = amount_in_wei / 10 ** first_token_decimals
+    else:
+        amount_in_wei = int(amount * 10 ** first_token_decimals)
+
+    logging.info(f'[SyncSwap] Adding {amount} {first_token_name} to {first_token_name}/{second_token_name} liquidity pool')
+
+    contract_data = sabbe.build_add_liquidity_data(
+        pool_address,
+        first_token_address,
+        second_token_address,
+        account.address,
+        amount_in_wei,
+        is_first_eth
+    )
+
+    txn_data = build_txn_data(
+        network_name,
+        account,
+        snapshot,
+        await fees.async_get_fees(async_web3)
+    )
+
+    if is_first_eth:
+        txn_data['value'] = amount_in_wei
+    elif snapshot.allowance < amount_in_wei:
+        status = await approve(
+            async_web3,
+            network_name,
+            account,
+            network,
+            txn_data,
+            first_token_address,
+            swap_router_contract.address,
+            allowances.approve_amount(amount_in_wei),
+            f'{first_token_name}'
+        )
+        if status != enums.TransactionStatus.SUCCESS:
+            return status
+        await random_sleep()
+
+    txn = {
+        **txn_data,
+        'to': swap_router_contract.address,
+        'data': swap_router_contract.encodeABI(
+            fn_name='addLiquidity2',
+            kwargs=contract_data
+        )
+    }
+
+    status = await send_transaction(
+        async_web3,
+        network_name,
+        account,
+        network,
+        txn,
+        insufficient_balance_message='Insufficient balance to add liquidity'
+    )
+
+    if status == enums.TransactionStatus.SUCCESS:
+        if not is_first_eth:
+            await asyncio.to_thread(
+                allowances.ledger.record_spend,
+                network_name,
+                account.address,
+                first_token_address,
+                swap_router_contract.address,
+                amount_in_wei
+            )
+        logging.info(f'[SyncSwap] Successfully added {amount} {first_token_name} to {first_token_name}/{second_token_name} liquidity pool')
+    elif status == enums.TransactionStatus.FAILED:
+        logging.error(f'[SyncSwap] Failed to add {amount} {first_token_name} to {first_token_name}/{second_token_name} liquidity pool')
+
+    return status
+
+
+async def burn_liquidity(
+    private_key: str,
+    network_name: enums.NetworkNames,
+    first_token_name: enums.TokenNames,
+    second_token_name: enums.TokenNames,
+    *,
+    percentage: float = 100,
+    proxy: dict[str, str] = None
+):
+    network = constants.NETWORKS[network_name]
+    async_web3 = clients.get_async_client(network.rpc_url, proxy)
+    account: LocalAccount = Account.from_key(private_key)
+
+    swap_router_contract = contract_registry.get_contract(
+        async_web3,
+        network_name,
+        CONTRACT_ADRESSES[ContractTypes.SWAP][network_name],
+        'SyncSwapRouter'
+    )
+
+    weth_address, weth_decimals = await get_weth(async_web3, network_name)
+
+    first_token_address, _ = resolve_token(network_name, first_token_name, weth_address, weth_decimals)
+    second_token_address, _ = resolve_token(network_name, second_token_name, weth_address, weth_decimals)
+
+    logging.info(f'[SyncSwap] Remmoving {percentage}% liquidity of {first_token_name}/{second_token_name} liquidity pool')
+
+    pool_address = await get_pool_address(async_web3, network_name, first_token_address, second_token_address)
+
+    snapshot = await get_pre_trade_snapshot(
+        async_web3,
+        account.address,
+        token_address=pool_address,
+        spender=swap_router_contract.address,
+        with_decimals=True
+    )
+
+    if percentage == 100:
+        amount_in_wei = snapshot.balance
+    else:
+        amount_in_wei = int(snapshot.balance * percentage / 100)
+
+    amount = amount_in_wei / 10 ** snapshot.decimals
+
+    txn_data = build_txn_data(
+        network_name,
+        account,
+        snapshot,
+        await fees.async_get_fees(async_web3)
+    )
+
+    if snapshot.allowance < amount_in_wei:
+        status = await approve(
+            async_web3,
+            network_name,
+            account,
+            network,
+            txn_data,
+            pool_address,
+            swap_router_contract.address,
+            allowances.approve_amount(amount_in_wei),
+            'liquidity tokens'
+        )
+        if status != enums.TransactionStatus.SUCCESS:
+            return status
+        await random_sleep()
+
+    txn = {
+        **txn_data,
+        'to': swap_router_contract.address,
+        'data': swap_router_contract.encodeABI(
+            fn_name='burnLiquiditySingle',
+            args=[
+                pool_address,
+                amount_in_wei,
+                sabbe.build_burn_data(first_token_address, account.address),
+                0,
+                ZERO_ADDRESS,
+                b''
+            ]
+        )
+    }
+
+    status = await send_transaction(
+        async_web3,
+        network_name,
+        account,
+        network,
+        txn,
+        insufficient_balance_message=f'Insufficient balance to remove {amount} liquidity tokens'
+    )
+
+    if status == enums.TransactionStatus.SUCCESS:
+        await asyncio.to_thread(
+            allowances.ledger.record_spend,
+            network_name,
+            account.address,
+            pool_address,
+            swap_router_contract.address,
+            amount_in_wei
+        )
+        logging.info(f'[SyncSwap] Successfully removed {amount} liquidity tokens')
+    elif status == enums.TransactionStatus.FAILED:
+        logging.error(f'[SyncSwap] Failed to remove {amount} liquidity tokens')
+
+    return status
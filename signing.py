@@ -0,0 +1,51 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from eth_account import Account
+from eth_account.signers.local import LocalAccount
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+observers = []
+
+
+def _sign(private_key: bytes, txn: dict):
+    return Account.sign_transaction(txn, private_key)
+
+
+def configure(workers: int = None):
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+        if workers:
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+
+
+def shutdown():
+    configure(None)
+
+
+def sign_transaction(account: LocalAccount, txn: dict):
+    started = time.perf_counter()
+
+    executor = _executor
+    if executor is None:
+        signed = account.sign_transaction(txn)
+    else:
+        signed = executor.submit(_sign, account.key, dict(txn)).result()
+
+    elapsed = time.perf_counter() - started
+    for observer in observers:
+        observer(elapsed)
+
+    return signed
@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+
+
+MAX_FEE = 100_000
+DEFAULT_SWAP_FEE = 300
+
+SLIPPAGE_PRECISION = 1_000_000
+
+
+@dataclass(frozen=True)
+class PoolReserves:
+    address: str
+    token0: str
+    token1: str
+    reserve0: int
+    reserve1: int
+    swap_fee: int = DEFAULT_SWAP_FEE
+
+    def reserves_for(self, token_in: str):
+        if token_in.lower() == self.token0.lower():
+            return self.reserve0, self.reserve1
+        return self.reserve1, self.reserve0
+
+    def other_token(self, token: str) -> str:
+        if token.lower() == self.token0.lower():
+            return self.token1
+        return self.token0
+
+    def get_amount_out(self, token_in: str, amount_in: int) -> int:
+        reserve_in, reserve_out = self.reserves_for(token_in)
+        return get_amount_out(amount_in, reserve_in, reserve_out, self.swap_fee)
+
+    def after_swap(self, token_in: str, amount_in: int, amount_out: int):
+        if token_in.lower() == self.token0.lower():
+            reserve0, reserve1 = self.reserve0 + amount_in, self.reserve1 - amount_out
+        else:
+            reserve0, reserve1 = self.reserve0 - amount_out, self.reserve1 + amount_in
+        return PoolReserves(self.address, self.token0, self.token1, reserve0, reserve1, self.swap_fee)
+
+
+def get_amount_out(
+    amount_in: int,
+    reserve_in: int,
+    reserve_out: int,
+    swap_fee: int = DEFAULT_SWAP_FEE
+) -> int:
+    if amount_in <= 0 or reserve_in <= 0 or reserve_out <= 0:
+        return 0
+    amount_in_with_fee = amount_in * (MAX_FEE - swap_fee)
+    return amount_in_with_fee * reserve_out // (reserve_in * MAX_FEE + amount_in_with_fee)
+
+
+def get_amount_in(
+    amount_out: int,
+    reserve_in: int,
+    reserve_out: int,
+    swap_fee: int = DEFAULT_SWAP_FEE
+):
+    if amount_out <= 0:
+        return 0
+    if amount_out >= reserve_out or reserve_in <= 0:
+        return None
+    return reserve_in * amount_out * MAX_FEE // ((reserve_out - amount_out) * (MAX_FEE - swap_fee)) + 1
+
+
+def get_amounts_out(
+    amounts_in: list[int],
+    reserve_in: int,
+    reserve_out: int,
+    swap_fee: int = DEFAULT_SWAP_FEE
+) -> list[int]:
+    if reserve_in <= 0 or reserve_out <= 0:
+        return [0] * len(amounts_in)
+
+    fee_factor = MAX_FEE - swap_fee
+    scaled_reserve_in = reserve_in * MAX_FEE
+
+    amounts_out = []
+    for amount_in in amounts_in:
+        if amount_in <= 0:
+            amounts_out.append(0)
+            continue
+        amount_in_with_fee = amount_in * fee_factor
+        amounts_out.append(amount_in_with_fee * reserve_out // (scaled_reserve_in + amount_in_with_fee))
+
+    return amounts_out
+
+
+def quote_pools(token_in: str, amount_in: int, pools: list[PoolReserves]) -> list[int]:
+    return [pool.get_amount_out(token_in, amount_in) for pool in pools]
+
+
+def quote_matrix(token_in: str, amounts_in: list[int], pools: list[PoolReserves]) -> list[list[int]]:
+    return [
+        get_amounts_out(amounts_in, *pool.reserves_for(token_in), pool.swap_fee)
+        for pool in pools
+    ]
+
+
+def apply_slippage(amount_out: int, slippage: float) -> int:
+    tolerance = round(slippage * SLIPPAGE_PRECISION / 100)
+    return amount_out * (SLIPPAGE_PRECISION - tolerance) // SLIPPAGE_PRECISION
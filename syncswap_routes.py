@@ -0,0 +1,248 @@
+import copy
+import heapq
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+from syncswap_math import PoolReserves
+
+
+MAX_HOPS = 3
+RESERVES_TTL = 30
+
+
+@dataclass(frozen=True)
+class Route:
+    pools: tuple[str, ...]
+    tokens: tuple[str, ...]
+    amount_in: int
+    amount_out: int
+
+    @property
+    def hops(self) -> int:
+        return len(self.pools)
+
+
+class PoolGraph:
+    def __init__(self, pools: list[PoolReserves] = ()):
+        self.pools = {}
+        self._adjacency = defaultdict(dict)
+        self._routes = {}
+        self._updated = {}
+
+        for pool in pools:
+            self.update(pool)
+
+    def __len__(self):
+        return len(self.pools)
+
+    def update(self, pool: PoolReserves):
+        key = pool.address.lower()
+        if key not in self.pools:
+            self._routes.clear()
+        self.pools[key] = pool
+        self._adjacency[pool.token0.lower()][key] = pool.token1.lower()
+        self._adjacency[pool.token1.lower()][key] = pool.token0.lower()
+        self._updated[key] = time.monotonic()
+
+    @property
+    def updated_at(self) -> float:
+        return min(self._updated.values(), default=0)
+
+    def is_stale(self, ttl: float = RESERVES_TTL) -> bool:
+        return not self.pools or time.monotonic() - self.updated_at > ttl
+
+    def with_reserves(self, pools: list[PoolReserves]) -> 'PoolGraph':
+        if any(pool.address.lower() not in self.pools for pool in pools):
+            graph = PoolGraph(self.pools.values())
+            for pool in pools:
+                graph.update(pool)
+            return graph
+
+        # same topology, so the adjacency and route caches can be shared
+        graph = copy.copy(self)
+        graph.pools = dict(self.pools)
+        graph._updated = dict(self._updated)
+        for pool in pools:
+            key = pool.address.lower()
+            graph.pools[key] = pool
+            graph._updated[key] = time.monotonic()
+        return graph
+
+    def get(self, pool_address: str):
+        return self.pools.get(pool_address.lower())
+
+    def find_routes(self, token_in: str, token_out: str, max_hops: int = MAX_HOPS) -> list[tuple[str, ...]]:
+        key = (token_in.lower(), token_out.lower(), max_hops)
+
+        routes = self._routes.get(key)
+        if routes is None:
+            routes = []
+            self._search(key[0], key[1], max_hops, (), {key[0]}, routes)
+            self._routes[key] = routes
+
+        return routes
+
+    def _search(self, token: str, token_out: str, hops_left: int, path: tuple, visited: set, routes: list):
+        for pool_address, next_token in self._adjacency.get(token, {}).items():
+            if next_token == token_out:
+                routes.append(path + (pool_address,))
+                continue
+            if hops_left <= 1 or next_token in visited:
+                continue
+            visited.add(next_token)
+            self._search(next_token, token_out, hops_left - 1, path + (pool_address,), visited, routes)
+            visited.remove(next_token)
+
+    def quote(self, pool_addresses: tuple[str, ...], token_in: str, amount_in: int):
+        tokens = [token_in]
+        amount = amount_in
+
+        for pool_address in pool_addresses:
+            pool = self.pools[pool_address]
+            amount = pool.get_amount_out(tokens[-1], amount)
+            if amount <= 0:
+                return None
+            tokens.append(pool.other_token(tokens[-1]))
+
+        return Route(
+            tuple(self.pools[pool_address].address for pool_address in pool_addresses),
+            tuple(tokens[:-1]),
+            amount_in,
+            amount
+        )
+
+    def quote_routes(self, token_in: str, token_out: str, amount_in: int, max_hops: int = MAX_HOPS) -> list[Route]:
+        routes = []
+        for pool_addresses in self.find_routes(token_in, token_out, max_hops):
+            route = self.quote(pool_addresses, token_in, amount_in)
+            if route is not None:
+                routes.append(route)
+        routes.sort(key=lambda route: route.amount_out, reverse=True)
+        return routes
+
+    def best_route(self, token_in: str, token_out: str, amount_in: int, max_hops: int = MAX_HOPS):
+        best = None
+        for pool_addresses in self.find_routes(token_in, token_out, max_hops):
+            route = self.quote(pool_addresses, token_in, amount_in)
+            if route is not None and (best is None or route.amount_out > best.amount_out):
+                best = route
+        return best
+
+
+MAX_SPLITS = 4
+SPLIT_CHUNKS = 50
+
+
+@dataclass(frozen=True)
+class Split:
+    routes: tuple[Route, ...]
+    amount_in: int
+    amount_out: int
+
+
+def _simulate(
+    pools: dict,
+    pool_addresses: tuple[str, ...],
+    token_in: str,
+    amount_in: int,
+    apply: bool = False
+):
+    token = token_in
+    amount = amount_in
+    updated = []
+
+    for pool_address in pool_addresses:
+        pool = pools[pool_address]
+        amount_out = pool.get_amount_out(token, amount)
+        if amount_out <= 0:
+            return 0
+        updated.append((pool_address, pool.after_swap(token, amount, amount_out)))
+        token = pool.other_token(token)
+        amount = amount_out
+
+    if apply:
+        pools.update(updated)
+
+    return amount
+
+
+def _chunks(amount_in: int, chunks: int) -> list[int]:
+    chunks = max(1, min(chunks, amount_in))
+    size, remainder = divmod(amount_in, chunks)
+    return [size + (1 if index < remainder else 0) for index in range(chunks)]
+
+
+class SplitOptimizer:
+    def __init__(self, graph: PoolGraph):
+        self.graph = graph
+
+    def quote_split(self, allocations: list[tuple[tuple[str, ...], int]], token_in: str):
+        pools = dict(self.graph.pools)
+        routes = []
+
+        for pool_addresses, amount_in in allocations:
+            route = self.graph.quote(pool_addresses, token_in, amount_in)
+            amount_out = _simulate(pools, pool_addresses, token_in, amount_in, apply=True)
+            if route is None or amount_out <= 0:
+                return None
+            routes.append(Route(route.pools, route.tokens, amount_in, amount_out))
+
+        return Split(
+            tuple(routes),
+            sum(route.amount_in for route in routes),
+            sum(route.amount_out for route in routes)
+        )
+
+    def optimize(
+        self,
+        token_in: str,
+        token_out: str,
+        amount_in: int,
+        max_hops: int = MAX_HOPS,
+        max_splits: int = MAX_SPLITS,
+        chunks: int = SPLIT_CHUNKS
+    ):
+        candidates = self.graph.find_routes(token_in, token_out, max_hops)
+        if not candidates or amount_in <= 0:
+            return None
+
+        pools = dict(self.graph.pools)
+        amounts = _chunks(amount_in, chunks)
+        allocated = [0] * len(candidates)
+        active = set()
+
+        heap = [
+            (-_simulate(pools, pool_addresses, token_in, amounts[0]), index)
+            for index, pool_addresses in enumerate(candidates)
+        ]
+        heapq.heapify(heap)
+
+        for amount in amounts:
+            while heap:
+                _, index = heapq.heappop(heap)
+                if index not in active and len(active) >= max_splits:
+                    continue
+
+                marginal = _simulate(pools, candidates[index], token_in, amount)
+                if heap and marginal < -heap[0][0]:
+                    heapq.heappush(heap, (-marginal, index))
+                    continue
+                if marginal <= 0:
+                    return None
+
+                _simulate(pools, candidates[index], token_in, amount, apply=True)
+                allocated[index] += amount
+                active.add(index)
+                heapq.heappush(heap, (-_simulate(pools, candidates[index], token_in, amount), index))
+                break
+            else:
+                return None
+
+        allocations = sorted(
+            ((candidates[index], allocated[index]) for index in active),
+            key=lambda allocation: allocation[1],
+            reverse=True
+        )
+
+        return self.quote_split(allocations, token_in)
@@ -0,0 +1,142 @@
+import pytest
+
+import allowances
+import enums
+
+
+NETWORK = enums.NetworkNames.zkEra
+OWNER = '0x36615Cf349d7F6344891B1e7CA7C72883F5dc049'
+TOKEN = '0x3355df6D4c9C3035724Fd0e3914dE96A5a83aaf4'
+SPENDER = '0x2da10A1e27bF85cEdD8FFb1AbBe97e53391C0295'
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return allowances.AllowanceLedger(tmp_path / 'allowances.json')
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    values = []
+
+    def aggregate(zk_web3, calls):
+        value = values.pop(0) if len(values) > 1 else values[0]
+        if isinstance(value, Exception):
+            raise value
+        return [value]
+
+    monkeypatch.setattr(allowances.multicall, 'aggregate', aggregate)
+    return values
+
+
+def approval_receipt(amount: int, owner: str = OWNER) -> dict:
+    return {'logs': [{
+        'address': TOKEN,
+        'topics': [
+            allowances.APPROVAL_TOPIC,
+            bytes(12) + bytes.fromhex(owner[2:]),
+            bytes(12) + bytes.fromhex(SPENDER[2:]),
+        ],
+        'data': amount.to_bytes(32, 'big'),
+    }]}
+
+
+def test_ledger_persists_across_instances(tmp_path):
+    ledger = allowances.AllowanceLedger(tmp_path / 'allowances.json')
+    ledger.set(NETWORK, OWNER, TOKEN, SPENDER, 500)
+    ledger.flush()
+
+    reloaded = allowances.AllowanceLedger(tmp_path / 'allowances.json')
+
+    assert reloaded.get(NETWORK, OWNER.lower(), TOKEN.lower(), SPENDER) == 500
+    assert reloaded.covers(NETWORK, OWNER, TOKEN, SPENDER, 500)
+    assert not reloaded.covers(NETWORK, OWNER, TOKEN, SPENDER, 501)
+
+
+def test_forget_removes_entry(ledger):
+    ledger.set(NETWORK, OWNER, TOKEN, SPENDER, 500)
+    ledger.forget(NETWORK, OWNER, TOKEN, SPENDER)
+
+    assert ledger.get(NETWORK, OWNER, TOKEN, SPENDER) is None
+
+
+def test_record_spend_reduces_finite_allowance(ledger):
+    ledger.set(NETWORK, OWNER, TOKEN, SPENDER, 500)
+    ledger.record_spend(NETWORK, OWNER, TOKEN, SPENDER, 200)
+    assert ledger.get(NETWORK, OWNER, TOKEN, SPENDER) == 300
+
+    ledger.record_spend(NETWORK, OWNER, TOKEN, SPENDER, 400)
+    assert ledger.get(NETWORK, OWNER, TOKEN, SPENDER) == 0
+
+
+def test_record_spend_keeps_unlimited_allowance(ledger):
+    ledger.set(NETWORK, OWNER, TOKEN, SPENDER, allowances.MAX_UINT256)
+    ledger.record_spend(NETWORK, OWNER, TOKEN, SPENDER, 200)
+
+    assert ledger.get(NETWORK, OWNER, TOKEN, SPENDER) == allowances.MAX_UINT256
+
+
+def test_record_receipt_uses_approval_event(ledger):
+    ledger.set(NETWORK, OWNER, TOKEN, SPENDER, 10)
+    ledger.record_spend(NETWORK, OWNER, TOKEN, SPENDER, 5, receipt=approval_receipt(70))
+
+    assert ledger.get(NETWORK, OWNER, TOKEN, SPENDER) == 70
+
+
+def test_stale_refetches_and_reports_shortfall(ledger, chain):
+    ledger.set(NETWORK, OWNER, TOKEN, SPENDER, 500)
+    chain.append(50)
+
+    assert ledger.stale(None, NETWORK, OWNER, TOKEN, SPENDER, 80)
+    assert ledger.get(NETWORK, OWNER, TOKEN, SPENDER) == 50
+
+
+def test_stale_is_false_when_chain_covers_amount(ledger, chain):
+    chain.append(500)
+
+    assert not ledger.stale(None, NETWORK, OWNER, TOKEN, SPENDER, 80)
+
+
+def test_stale_is_false_when_fetch_fails(ledger, chain):
+    ledger.set(NETWORK, OWNER, TOKEN, SPENDER, 500)
+    chain.append(ValueError('rpc down'))
+
+    assert not ledger.stale(None, NETWORK, OWNER, TOKEN, SPENDER, 80)
+    assert ledger.get(NETWORK, OWNER, TOKEN, SPENDER) is None
+
+
+def test_retry_once_runs_func_a_single_time():
+    calls = []
+
+    def action(value):
+        calls.append(value)
+        return allowances.retry_once(action, value + 1) or 'done'
+
+    assert allowances.retry_once(action, 1) == 'done'
+    assert calls == [1]
+
+
+def test_confirm_approval_trusts_matching_receipt(ledger, chain):
+    chain.append(ValueError('should not poll'))
+
+    assert ledger.confirm_approval(None, NETWORK, OWNER, TOKEN, SPENDER, 70, receipt=approval_receipt(70))
+
+
+def test_confirm_approval_polls_until_allowance_lands(ledger, chain, monkeypatch):
+    chain.extend([0, ValueError('rpc hiccup'), 0, 100])
+    sleeps = []
+    monkeypatch.setattr(allowances.time, 'sleep', sleeps.append)
+
+    assert ledger.confirm_approval(None, NETWORK, OWNER, TOKEN, SPENDER, 100)
+    assert sleeps == [0.5, 1, 2]
+    assert ledger.get(NETWORK, OWNER, TOKEN, SPENDER) == 100
+
+
+def test_confirm_approval_times_out(ledger, chain, monkeypatch):
+    chain.append(0)
+    now = [0.0]
+    monkeypatch.setattr(allowances.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(allowances.time, 'sleep', lambda seconds: now.__setitem__(0, now[0] + seconds))
+
+    assert not ledger.confirm_approval(None, NETWORK, OWNER, TOKEN, SPENDER, 100, timeout=10)
+    assert now[0] == 10
@@ -0,0 +1,160 @@
+import pytest
+
+import izumi_math
+
+
+FEE = 2000
+POINT_DELTA = 40
+LEFT_POINT = -4000
+RIGHT_POINT = 4000
+LIQUIDITY = 10 ** 14
+
+
+def set_bit(bitmap: dict, point: int):
+    map_point = point // POINT_DELTA
+    bitmap[map_point >> 8] = bitmap.get(map_point >> 8, 0) | (1 << (map_point % 256))
+
+
+def make_snapshot(current_point: int = 0, liquidity: int = LIQUIDITY) -> izumi_math.PoolSnapshot:
+    bitmap = {}
+    set_bit(bitmap, LEFT_POINT)
+    set_bit(bitmap, RIGHT_POINT)
+
+    return izumi_math.PoolSnapshot(
+        address='0x0000000000000000000000000000000000000001',
+        token_x='0x0000000000000000000000000000000000000002',
+        token_y='0x0000000000000000000000000000000000000003',
+        fee=FEE,
+        point_delta=POINT_DELTA,
+        sqrt_rate_96=izumi_math.get_sqrt_price(1),
+        left_most_point=izumi_math.MIN_POINT,
+        right_most_point=izumi_math.MAX_POINT,
+        sqrt_price_96=izumi_math.get_sqrt_price(current_point),
+        current_point=current_point,
+        liquidity=liquidity,
+        liquidity_x=liquidity,
+        block_number=1,
+        bitmap=bitmap,
+        endpoints={LEFT_POINT: liquidity, RIGHT_POINT: -liquidity}
+    )
+
+
+def test_sqrt_price_at_zero_is_one():
+    assert izumi_math.get_sqrt_price(0) == izumi_math.POW_96
+
+
+def test_sqrt_price_is_monotonic():
+    points = [-200000, -1, 0, 1, 200000]
+    prices = [izumi_math.get_sqrt_price(point) for point in points]
+    assert prices == sorted(prices)
+    assert len(set(prices)) == len(prices)
+
+
+def test_sqrt_price_rejects_out_of_range_point():
+    with pytest.raises(ValueError):
+        izumi_math.get_sqrt_price(izumi_math.MAX_POINT + 1)
+
+
+@pytest.mark.parametrize('point', [-50000, -7, 0, 3, 123456])
+def test_log_sqrt_price_floor_inverts_sqrt_price(point):
+    sqrt_price_96 = izumi_math.get_sqrt_price(point)
+    assert izumi_math.get_log_sqrt_price_floor(sqrt_price_96) == point
+    assert izumi_math.get_log_sqrt_price_floor(sqrt_price_96 + 1) == point
+
+
+def test_deposit_above_current_point_needs_only_x():
+    amount_x, amount_y = izumi_math.deposit_amounts(LIQUIDITY, 400, 800, 0, izumi_math.get_sqrt_price(1))
+    assert amount_x > 0
+    assert amount_y == 0
+
+
+def test_deposit_below_current_point_needs_only_y():
+    amount_x, amount_y = izumi_math.deposit_amounts(LIQUIDITY, -800, -400, 0, izumi_math.get_sqrt_price(1))
+    assert amount_x == 0
+    assert amount_y > 0
+
+
+def test_deposit_around_current_point_is_balanced_at_parity():
+    amount_x, amount_y = izumi_math.deposit_amounts(
+        LIQUIDITY, LEFT_POINT, RIGHT_POINT, 0, izumi_math.get_sqrt_price(1)
+    )
+    assert amount_x > 0
+    assert amount_y > 0
+    assert abs(amount_x - amount_y) * 100 < amount_y
+
+
+def test_deposit_scales_with_liquidity():
+    sqrt_rate_96 = izumi_math.get_sqrt_price(1)
+    single = izumi_math.deposit_amounts(LIQUIDITY, LEFT_POINT, RIGHT_POINT, 0, sqrt_rate_96)
+    double = izumi_math.deposit_amounts(2 * LIQUIDITY, LEFT_POINT, RIGHT_POINT, 0, sqrt_rate_96)
+    assert all(abs(2 * one - two) <= 2 for one, two in zip(single, double))
+
+
+@pytest.mark.parametrize('x_to_y', [True, False])
+def test_small_swap_fills_near_parity(x_to_y):
+    amount_in = 10 ** 13
+    quote = make_snapshot().quote(amount_in, x_to_y)
+
+    assert quote.filled
+    assert amount_in - quote.amount_in <= 1
+    assert quote.amount_out < amount_in
+    assert quote.amount_out * 1000 > amount_in * 990
+
+
+def test_x2y_moves_price_down_and_y2x_moves_it_up():
+    snapshot = make_snapshot()
+    amount_in = 10 ** 16
+
+    assert snapshot.quote(amount_in, True).final_point < snapshot.current_point
+    assert snapshot.quote(amount_in, False).final_point >= snapshot.current_point
+
+
+@pytest.mark.parametrize('x_to_y', [True, False])
+def test_larger_swaps_get_worse_prices(x_to_y):
+    quotes = make_snapshot().quote_many([10 ** 15, 10 ** 16, 10 ** 17], x_to_y)
+
+    amounts_out = [quote.amount_out for quote in quotes]
+    assert amounts_out == sorted(amounts_out)
+    rates = [quote.amount_out / quote.amount_in for quote in quotes]
+    assert rates == sorted(rates, reverse=True)
+
+
+@pytest.mark.parametrize('x_to_y, boundary', [(True, LEFT_POINT), (False, RIGHT_POINT)])
+def test_swap_past_liquidity_is_not_filled(x_to_y, boundary):
+    amount_in = 10 ** 19
+    quote = make_snapshot().quote(amount_in, x_to_y)
+
+    assert not quote.filled
+    assert quote.amount_in < amount_in
+    assert quote.final_point <= boundary if x_to_y else quote.final_point >= boundary
+
+
+def test_boundary_point_limits_swap():
+    quote = make_snapshot().quote(10 ** 17, True, boundary_point=-100)
+
+    assert not quote.filled
+    assert quote.final_point >= -100
+
+
+def test_zap_swap_amount_balances_deposit():
+    snapshot = make_snapshot()
+    amount_in = 10 ** 16
+
+    swap_amount, quote = izumi_math.zap_swap_amount(snapshot, amount_in, True, LEFT_POINT, RIGHT_POINT)
+    amount_x, amount_y = izumi_math.deposit_amounts(
+        izumi_math.POW_96, LEFT_POINT, RIGHT_POINT, quote.final_point, snapshot.sqrt_rate_96
+    )
+
+    assert 0 < swap_amount < amount_in
+    left_x = amount_in - quote.amount_in
+    assert abs(left_x * amount_y - quote.amount_out * amount_x) * 100 < quote.amount_out * amount_x
+
+
+def test_best_quote_prefers_filled_quote():
+    shallow = make_snapshot(liquidity=10 ** 11)
+    deep = make_snapshot()
+
+    snapshot, quote = izumi_math.best_quote([shallow, deep], 10 ** 16, deep.token_x)
+
+    assert snapshot is deep
+    assert quote.filled
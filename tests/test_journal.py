@@ -0,0 +1,218 @@
+from types import SimpleNamespace
+
+import pytest
+
+import enums
+import journal
+
+
+NETWORK = enums.NetworkNames.zkEra
+WALLET = '0x36615Cf349d7F6344891B1e7CA7C72883F5dc049'
+PRIVATE_KEY = '0x' + '11' * 32
+PARAMS = {'network_name': 'zkEra', 'amount': 1}
+
+
+class FakeEth:
+    def __init__(self):
+        self.sent = []
+
+    def send_raw_transaction(self, raw):
+        self.sent.append(raw)
+        if len(self.sent) > 1:
+            raise ValueError('already known')
+        return bytes(32)
+
+
+def signed(index: int):
+    return SimpleNamespace(hash=bytes([index]) * 32, rawTransaction=bytes([index]) * 8)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / 'journal.sqlite3'
+
+
+@pytest.fixture
+def receipts(monkeypatch):
+    statuses = {}
+    recorded = []
+
+    def wait_for_transaction_receipt(zk_web3, txn_hash, logging_prefix):
+        status = statuses.get(txn_hash)
+        return None if status is None else {'status': status, 'transactionHash': txn_hash}
+
+    monkeypatch.setattr(journal.receipts, 'wait_for_transaction_receipt', wait_for_transaction_receipt)
+    monkeypatch.setattr(
+        journal.allowances.ledger,
+        'record_receipt',
+        lambda network_name, receipt: recorded.append(receipt['transactionHash'])
+    )
+    return statuses, recorded
+
+
+def interrupted_action(path, stages: tuple):
+    first = journal.Journal(path)
+    action = first.begin('swap', WALLET, PARAMS)
+    for index, stage in enumerate(stages, 1):
+        action.sign(stage, signed(index))
+    first.close()
+
+    second = journal.Journal(path)
+    return second, second.begin('swap', WALLET, PARAMS)
+
+
+def test_begin_resumes_unfinished_action(path):
+    first = journal.Journal(path)
+    action = first.begin('swap', WALLET, PARAMS)
+    first.close()
+
+    second = journal.Journal(path)
+    resumed = second.begin('swap', WALLET, PARAMS)
+
+    assert resumed.resumed
+    assert resumed.action_id == action.action_id
+    assert not second.begin('swap', WALLET, PARAMS).resumed
+    second.close()
+
+
+def test_finished_action_is_not_resumed(path):
+    first = journal.Journal(path)
+    first.begin('swap', WALLET, PARAMS).finish(enums.TransactionStatus.SUCCESS)
+    first.close()
+
+    second = journal.Journal(path)
+    assert not second.begin('swap', WALLET, PARAMS).resumed
+    second.close()
+
+
+def test_resume_rebroadcasts_and_reports_success(path, receipts):
+    statuses, recorded = receipts
+    store, action = interrupted_action(path, ('approve', 'swap'))
+    statuses[journal.Web3.to_hex(signed(1).hash)] = 1
+    statuses[journal.Web3.to_hex(signed(2).hash)] = 1
+
+    zk_web3 = SimpleNamespace(eth=FakeEth())
+    status = action.resume(zk_web3, NETWORK, ('swap',), 'Test')
+
+    assert status == enums.TransactionStatus.SUCCESS
+    assert zk_web3.eth.sent == [journal.Web3.to_hex(signed(1).rawTransaction), journal.Web3.to_hex(signed(2).rawTransaction)]
+    assert recorded == [journal.Web3.to_hex(signed(1).hash), journal.Web3.to_hex(signed(2).hash)]
+    store.close()
+
+
+def test_resume_reports_failed_final_stage(path, receipts):
+    statuses, recorded = receipts
+    store, action = interrupted_action(path, ('approve', 'swap'))
+    statuses[journal.Web3.to_hex(signed(1).hash)] = 1
+    statuses[journal.Web3.to_hex(signed(2).hash)] = 0
+
+    status = action.resume(SimpleNamespace(eth=FakeEth()), NETWORK, ('swap',), 'Test')
+
+    assert status == enums.TransactionStatus.FAILED
+    assert recorded == [journal.Web3.to_hex(signed(1).hash)]
+    store.close()
+
+
+def test_resume_without_final_stage_reruns(path, receipts):
+    statuses, _ = receipts
+    store, action = interrupted_action(path, ('approve',))
+    statuses[journal.Web3.to_hex(signed(1).hash)] = 1
+
+    assert action.resume(SimpleNamespace(eth=FakeEth()), NETWORK, ('swap',), 'Test') is None
+    store.close()
+
+
+def test_resume_continues_after_completed_stage(path, receipts):
+    statuses, _ = receipts
+    first = journal.Journal(path)
+    action = first.begin('swap', WALLET, PARAMS)
+    action.sign('swap', signed(1), amount_in=5)
+    first.close()
+
+    store = journal.Journal(path)
+    action = store.begin('swap', WALLET, PARAMS)
+    statuses[journal.Web3.to_hex(signed(1).hash)] = 1
+
+    assert action.resume(SimpleNamespace(eth=FakeEth()), NETWORK, ('swap', 'mint'), 'Test') is None
+    assert action.completed == {'swap': [{'amount_in': 5}]}
+    store.close()
+
+
+def test_journaled_reruns_only_remaining_stages(path, monkeypatch, receipts):
+    statuses, _ = receipts
+    store = journal.Journal(path)
+    monkeypatch.setattr(journal, 'journal', store)
+    monkeypatch.setattr(journal.Account, 'from_key', lambda private_key: SimpleNamespace(address=WALLET))
+    monkeypatch.setattr(journal.constants, 'NETWORKS', {'zkEra': SimpleNamespace(rpc_url='http://rpc')}, raising=False)
+    monkeypatch.setattr(journal.clients, 'get_client', lambda rpc_url, proxy=None: SimpleNamespace(eth=FakeEth()), raising=False)
+    statuses[journal.Web3.to_hex(signed(1).hash)] = 1
+
+    runs = []
+
+    @journal.journaled('zap', final_stages=('swap', 'mint'))
+    def zap(private_key, network_name, amount, proxy=None):
+        runs.append(journal.completed('swap'))
+        if not journal.completed('swap'):
+            journal.current().sign('swap', signed(1), amount_in=5)
+            raise ValueError('rpc dropped')
+        return enums.TransactionStatus.SUCCESS
+
+    with pytest.raises(ValueError):
+        zap(PRIVATE_KEY, 'zkEra', 1)
+
+    assert zap(PRIVATE_KEY, 'zkEra', 1) == enums.TransactionStatus.SUCCESS
+    assert runs == [[], [{'amount_in': 5}]]
+    store.close()
+
+
+def test_journaled_suspends_action_after_signing(path, monkeypatch):
+    store = journal.Journal(path)
+    monkeypatch.setattr(journal, 'journal', store)
+    monkeypatch.setattr(journal.Account, 'from_key', lambda private_key: SimpleNamespace(address=WALLET))
+
+    @journal.journaled('swap', final_stages=('swap',))
+    def swap(private_key, network_name, amount, proxy=None):
+        journal.current().sign('swap', signed(1))
+        raise ValueError('rpc dropped')
+
+    with pytest.raises(ValueError):
+        swap(PRIVATE_KEY, 'zkEra', 1)
+
+    assert store.begin('swap', WALLET, PARAMS).resumed
+    store.close()
+
+
+def test_journaled_finishes_action_that_never_signed(path, monkeypatch):
+    store = journal.Journal(path)
+    monkeypatch.setattr(journal, 'journal', store)
+    monkeypatch.setattr(journal.Account, 'from_key', lambda private_key: SimpleNamespace(address=WALLET))
+
+    @journal.journaled('swap', final_stages=('swap',))
+    def swap(private_key, network_name, amount, proxy=None):
+        raise ValueError('quote failed')
+
+    with pytest.raises(ValueError):
+        swap(PRIVATE_KEY, 'zkEra', 1)
+
+    assert not store.begin('swap', WALLET, PARAMS).resumed
+    store.close()
+
+
+def test_journaled_nested_action_joins_parent(path, monkeypatch):
+    store = journal.Journal(path)
+    monkeypatch.setattr(journal, 'journal', store)
+    monkeypatch.setattr(journal.Account, 'from_key', lambda private_key: SimpleNamespace(address=WALLET))
+
+    @journal.journaled('swap')
+    def swap(private_key, network_name, amount, proxy=None):
+        return journal.current()
+
+    @journal.journaled('zap')
+    def zap(private_key, network_name, amount, proxy=None):
+        return journal.current(), swap(private_key, network_name, amount)
+
+    parent, nested = zap(PRIVATE_KEY, 'zkEra', 1)
+
+    assert nested is parent
+    assert parent.name == 'zap'
+    store.close()
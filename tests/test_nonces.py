@@ -0,0 +1,122 @@
+import pytest
+
+import enums
+import nonces
+
+
+NETWORK = enums.NetworkNames.zkEra
+ADDRESS = '0x36615Cf349d7F6344891B1e7CA7C72883F5dc049'
+
+
+@pytest.fixture
+def manager():
+    return nonces.NonceManager()
+
+
+def test_acquire_requires_chain_nonce(manager):
+    with pytest.raises(ValueError):
+        manager.acquire(NETWORK, ADDRESS)
+
+
+def test_acquire_hands_out_sequential_nonces(manager):
+    assert manager.acquire(NETWORK, ADDRESS, 5) == 5
+    assert manager.acquire(NETWORK, ADDRESS) == 6
+    assert manager.acquire(NETWORK, ADDRESS, 5) == 7
+    assert manager.acquire(NETWORK, ADDRESS.lower()) == 8
+
+
+def test_chain_nonce_ahead_resyncs(manager):
+    manager.acquire(NETWORK, ADDRESS, 5)
+    assert manager.acquire(NETWORK, ADDRESS, 9) == 9
+    assert manager.pending(NETWORK, ADDRESS) == {9: None}
+
+
+def test_confirmed_nonces_leave_pending(manager):
+    first = manager.acquire(NETWORK, ADDRESS, 0)
+    second = manager.acquire(NETWORK, ADDRESS)
+    manager.sent(NETWORK, ADDRESS, first, b'\x01')
+    manager.sent(NETWORK, ADDRESS, second, '0x02')
+    manager.confirm(NETWORK, ADDRESS, first)
+
+    assert manager.pending(NETWORK, ADDRESS) == {second: '0x02'}
+
+
+def test_unmined_confirm_forces_resync(manager):
+    nonce = manager.acquire(NETWORK, ADDRESS, 3)
+    manager.acquire(NETWORK, ADDRESS)
+    manager.confirm(NETWORK, ADDRESS, nonce, mined=False)
+
+    assert manager.acquire(NETWORK, ADDRESS, 3) == 3
+
+
+def test_release_of_latest_nonce_rewinds(manager):
+    manager.acquire(NETWORK, ADDRESS, 0)
+    nonce = manager.acquire(NETWORK, ADDRESS)
+    manager.release(NETWORK, ADDRESS, nonce)
+
+    assert manager.acquire(NETWORK, ADDRESS) == nonce
+
+
+def test_released_gap_is_reused_first(manager):
+    first = manager.acquire(NETWORK, ADDRESS, 0)
+    second = manager.acquire(NETWORK, ADDRESS)
+    third = manager.acquire(NETWORK, ADDRESS)
+    manager.release(NETWORK, ADDRESS, second)
+
+    assert manager.acquire(NETWORK, ADDRESS) == second
+    assert manager.acquire(NETWORK, ADDRESS) == third + 1
+    assert sorted(manager.pending(NETWORK, ADDRESS)) == [first, second, third, third + 1]
+
+
+def test_release_all_collapses_the_tail(manager):
+    acquired = [manager.acquire(NETWORK, ADDRESS, 10) for _ in range(4)]
+    manager.release_all(NETWORK, ADDRESS, acquired[1:])
+
+    assert manager.acquire(NETWORK, ADDRESS) == 11
+
+
+def test_release_of_unknown_nonce_is_ignored(manager):
+    manager.release(NETWORK, ADDRESS, 4)
+    manager.acquire(NETWORK, ADDRESS, 2)
+    manager.release(NETWORK, ADDRESS, 7)
+
+    assert manager.acquire(NETWORK, ADDRESS) == 3
+
+
+def test_stale_pending_nonce_resyncs(monkeypatch):
+    manager = nonces.NonceManager(pending_timeout=10)
+    now = [100]
+    monkeypatch.setattr(nonces.time, 'monotonic', lambda: now[0])
+
+    manager.acquire(NETWORK, ADDRESS, 0)
+    now[0] += 11
+
+    assert manager.acquire(NETWORK, ADDRESS, 0) == 0
+
+
+def test_send_raw_transaction_releases_on_failure(monkeypatch):
+    manager = nonces.NonceManager()
+    monkeypatch.setattr(nonces, 'manager', manager)
+
+    def fail(zk_web3, stage, signed):
+        raise ValueError('rejected')
+
+    monkeypatch.setattr(nonces.journal, 'send_raw_transaction', fail)
+
+    nonce = manager.acquire(NETWORK, ADDRESS, 0)
+    with pytest.raises(ValueError):
+        nonces.send_raw_transaction(None, NETWORK, ADDRESS, nonce, 'swap', None)
+
+    assert manager.pending(NETWORK, ADDRESS) == {}
+    assert manager.acquire(NETWORK, ADDRESS) == nonce
+
+
+def test_send_raw_transaction_marks_sent(monkeypatch):
+    manager = nonces.NonceManager()
+    monkeypatch.setattr(nonces, 'manager', manager)
+    monkeypatch.setattr(nonces.journal, 'send_raw_transaction', lambda zk_web3, stage, signed: b'\xab')
+
+    nonce = manager.acquire(NETWORK, ADDRESS, 0)
+    nonces.send_raw_transaction(None, NETWORK, ADDRESS, nonce, 'swap', None)
+
+    assert manager.pending(NETWORK, ADDRESS) == {nonce: 'ab'}
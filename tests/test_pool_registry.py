@@ -0,0 +1,85 @@
+from web3 import Web3
+
+import enums
+import pool_registry
+
+
+FACTORY = '0xf2DAd89f2788a8CD54625C60b55cD3d2D0ACa7Cb'
+SALT = bytes(range(32))
+BYTECODE_HASH = bytes.fromhex('010001cb6a6e8d5f6829522f19fa9568660e0a9cd53b2e8be4deb0a679452e41')
+
+
+def test_create2_prefix_matches_contract_deployer():
+    assert pool_registry.ZKSYNC_CREATE2_PREFIX.hex() == (
+        '2020dba91b30cc0006188af794c2fb30dd8520db7e2c088b7fc7c103c00ca494'
+    )
+    assert pool_registry.EMPTY_INPUT_HASH.hex() == (
+        'c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470'
+    )
+
+
+def test_create2_address_follows_zksync_derivation():
+    expected = Web3.keccak(
+        Web3.keccak(text='zksyncCreate2')
+        + bytes(12) + bytes.fromhex(FACTORY[2:])
+        + SALT
+        + BYTECODE_HASH
+        + Web3.keccak(b'')
+    )[12:]
+
+    address = pool_registry.zksync_create2_address(FACTORY, SALT, BYTECODE_HASH)
+
+    assert address == Web3.to_checksum_address(expected)
+
+
+def test_create2_address_depends_on_every_input():
+    address = pool_registry.zksync_create2_address(FACTORY, SALT, BYTECODE_HASH)
+
+    assert address != pool_registry.zksync_create2_address(FACTORY, bytes(32), BYTECODE_HASH)
+    assert address != pool_registry.zksync_create2_address(FACTORY.lower()[:-1] + '0', SALT, BYTECODE_HASH)
+    assert address != pool_registry.zksync_create2_address(FACTORY, SALT, BYTECODE_HASH, bytes(32))
+    assert address == pool_registry.zksync_create2_address(FACTORY.lower(), SALT, BYTECODE_HASH)
+
+
+def test_bytecode_hash_layout():
+    bytecode = bytes(range(64)) * 3
+
+    bytecode_hash = pool_registry.zksync_bytecode_hash(bytecode)
+
+    assert len(bytecode_hash) == 32
+    assert bytecode_hash[:2] == b'\x01\x00'
+    assert int.from_bytes(bytecode_hash[2:4], 'big') == len(bytecode) // 32
+    assert bytecode_hash[4:] == pool_registry.hashlib.sha256(bytecode).digest()[4:]
+
+
+def test_sort_tokens_orders_by_address():
+    low = '0x000000000000000000000000000000000000000A'
+    high = '0x00000000000000000000000000000000000000b0'
+
+    assert pool_registry.sort_tokens(high, low) == (low, high)
+    assert pool_registry.sort_tokens(low, high) == (low, high)
+
+
+def test_registry_round_trip(tmp_path):
+    registry = pool_registry.PoolRegistry(tmp_path / 'pool_registry.json')
+    registry.set(enums.NetworkNames.zkEra, 'Pools', 'a:b', '0x01')
+    registry.flush()
+
+    assert pool_registry.PoolRegistry(tmp_path / 'pool_registry.json').get(
+        enums.NetworkNames.zkEra, 'Pools', 'a:b'
+    ) == '0x01'
+
+
+def test_registry_batches_writes(tmp_path, monkeypatch):
+    registry = pool_registry.PoolRegistry(tmp_path / 'pool_registry.json', save_delay=60)
+    saves = []
+    save = registry._save
+    monkeypatch.setattr(registry, '_save', lambda: saves.append(save()))
+
+    for index in range(10):
+        registry.set(enums.NetworkNames.zkEra, 'Pools', f'pair{index}', f'0x{index:02x}')
+
+    assert saves == []
+    registry.flush()
+    registry.flush()
+    assert len(saves) == 1
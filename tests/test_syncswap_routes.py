@@ -0,0 +1,46 @@
+import syncswap_routes
+from syncswap_math import PoolReserves
+
+
+WETH = '0x0000000000000000000000000000000000000001'
+USDC = '0x0000000000000000000000000000000000000002'
+USDT = '0x0000000000000000000000000000000000000003'
+
+
+def make_graph() -> syncswap_routes.PoolGraph:
+    return syncswap_routes.PoolGraph([
+        PoolReserves('0x00000000000000000000000000000000000000a1', WETH, USDC, 10 ** 21, 2 * 10 ** 24),
+        PoolReserves('0x00000000000000000000000000000000000000a2', USDC, USDT, 10 ** 24, 10 ** 24),
+        PoolReserves('0x00000000000000000000000000000000000000a3', WETH, USDT, 10 ** 18, 2 * 10 ** 21),
+    ])
+
+
+def test_best_route_prefers_deeper_path():
+    route = make_graph().best_route(WETH, USDT, 10 ** 18)
+
+    assert route.hops == 2
+    assert route.tokens == (WETH, USDC)
+
+
+def test_with_reserves_leaves_published_graph_untouched():
+    graph = make_graph()
+    before = graph.best_route(WETH, USDT, 10 ** 18)
+    drained = PoolReserves('0x00000000000000000000000000000000000000a1', WETH, USDC, 10 ** 21, 10 ** 20)
+
+    overlay = graph.with_reserves([drained])
+
+    assert graph.best_route(WETH, USDT, 10 ** 18) == before
+    assert overlay.best_route(WETH, USDT, 10 ** 18).hops == 1
+    assert overlay.get(drained.address) is drained
+
+
+def test_staleness_tracks_the_oldest_pool(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(syncswap_routes.time, 'monotonic', lambda: now[0])
+    graph = make_graph()
+
+    now[0] += syncswap_routes.RESERVES_TTL + 1
+    overlay = graph.with_reserves([graph.get('0x00000000000000000000000000000000000000a1')])
+
+    assert graph.is_stale()
+    assert overlay.is_stale()